@@ -0,0 +1,82 @@
+"""Compare vocabulary extraction throughput of the local segmenter and Azure key phrases.
+
+Usage:
+    python benchmarks/segmenter_throughput.py [BOOK.epub] [--workers N] [--azure]
+
+Without a book, a synthetic text is generated from the segmenter dictionary.
+The Azure path is only measured with --azure, and needs AZURE_LANGUAGE_ENDPOINT
+and AZURE_LANGUAGE_KEY; it uses a throwaway cache so every chunk is sent.
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from anki_pleco_importer.epub_analyzer import Chapter, ChineseEPUBAnalyzer
+from anki_pleco_importer.hsk import HSKWordLists
+from anki_pleco_importer.segmenter import ChineseSegmenter
+
+
+def synthetic_chapters(size_mb: float, chapter_count: int = 50) -> List[Chapter]:
+    """Build chapters of random dictionary words, weighted by frequency."""
+    segmenter = ChineseSegmenter()
+    words = [word for word, freq in segmenter.frequencies.items() if freq > 1000]
+    weights = [segmenter.frequencies[word] for word in words]
+    rng = random.Random(42)
+
+    chars_per_chapter = int(size_mb * 1024 * 1024 / 3 / chapter_count)
+    chapters = []
+    for number in range(chapter_count):
+        sentences = []
+        length = 0
+        while length < chars_per_chapter:
+            sentence = "".join(rng.choices(words, weights, k=rng.randint(4, 16))) + "。"
+            sentences.append(sentence)
+            length += len(sentence)
+        chapters.append(Chapter(f"chapter_{number}", f"第{number + 1}章", "".join(sentences)))
+    return chapters
+
+
+def report(name: str, size_bytes: int, seconds: float, words: int) -> None:
+    """Print one benchmark result line."""
+    print(f"{name:<28} {seconds:>8.2f}s {size_bytes / seconds / 1e6:>8.2f} MB/s {words:>10,} distinct words")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("book", nargs="?", type=Path, help="EPUB file to analyze")
+    parser.add_argument("--size-mb", type=float, default=2.0, help="Size of the synthetic text (default: 2 MB)")
+    parser.add_argument("--workers", type=int, default=4, help="Processes for the pooled run (default: 4)")
+    parser.add_argument("--azure", action="store_true", help="Also measure Azure key phrase extraction")
+    args = parser.parse_args()
+
+    hsk_word_lists = HSKWordLists(Path("."))
+    local = ChineseEPUBAnalyzer(hsk_word_lists, segmenter="local")
+    chapters = list(local.iter_chapters(args.book)) if args.book else synthetic_chapters(args.size_mb)
+    size_bytes = sum(len(chapter.text.encode("utf-8")) for chapter in chapters)
+    print(f"{len(chapters)} chapters, {size_bytes / 1e6:.2f} MB of UTF-8 text\n")
+
+    local.word_segmenter  # Load the dictionary outside the timed section
+    start = time.perf_counter()
+    frequencies, _ = local.count_token_frequencies_by_chapter(chapters)
+    report("local (1 process)", size_bytes, time.perf_counter() - start, len(frequencies))
+
+    pooled = ChineseEPUBAnalyzer(hsk_word_lists, segmenter="local", workers=args.workers)
+    start = time.perf_counter()
+    frequencies, _ = pooled.count_token_frequencies_by_chapter(chapters)
+    report(f"local ({args.workers} processes)", size_bytes, time.perf_counter() - start, len(frequencies))
+
+    if args.azure:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with ChineseEPUBAnalyzer(hsk_word_lists, cache_dir=Path(cache_dir)) as azure:
+                start = time.perf_counter()
+                key_phrases = azure.extract_key_phrases_from_chapters(chapters)
+                frequencies, _ = azure.count_phrase_frequencies_by_chapter(key_phrases, chapters)
+            report("azure key phrases", size_bytes, time.perf_counter() - start, len(frequencies))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+Feature: Forvo Audio Generation
+  As a Chinese learner
+  I want pronunciations looked up quickly and only once
+  So that converting a large Pleco export does not wait on the Forvo API word by word
+
+  Scenario: Pronunciations are looked up concurrently over reused connections
+    Given a fake Forvo server with recorded pronunciations
+    And a Forvo generator using the fake server
+    When I run the audio pipeline for "你好|谢谢|再见|朋友|老师|学习|喜欢|吃饭" on 4 threads
+    Then the audio pipeline should have audio for "你好|谢谢|再见|朋友|老师|学习|喜欢|吃饭"
+    And the fake Forvo server should have answered 8 pronunciation requests
+    And the fake Forvo server should have accepted at most 4 connections
+
+  Scenario: Each uncached word costs a single pronunciation request
+    Given a fake Forvo server with recorded pronunciations
+    And a Forvo generator using the fake server
+    When I generate audio for "你好|谢谢|再见"
+    And I generate audio for "你好|谢谢|再见"
+    Then 3 audio files by "liufeimagic" should be in the audio cache
+    And the fake Forvo server should have answered 3 pronunciation requests
+    And the fake Forvo server should have answered 3 audio downloads
+
+  Scenario: An existing audio cache is indexed when its manifest is missing
+    Given a fake Forvo server with recorded pronunciations
+    And an audio cache without a manifest holding Forvo audio for "你好|谢谢" and a file named "notes.mp3"
+    And a Forvo generator using the fake server
+    Then the audio cache manifest should list "你好|谢谢"
+    When I generate audio for "你好|谢谢"
+    Then the fake Forvo server should have answered 0 pronunciation requests
+
+  Scenario: A deleted cache file is downloaded again
+    Given a fake Forvo server with recorded pronunciations
+    And a Forvo generator using the fake server
+    When I generate audio for "你好"
+    And I delete the cached audio files
+    And I generate audio for "你好"
+    Then 1 audio files by "liufeimagic" should be in the audio cache
+    And the fake Forvo server should have answered 2 audio downloads
+
+  Scenario: Pronunciation lists are reused by the next run
+    Given a fake Forvo server with recorded pronunciations
+    And a Forvo generator using the fake server
+    When I look up pronunciations for "你好|谢谢|再见"
+    And I start a new run with the same audio cache
+    And I look up pronunciations for "你好|谢谢|再见|朋友"
+    And I generate audio for "你好|谢谢|再见|朋友"
+    Then the fake Forvo server should have answered 4 pronunciation requests
+
+  Scenario: Expired pronunciation lists are fetched again
+    Given a fake Forvo server with recorded pronunciations
+    And a Forvo generator using the fake server
+    When I look up pronunciations for "你好|谢谢"
+    And I start a new run with the same audio cache keeping metadata for 0 seconds
+    And I look up pronunciations for "你好|谢谢"
+    Then the fake Forvo server should have answered 4 pronunciation requests
+
+  Scenario: Identical recordings for different words share one file in the cache
+    Given a fake Forvo server with recorded pronunciations
+    And a Forvo generator using the fake server
+    When I generate audio for "你好|谢谢|再见"
+    Then 3 audio files by "liufeimagic" should be in the audio cache
+    And the cached audio files should share one file on disk
+
+  Scenario Outline: Audio is placed in the media folder with the <strategy> strategy
+    Given a fake Forvo server with recorded pronunciations
+    And a Forvo generator using the fake server
+    When I generate audio for "你好" into the media folder with the <strategy> strategy
+    Then the media folder audio should have the cached content
+    And the media folder audio should be <relation> the cached file
+
+    Examples:
+      | strategy | relation      |
+      | hardlink | the same as   |
+      | symlink  | a link to     |
+      | copy     | a copy of     |
+      | reflink  | a copy of     |
+
+  Scenario: Previews are downloaded in the background and the selected one is kept
+    Given a fake Forvo server with recorded pronunciations
+    And an interactive Forvo generator using the fake server
+    When I enter "2|1|2|s2" while generating audio for "你好"
+    Then the previews by "mouyao|liufeimagic|mouyao" should have been played
+    And 1 audio files by "mouyao" should be in the audio cache
+    And the fake Forvo server should have answered 2 audio downloads
+
+  Scenario: Only words needing a choice are prompted for, on the main thread
+    Given a fake Forvo server with recorded pronunciations
+    And a Forvo generator using the fake server
+    When I generate audio for "你好"
+    And I run the audio pipeline for "你好|谢谢|再见|谢谢" with interactive selection, entering "s1|s2"
+    Then the audio pipeline should have prompted for 2 words on the main thread
+    And the audio pipeline should have audio for "你好|谢谢|再见"
+    And the fake Forvo server should have answered 3 pronunciation requests
+
+  Scenario: Cached audio is normalized once, and later runs skip it
+    Given a fake Forvo server with recorded pronunciations
+    And a Forvo generator using the fake server
+    And a fake ffmpeg measuring a loudness of -23.5 LUFS
+    When I generate audio for "你好|谢谢|再见"
+    And I normalize the audio cache
+    Then the normalization should report 1 normalized, 0 failed and 0 skipped
+    And the cached audio files should be normalized
+    And the cached audio files should share one file on disk
+    And the audio cache manifest should record a loudness of -23.5 LUFS and a gain of 7.5 dB
+    When I start a new run with the same audio cache
+    And I normalize the audio cache
+    Then the normalization should report 0 normalized, 0 failed and 3 skipped
+    And the fake ffmpeg should have run 2 times
+
+  Scenario: Normalization is skipped without ffmpeg
+    Given a fake Forvo server with recorded pronunciations
+    And a Forvo generator using the fake server
+    And no ffmpeg on the PATH
+    When I generate audio for "你好"
+    And I normalize the audio cache
+    Then the normalization should report 0 normalized, 0 failed and 0 skipped
+    And 1 audio files by "liufeimagic" should be in the audio cache
+
+  Scenario Outline: Audio is transcoded once to a compact <audio_format> variant kept in the cache
+    Given a fake Forvo server with recorded pronunciations
+    And a Forvo generator using the fake server
+    And a fake ffmpeg measuring a loudness of -20 LUFS
+    When I generate audio for "你好|谢谢|再见"
+    And I transcode the audio of the run to <audio_format>
+    Then the transcoding should report 1 transcoded, 0 reused and 137 bytes saved
+    And every file of the run should have one compact variant ending in "<suffix>" next to it in the audio cache
+    And the fake ffmpeg should have trimmed silence and encoded with "<codec>"
+    When I start a new run with the same audio cache
+    And I transcode the audio of the run to <audio_format>
+    Then the transcoding should report 0 transcoded, 1 reused and 137 bytes saved
+    And the fake ffmpeg should have run 1 times
+
+    Examples:
+      | audio_format | suffix    | codec      |
+      | opus         | .opus     | libopus    |
+      | mp3-48k      | .48k.mp3  | libmp3lame |
+
+  Scenario: Throttled Forvo requests are retried when the server allows
+    Given a fake Forvo server with recorded pronunciations
+    And a Forvo generator using the fake server
+    And the fake Forvo server throttles the next 3 pronunciation requests
+    When I generate audio for "你好|谢谢"
+    Then 2 audio files by "liufeimagic" should be in the audio cache
+    And the fake Forvo server should have answered 5 pronunciation requests
+    And the Forvo client should have retried 3 throttled requests
+
+  Scenario: Words without a Forvo recording get audio from offline speech synthesis
+    Given a fake Forvo server with recorded pronunciations
+    And a Forvo generator using the fake server
+    And the fake Forvo server has no pronunciations for "嗯|哦"
+    When I run the audio pipeline for "你好|嗯|哦" with a local speech synthesis fallback
+    Then the audio pipeline should have audio for "你好|嗯|哦"
+    And "嗯|哦" should have been synthesized into the audio cache
+    And no words should be reported without audio
+
+  Scenario: A slow provider is hedged with the next one, and its late audio is still cached
+    Given a fake Forvo server with recorded pronunciations
+    And a Forvo generator using the fake server
+    And the fake Forvo server answers pronunciation requests after 1 seconds
+    And a generator hedging Forvo with local speech synthesis after 0.1 seconds
+    When I generate audio for "你好" with the hedging generator
+    Then the audio for "你好" should have come from local speech synthesis in under 0.9 seconds
+    And once the generator is closed the Forvo audio for "你好" should be in the audio cache
+
+  Scenario: Hedging waits for a provider's p95 latency once enough of it is known
+    Given a fake Forvo server with recorded pronunciations
+    And a Forvo generator using the fake server
+    And a generator hedging Forvo with local speech synthesis after 2 seconds
+    Then the hedging threshold of "forvo" should be 2 seconds
+    When "forvo" has answered 100 requests taking 10 to 1000 ms
+    Then the hedging threshold of "forvo" should be within 25% above 950 ms
+
+  Scenario: Cache hits do not lower the hedging threshold
+    Given a fake Forvo server with recorded pronunciations
+    And a Forvo generator using the fake server
+    And a generator hedging Forvo with local speech synthesis after 2 seconds
+    When I generate audio for "你好" with the hedging generator 25 times
+    Then "forvo" should have 1 latency recorded
+    And the hedging threshold of "forvo" should be 2 seconds
+
+  Scenario: A slow Forvo is hedged even when it may ask the user to choose
+    Given a fake Forvo server with recorded pronunciations
+    And a Forvo generator using the fake server
+    And the fake Forvo server answers pronunciation requests after 1.5 seconds
+    And a generator hedging Forvo with local speech synthesis after 0.1 seconds, with interactive selection
+    When I generate audio for "你好" with the hedging generator
+    Then the audio for "你好" should have come from local speech synthesis in under 0.9 seconds
+    And once the generator is closed the Forvo audio for "你好" should be in the audio cache
+    And the fake Forvo server should have answered 1 pronunciation requests
+    And "forvo" should have 1 latency recorded, of at least 1.5 seconds
+
+  Scenario: Hedged words needing a choice are prompted for on the main thread
+    Given a fake Forvo server with recorded pronunciations
+    And a Forvo generator using the fake server
+    When I run the audio pipeline for "谢谢|再见" hedging Forvo with local speech synthesis, entering "s1|s2"
+    Then the audio pipeline should have prompted for 2 words on the main thread
+    And the audio pipeline should have Forvo audio for "谢谢|再见"
+    And the fake Forvo server should have answered 2 pronunciation requests
@@ -0,0 +1,69 @@
+Feature: EPUB Vocabulary Analysis
+  As a Chinese learner
+  I want EPUB books analyzed efficiently against Azure key phrase extraction
+  So that long novels do not cost hundreds of serial API round-trips
+
+  Background:
+    Given an Azure key phrase stub server
+    And an EPUB book with 30 chapters
+
+  Scenario: Chunks are packed into multi-document batches
+    When I extract key phrases from the book
+    Then the stub server should have received one request per 10 chunks
+    And every stub request should contain at most 10 documents
+    And the key phrases should match a sequential extraction
+
+  Scenario: Throttled requests are retried
+    Given the stub server throttles the first 2 requests
+    When I extract key phrases from the book
+    Then the stub server should have received 2 requests more than one per 10 chunks
+    And the key phrases should match a sequential extraction
+
+  Scenario: Unchanged chunks are served from the cache
+    When I extract key phrases from the book
+    And I extract key phrases from the book again
+    Then the stub server should have received one request per 10 chunks
+    And the key phrase cache should report one hit per chunk
+
+  Scenario: The local segmenter counts every token without Azure
+    When I analyze the book with the local segmenter using 1 worker
+    And I analyze the book with the local segmenter using 2 workers
+    Then both local analyses should report the same word frequencies
+    And every sample word should be counted as a token
+    And the stub server should have received 0 requests
+
+  Scenario: Example sentences are the shortest sentences containing each word
+    When I analyze the book with the local segmenter and 3 examples per word
+    Then every top unknown word should have the 3 shortest sentences containing it as examples
+    When I analyze the book with the local segmenter and 3 examples per word
+    Then the sentence index should have been reused
+
+  Scenario: Chapter text leaves out scripts, styles and annotations and decodes every entity
+    Given an EPUB chapter with scripts, styles, ruby annotations and character references
+    When I read the chapters of the book with 1 worker
+    Then the chapter text should be "第一章 我们学习中文。“朋友”&<老师> 好"
+    And the chapter title should be "第一章"
+
+  Scenario: Chapters parsed in a process pool match chapters parsed serially
+    Given an EPUB book with 6 chapters
+    When I read the chapters of the book with 1 worker
+    And I read the chapters of the book with 2 workers
+    Then both readings should give the same chapters
+
+  Scenario: Coverage targets and the coverage curve match counting words one by one
+    When I calculate the coverage of "我们:40, 今天:25, 学习:15, 中文:10, 朋友:7, 老师:4, 喜欢:2, 吃饭:1" knowing "我们"
+    Then the coverage targets for 50, 80, 90, 95 and 98% should match counting words one by one
+    And the coverage curve should match counting words one by one
+
+  Scenario: analyze-epub writes the coverage curve to a CSV file
+    Given an Anki export knowing "我们|今天"
+    When I run analyze-epub on the book with the local segmenter and --coverage-curve
+    Then the coverage curve CSV should list the coverage curve of the book
+
+  Scenario: Chapters are read in order and reported with their own statistics
+    Given an EPUB book with 3 chapters
+    And an Anki export knowing "我们|今天"
+    When I read the chapters of the book with 1 worker
+    Then the first chapters should be "第1章|第2章|第3章"
+    When I run analyze-epub on the book with the local segmenter and --verbose
+    Then the chapter statistics should list every chapter with its Chinese characters
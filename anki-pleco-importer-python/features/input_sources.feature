@@ -0,0 +1,21 @@
+Feature: Plain Text and Subtitle Input
+  As a Chinese learner
+  I want to analyze .txt novels and subtitle files like EPUB books
+  So that all my reading and listening material gets the same coverage reports
+
+  Scenario: A text file is read in small blocks and split at chapter headings
+    Given a text file with a preface and 3 chapters
+    When I read the text file in blocks of 7 bytes
+    Then the text file should give 4 chapters titled after its name and headings
+    And the chapters should contain every non-empty line of the file
+
+  Scenario: Subtitles are read without numbering, timing and markup
+    Given an SRT file and an ASS file with the same dialogue
+    When I read both subtitle files
+    Then both subtitle files should give the dialogue lines "我们今天学习中文|朋友喜欢吃饭 老师已经来了"
+
+  Scenario: A subtitle file is analyzed against the Anki collection
+    Given an SRT file and an ASS file with the same dialogue
+    When I analyze the SRT file with the local segmenter knowing "我们"
+    Then the analysis should be titled "episode"
+    And "学习" should be an unknown word of the analysis
@@ -0,0 +1,30 @@
+Feature: Library Analysis
+  As a Chinese learner
+  I want a directory of EPUB books ranked by how readable they are for my deck
+  So that I can pick my next book without re-analyzing every book each time
+
+  Scenario: Unchanged books are ranked from stored word frequencies
+    Given a library directory with books of 3, 6 and 9 chapters
+    When I analyze the library with the local segmenter knowing "我们"
+    Then 3 books should have been analyzed
+    And the books should be ranked by descending coverage
+    When I analyze the library with the local segmenter knowing "我们, 今天, 学习"
+    Then 0 books should have been analyzed
+    And the coverage of every book should have increased
+
+  Scenario Outline: The learning plan stops counting books that reach the target coverage
+    Given books with word frequencies:
+      | book | word | frequency |
+      | 甲   | 我们 | 50        |
+      | 甲   | 朋友 | 30        |
+      | 甲   | 老师 | 20        |
+      | 乙   | 朋友 | 40        |
+      | 乙   | 学生 | 60        |
+    When I plan 3 words with a target coverage of <target>%
+    Then the planned words should be "<words>"
+    And no book should be planned past <target>% coverage
+
+    Examples:
+      | target | words          |
+      | 100    | 朋友, 学生, 我们 |
+      | 60     | 朋友, 我们, 学生 |
@@ -0,0 +1,21 @@
+Feature: N-gram Counting
+  As a Chinese learner
+  I want the character n-grams of a book counted offline
+  So that I get a complete, reproducible frequency list without network calls
+
+  Scenario: Packed n-gram counts match a count of every substring
+    Given 50 Chinese chapters mixed with punctuation generated with seed 20240611
+    When I count the n-grams of 2 to 4 characters occurring at least 2 times
+    Then the counts should match counting every substring of the Chinese runs
+
+  Scenario: Word-like n-grams are kept and fragments across words are dropped
+    Given 50 Chinese chapters mixed with punctuation generated with seed 7
+    When I keep the word-like n-grams occurring at least 3 times
+    Then every sample word should be kept
+    And no n-gram spanning two sample words should be kept
+
+  Scenario: Analyzing a book with the n-gram segmenter
+    Given an EPUB book with 6 chapters
+    When I analyze the book with the n-gram segmenter
+    Then every sample word should be found by the n-gram segmenter
+    And the chapter counts should add up to the book frequencies
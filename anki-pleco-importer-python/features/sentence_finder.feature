@@ -0,0 +1,22 @@
+Feature: i+1 Sentence Finder
+  As a Chinese learner
+  I want sentences of a book that contain exactly one word I do not know
+  So that I can read and make sentence cards at the edge of my vocabulary
+
+  Background:
+    Given an EPUB book with 6 chapters
+    And an unknown word index of the book knowing every sample word except "老师, 朋友, 电脑"
+
+  Scenario: Every i+1 sentence contains exactly one unknown word
+    Then the unknown word counts should match a full recount
+    And every sentence found with 1 unknown word should contain exactly one unknown word
+
+  Scenario: Learning a word only updates the sentences containing it
+    When I learn the words "朋友"
+    Then only the sentences containing "朋友" should have been updated
+    And the unknown word counts should match a full recount
+
+  Scenario: Removing a card makes its word unknown again
+    When I forget the words "我们"
+    Then only the sentences containing "我们" should have been updated
+    And the unknown word counts should match a full recount
@@ -0,0 +1,587 @@
+"""Step definitions for Forvo audio generation BDD tests."""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+from urllib.parse import unquote
+
+from behave import given, when, then
+
+from anki_pleco_importer.audio import ForvoGenerator, MultiProviderAudioGenerator
+from anki_pleco_importer.audio_cache import MANIFEST_FILENAME
+from anki_pleco_importer.audio_pipeline import AudioPipeline
+
+RECORDED_PRONUNCIATIONS = Path(__file__).parent.parent / "examples" / "forvo_pronunciations.json"
+FAKE_MP3 = b"ID3\x03\x00\x00\x00\x00\x00\x00" + b"\xff\xfb\x90\x00" * 64
+NORMALIZED_MARKER = b"normalized"
+RECORDING_IDS = {
+    item["username"]: item["id"] for item in json.loads(RECORDED_PRONUNCIATIONS.read_text(encoding="utf-8"))["items"]
+}
+
+# Stands in for ffmpeg: prints a loudnorm report when measuring, appends a marker when normalizing,
+# and keeps the first half of the input when transcoding to a bitrate
+FAKE_FFMPEG = """#!{python}
+import sys
+with open({log!r}, "a") as log:
+    log.write(" ".join(sys.argv[1:]) + "\\n")
+if sys.argv[-1] == "-":
+    sys.stderr.write('[Parsed_loudnorm_0 @ 0x1]\\n{{"input_i" : "{loudness}", "input_tp" : "-4.20", '
+                     '"input_lra" : "3.10", "input_thresh" : "-34.00", "output_i" : "-16.00", '
+                     '"target_offset" : "0.10"}}\\n')
+else:
+    source = sys.argv[sys.argv.index("-i") + 1]
+    with open(source, "rb") as input_file, open(sys.argv[-1], "wb") as output_file:
+        audio = input_file.read()
+        output_file.write(audio[: len(audio) // 2] if "-b:a" in sys.argv else audio + {marker!r})
+"""
+
+# Stands in for a speech synthesizer writing MP3: the audio is the text
+FAKE_TTS = """import sys
+with open(sys.argv[1], "wb") as output_file:
+    output_file.write(b"TTS " + sys.argv[2].encode("utf-8"))
+"""
+
+
+def recording(username):
+    """Audio the fake server serves for the pronunciation by a user."""
+    return FAKE_MP3 + str(RECORDING_IDS[username]).encode("ascii")
+
+
+class FakeForvoHandler(BaseHTTPRequestHandler):
+    """Answers word-pronunciations requests with a recorded response, and serves the audio it links to."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connection_count += 1
+
+    def do_GET(self):
+        path = unquote(self.path)
+        if "/action/word-pronunciations/" in path:
+            word = path.split("/word/")[1].split("/")[0]
+            with self.server.lock:
+                self.server.metadata_requests.append(word)
+                throttled = self.server.throttle_remaining > 0
+                self.server.throttle_remaining -= throttled
+            if throttled:
+                self.send_response(429)
+                self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            recorded = json.loads(RECORDED_PRONUNCIATIONS.read_text(encoding="utf-8"))
+            if word in self.server.unknown_words:
+                recorded["items"] = []
+            time.sleep(self.server.metadata_delay)
+            for item in recorded["items"]:
+                item["word"] = item["original"] = word
+                item["pathmp3"] = f"http://127.0.0.1:{self.server.server_port}/audio/{item['id']}/mp3"
+            self._send(json.dumps(recorded, ensure_ascii=False).encode("utf-8"), "application/json")
+        elif path.startswith("/audio/"):
+            with self.server.lock:
+                self.server.audio_requests.append(path)
+            self._send(FAKE_MP3 + path.split("/")[2].encode("ascii"), "audio/mpeg")
+        else:
+            self.send_error(404)
+
+    def _send(self, payload, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@given("a fake Forvo server with recorded pronunciations")
+def step_fake_forvo_server(context):
+    """Start a local server imitating the Forvo API."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeForvoHandler)
+    server.lock = threading.Lock()
+    server.connection_count = 0
+    server.metadata_requests = []
+    server.audio_requests = []
+    server.throttle_remaining = 0
+    server.unknown_words = set()
+    server.metadata_delay = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    context.forvo_server = server
+    context.add_cleanup(server.server_close)
+    context.add_cleanup(server.shutdown)
+
+
+@given('an audio cache without a manifest holding Forvo audio for "{words}" and a file named "{filename}"')
+def step_audio_cache_without_manifest(context, words, filename):
+    """Fill a cache directory the way generators name files, as made before manifests existed."""
+    context.audio_cache_dir = Path(tempfile.mkdtemp(prefix="audio_cache_", dir=context.test_files_dir))
+    namer = ForvoGenerator(api_key="test-key", cache_dir=str(context.audio_cache_dir))
+    for word in words.split("|"):
+        namer._get_cache_filename(word, "forvo", "liufeimagic").write_bytes(recording("liufeimagic"))
+    (context.audio_cache_dir / filename).write_bytes(FAKE_MP3)
+    namer.close()
+    (context.audio_cache_dir / MANIFEST_FILENAME).unlink()
+
+
+def make_forvo_generator(context, **options):
+    """Create a Forvo generator talking to the fake server, closed after the scenario."""
+    generator = ForvoGenerator(
+        api_key="test-key",
+        cache_dir=str(context.audio_cache_dir),
+        preferred_users=options.pop("preferred_users", ["liufeimagic"]),
+        interactive_selection=options.pop("interactive_selection", False),
+        base_url=f"http://127.0.0.1:{context.forvo_server.server_port}",
+        requests_per_second=100,
+        **options,
+    )
+    context.add_cleanup(generator.close)
+    return generator
+
+
+@given("a Forvo generator using the fake server")
+def step_forvo_generator(context):
+    if not hasattr(context, "audio_cache_dir"):
+        context.audio_cache_dir = Path(tempfile.mkdtemp(prefix="audio_cache_", dir=context.test_files_dir))
+    context.forvo = make_forvo_generator(context)
+
+
+@when("I start a new run with the same audio cache")
+def step_new_run(context):
+    context.forvo = make_forvo_generator(context)
+
+
+@when("I start a new run with the same audio cache keeping metadata for {seconds:d} seconds")
+def step_new_run_with_ttl(context, seconds):
+    context.forvo = make_forvo_generator(context, metadata_ttl=seconds)
+
+
+@when('I look up pronunciations for "{words}"')
+def step_look_up_pronunciations(context, words):
+    for word in words.split("|"):
+        assert context.forvo._get_pronunciations(word), f"No pronunciations for '{word}'"
+
+
+@when('I generate audio for "{words}"')
+def step_generate_audio(context, words):
+    context.audio_files = [context.forvo.generate_with_cache(word) for word in words.split("|")]
+
+
+@then("the fake Forvo server should have answered {count:d} pronunciation requests")
+def step_metadata_request_count(context, count):
+    requests = context.forvo_server.metadata_requests
+    assert len(requests) == count, f"Expected {count} pronunciation requests, got {requests}"
+
+
+@then("the fake Forvo server should have answered {count:d} audio downloads")
+def step_audio_request_count(context, count):
+    requests = context.forvo_server.audio_requests
+    assert len(requests) == count, f"Expected {count} audio downloads, got {requests}"
+
+
+@then("the fake Forvo server should have accepted at most {count:d} connections")
+def step_connection_count(context, count):
+    connections = context.forvo_server.connection_count
+    assert connections <= count, f"Expected at most {count} connections, got {connections}"
+
+
+@then('{count:d} audio files by "{username}" should be in the audio cache')
+def step_cached_audio_files(context, count, username):
+    assert all(context.audio_files), f"Some audio was not generated: {context.audio_files}"
+    cached = sorted(context.audio_cache_dir.glob(f"*_forvo_{username}_*.mp3"))
+    assert len(cached) == count, f"Expected {count} cached files, got {cached}"
+    assert all(path.read_bytes() == recording(username) for path in cached)
+
+
+@when("I delete the cached audio files")
+def step_delete_cached_audio(context):
+    for path in context.audio_cache_dir.glob("*.mp3"):
+        path.unlink()
+
+
+@then('the audio cache manifest should list "{words}"')
+def step_manifest_lists(context, words):
+    entries = list(context.forvo.manifest)
+    assert [entry.text for entry in entries] == words.split("|"), f"Got entries {entries}"
+    assert all(entry.username == "liufeimagic" and entry.size == len(recording("liufeimagic")) for entry in entries)
+
+
+@when('I generate audio for "{word}" into the media folder with the {strategy} strategy')
+def step_generate_into_media(context, word, strategy):
+    media_dir = context.audio_cache_dir.parent / f"{context.audio_cache_dir.name}_media"
+    media_dir.mkdir()
+    context.forvo.placement = strategy
+    context.media_file = Path(context.forvo.generate_with_cache(word, str(media_dir / f"{word}.mp3")))
+    context.cached_file = Path(context.forvo._find_cached_forvo_audio(word))
+
+
+@then("the cached audio files should share one file on disk")
+def step_cached_files_shared(context):
+    inodes = {path.stat().st_ino for path in context.audio_cache_dir.glob("*.mp3")}
+    assert len(inodes) == 1, f"Cached audio files are {len(inodes)} separate files"
+
+
+@then("the media folder audio should have the cached content")
+def step_media_content(context):
+    assert context.media_file.parent != context.cached_file.parent
+    assert context.media_file.read_bytes() == context.cached_file.read_bytes() == recording("liufeimagic")
+
+
+@then("the media folder audio should be the same as the cached file")
+def step_media_hardlink(context):
+    assert not context.media_file.is_symlink()
+    assert context.media_file.stat().st_ino == context.cached_file.stat().st_ino
+
+
+@then("the media folder audio should be a link to the cached file")
+def step_media_symlink(context):
+    assert context.media_file.is_symlink()
+    assert context.media_file.resolve() == context.cached_file.resolve()
+
+
+@then("the media folder audio should be a copy of the cached file")
+def step_media_copy(context):
+    assert not context.media_file.is_symlink()
+    assert context.media_file.stat().st_ino != context.cached_file.stat().st_ino
+    assert list(context.media_file.parent.glob(".*")) == [], "Temporary files were left behind"
+
+
+@given("an interactive Forvo generator using the fake server")
+def step_interactive_forvo_generator(context):
+    context.audio_cache_dir = Path(tempfile.mkdtemp(prefix="audio_cache_", dir=context.test_files_dir))
+    context.forvo = make_forvo_generator(context, preferred_users=[], interactive_selection=True)
+
+
+@when('I enter "{choices}" while generating audio for "{word}"')
+def step_interactive_generation(context, choices, word):
+    """Answer the selection prompt with the given inputs, recording what is played instead of playing it."""
+    answers = iter(choices.split("|"))
+    context.played = []
+    context.forvo._play_audio = lambda path: context.played.append(Path(path).read_bytes()) or True
+    with patch("builtins.input", lambda prompt="": next(answers)):
+        context.audio_files = [context.forvo.generate_with_cache(word)]
+
+
+@then('the previews by "{usernames}" should have been played')
+def step_previews_played(context, usernames):
+    expected = [recording(username) for username in usernames.split("|")]
+    assert context.played == expected, f"Played {len(context.played)} previews, expected {len(expected)}"
+
+
+@when('I run the audio pipeline for "{words}" with interactive selection, entering "{choices}"')
+def step_run_audio_pipeline(context, words, choices):
+    """Run the pipeline on a new interactive generator over the same cache, as convert does."""
+    config = {
+        "forvo": {
+            "api_key": "test-key",
+            "base_url": f"http://127.0.0.1:{context.forvo_server.server_port}",
+            "interactive_selection": True,
+            "requests_per_second": 100,
+        }
+    }
+    generator = MultiProviderAudioGenerator(["forvo"], config, str(context.audio_cache_dir))
+    context.add_cleanup(generator.close)
+    generator.generators["forvo"]._play_audio = lambda path: True
+
+    answers = iter(choices.split("|"))
+    context.prompt_threads = []
+
+    def answer(prompt=""):
+        context.prompt_threads.append(threading.current_thread())
+        return next(answers)
+
+    context.pipeline = AudioPipeline(generator, workers=4)
+    with patch("builtins.input", answer):
+        context.pipeline.start(words.split("|"))
+        context.pipeline_results = context.pipeline.results()
+
+
+@then("the audio pipeline should have prompted for {count:d} words on the main thread")
+def step_pipeline_prompts(context, count):
+    assert context.pipeline.selection_count == count, f"Prompted for {context.pipeline.selection_count} words"
+    assert context.prompt_threads == [threading.main_thread()] * count, f"Prompted on {context.prompt_threads}"
+
+
+@then('the audio pipeline should have audio for "{words}"')
+def step_pipeline_results(context, words):
+    results = context.pipeline_results
+    assert sorted(results) == sorted(words.split("|")), f"Got results for {sorted(results)}"
+    assert all(results.values()) and all(Path(path).exists() for path in results.values()), results
+
+
+@given("a fake ffmpeg measuring a loudness of {loudness:g} LUFS")
+def step_fake_ffmpeg(context, loudness):
+    """Put a script imitating ffmpeg first on the PATH."""
+    bin_dir = Path(tempfile.mkdtemp(prefix="bin_", dir=context.test_files_dir))
+    context.ffmpeg_log = bin_dir / "ffmpeg.log"
+    ffmpeg = bin_dir / "ffmpeg"
+    ffmpeg.write_text(
+        FAKE_FFMPEG.format(
+            python=sys.executable, log=str(context.ffmpeg_log), loudness=loudness, marker=NORMALIZED_MARKER
+        )
+    )
+    ffmpeg.chmod(0o755)
+    path_patch = patch.dict(os.environ, {"PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"})
+    path_patch.start()
+    context.add_cleanup(path_patch.stop)
+
+
+@given("no ffmpeg on the PATH")
+def step_no_ffmpeg(context):
+    path_patch = patch.dict(os.environ, {"PATH": str(Path(tempfile.mkdtemp(dir=context.test_files_dir)))})
+    path_patch.start()
+    context.add_cleanup(path_patch.stop)
+
+
+@when("I normalize the audio cache")
+def step_normalize_audio_cache(context):
+    """Normalize through a new generator over the same cache, as convert --normalize-audio does."""
+    config = {"forvo": {"api_key": "test-key", "base_url": f"http://127.0.0.1:{context.forvo_server.server_port}"}}
+    generator = MultiProviderAudioGenerator(["forvo"], config, str(context.audio_cache_dir))
+    context.add_cleanup(generator.close)
+    context.normalization_report = generator.normalize_audio(workers=2)
+
+
+@then("the normalization should report {normalized:d} normalized, {failed:d} failed and {skipped:d} skipped")
+def step_normalization_report(context, normalized, failed, skipped):
+    report = context.normalization_report
+    assert tuple(report) == (normalized, failed, skipped), f"Got {report}"
+
+
+@then("the cached audio files should be normalized")
+def step_cached_files_normalized(context):
+    cached = sorted(context.audio_cache_dir.glob("*.mp3"))
+    assert cached and all(path.read_bytes() == recording("liufeimagic") + NORMALIZED_MARKER for path in cached)
+
+
+@then("the audio cache manifest should record a loudness of {loudness:g} LUFS and a gain of {gain_db:g} dB")
+def step_manifest_loudness(context, loudness, gain_db):
+    entries = list(context.forvo.manifest)
+    assert entries and all(entry.loudness == loudness and entry.gain_db == gain_db for entry in entries), entries
+    assert all(entry.size == len(recording("liufeimagic") + NORMALIZED_MARKER) for entry in entries), entries
+
+
+@then("the fake ffmpeg should have run {count:d} times")
+def step_ffmpeg_runs(context, count):
+    runs = context.ffmpeg_log.read_text().splitlines()
+    assert len(runs) == count, f"ffmpeg ran {len(runs)} times: {runs}"
+
+
+@when("I transcode the audio of the run to {audio_format}")
+def step_transcode_audio(context, audio_format):
+    """Transcode the files generated in the run through a new generator, as convert --audio-format does."""
+    config = {"forvo": {"api_key": "test-key", "base_url": f"http://127.0.0.1:{context.forvo_server.server_port}"}}
+    generator = MultiProviderAudioGenerator(["forvo"], config, str(context.audio_cache_dir))
+    context.add_cleanup(generator.close)
+    context.compact_files, context.transcode_report = generator.transcode_audio(
+        context.audio_files, audio_format, workers=2
+    )
+
+
+@then("the transcoding should report {transcoded:d} transcoded, {reused:d} reused and {saved:d} bytes saved")
+def step_transcode_report(context, transcoded, reused, saved):
+    report = context.transcode_report
+    assert (report.transcoded, report.reused, report.failed) == (transcoded, reused, 0), f"Got {report}"
+    assert report.bytes_saved == saved, f"Saved {report.bytes_saved} bytes ({report})"
+
+
+@then('every file of the run should have one compact variant ending in "{suffix}" next to it in the audio cache')
+def step_compact_variants(context, suffix):
+    compact = context.compact_files
+    assert sorted(compact) == sorted(context.audio_files), f"Got variants for {sorted(compact)}"
+    variants = {Path(path) for path in compact.values()}
+    assert len(variants) == 1, f"Expected one shared variant, got {variants}"
+    variant = variants.pop()
+    assert variant.parent == context.audio_cache_dir and variant.name.endswith(suffix), variant
+    assert variant.read_bytes() == recording("liufeimagic")[: len(recording("liufeimagic")) // 2]
+    assert all(Path(path).read_bytes() == recording("liufeimagic") for path in compact), "Originals were changed"
+
+
+@then('the fake ffmpeg should have trimmed silence and encoded with "{codec}"')
+def step_ffmpeg_transcoded(context, codec):
+    runs = [run for run in context.ffmpeg_log.read_text().splitlines() if "-b:a" in run]
+    assert runs and all("silenceremove" in run and "areverse" in run and codec in run for run in runs), runs
+
+
+@given("the fake Forvo server throttles the next {count:d} pronunciation requests")
+def step_forvo_throttles(context, count):
+    """Make the fake server answer 429 with a Retry-After of 0 seconds."""
+    context.forvo_server.throttle_remaining = count
+
+
+@then("the Forvo client should have retried {count:d} throttled requests")
+def step_forvo_retries(context, count):
+    stats = context.forvo.http.stats()
+    assert (stats.throttled, stats.retries, stats.failures) == (count, count, 0), f"Got {stats}"
+
+
+@given('the fake Forvo server has no pronunciations for "{words}"')
+def step_forvo_unknown_words(context, words):
+    context.forvo_server.unknown_words.update(words.split("|"))
+
+
+def make_audio_generator(context, providers, forvo_options=None, **options):
+    """Create a generator with Forvo on the fake server and a fake local speech synthesizer."""
+    script = Path(tempfile.mkdtemp(prefix="tts_", dir=context.test_files_dir)) / "fake_tts.py"
+    script.write_text(FAKE_TTS)
+    config = {
+        "forvo": {
+            "api_key": "test-key",
+            "base_url": f"http://127.0.0.1:{context.forvo_server.server_port}",
+            "interactive_selection": False,
+            "preferred_users": ["liufeimagic"],
+            "requests_per_second": 100,
+        },
+        "local": {"command": [sys.executable, str(script), "{output}", "{text}"], "output_format": "mp3"},
+    }
+    config["forvo"].update(forvo_options or {})
+    generator = MultiProviderAudioGenerator(providers, config, str(context.audio_cache_dir), **options)
+    context.add_cleanup(generator.close)
+    context.audio_generator = generator
+    return generator
+
+
+@when('I run the audio pipeline for "{words}" on {workers:d} threads')
+def step_run_pipeline(context, words, workers):
+    context.pipeline = AudioPipeline(make_audio_generator(context, ["forvo"]), workers=workers)
+    context.pipeline.start(words.split("|"))
+    context.pipeline_results = context.pipeline.results()
+
+
+@when('I run the audio pipeline for "{words}" with a local speech synthesis fallback')
+def step_run_pipeline_with_fallback(context, words):
+    """Run the pipeline, then synthesize the words left silent, as convert --audio-fallback local does."""
+    generator = make_audio_generator(context, ["forvo"], fallback_providers=["local"])
+
+    context.pipeline = AudioPipeline(generator, workers=4)
+    context.pipeline.start(words.split("|"))
+    context.pipeline_results = context.pipeline.results()
+    context.skipped_before_fallback = generator.get_skipped_words()
+    silent = [word for word, path in context.pipeline_results.items() if not path]
+    context.pipeline_results.update(generator.generate_fallback_audio(silent, workers=2))
+
+
+@then('"{words}" should have been synthesized into the audio cache')
+def step_synthesized(context, words):
+    assert sorted(context.skipped_before_fallback) == sorted(words.split("|")), context.skipped_before_fallback
+    for word in words.split("|"):
+        path = Path(context.pipeline_results[word])
+        assert path.parent == context.audio_cache_dir and "_local_cmn_" in path.name, path
+        assert path.read_bytes() == b"TTS " + word.encode("utf-8")
+        assert context.audio_generator.fallback_generators["local"].manifest.get(word, "local", "cmn")
+
+
+@then("no words should be reported without audio")
+def step_no_skipped_words(context):
+    assert context.audio_generator.get_skipped_words() == [], context.audio_generator.get_skipped_words()
+
+
+@given("the fake Forvo server answers pronunciation requests after {seconds:g} seconds")
+def step_forvo_delay(context, seconds):
+    context.forvo_server.metadata_delay = seconds
+
+
+@given("a generator hedging Forvo with local speech synthesis after {seconds:g} seconds")
+def step_hedged_generator(context, seconds):
+    make_audio_generator(context, ["forvo", "local"], hedge=True, hedge_budget=seconds)
+
+
+@given("a generator hedging Forvo with local speech synthesis after {seconds:g} seconds, with interactive selection")
+def step_hedged_interactive_generator(context, seconds):
+    forvo_options = {"interactive_selection": True}
+    make_audio_generator(context, ["forvo", "local"], forvo_options, hedge=True, hedge_budget=seconds)
+
+
+@when('I run the audio pipeline for "{words}" hedging Forvo with local speech synthesis, entering "{choices}"')
+def step_run_hedged_pipeline(context, words, choices):
+    """Run the pipeline on a hedging generator where every word needs a choice."""
+    forvo_options = {"interactive_selection": True, "preferred_users": []}
+    generator = make_audio_generator(context, ["forvo", "local"], forvo_options, hedge=True)
+    generator.generators["forvo"]._play_audio = lambda path: True
+
+    answers = iter(choices.split("|"))
+    context.prompt_threads = []
+
+    def answer(prompt=""):
+        context.prompt_threads.append(threading.current_thread())
+        return next(answers)
+
+    context.pipeline = AudioPipeline(generator, workers=4)
+    with patch("builtins.input", answer):
+        context.pipeline.start(words.split("|"))
+        context.pipeline_results = context.pipeline.results()
+
+
+@then('the audio pipeline should have Forvo audio for "{words}"')
+def step_pipeline_forvo_results(context, words):
+    results = context.pipeline_results
+    assert sorted(results) == sorted(words.split("|")), f"Got results for {sorted(results)}"
+    assert all(path and "_forvo_" in Path(path).name for path in results.values()), results
+
+
+@when('I generate audio for "{word}" with the hedging generator')
+def step_generate_hedged(context, word):
+    started = time.monotonic()
+    context.hedged_audio = context.audio_generator.generate_audio(word)
+    context.hedged_seconds = time.monotonic() - started
+
+
+@when('I generate audio for "{word}" with the hedging generator {times:d} times')
+def step_generate_hedged_repeatedly(context, word, times):
+    for _ in range(times):
+        assert context.audio_generator.generate_audio(word)
+
+
+@then('the audio for "{word}" should have come from local speech synthesis in under {seconds:g} seconds')
+def step_hedged_winner(context, word, seconds):
+    assert context.hedged_audio and "_local_" in Path(context.hedged_audio).name, context.hedged_audio
+    assert Path(context.hedged_audio).read_bytes() == b"TTS " + word.encode("utf-8")
+    assert context.hedged_seconds < seconds, f"Took {context.hedged_seconds:.2f}s"
+
+
+@then('once the generator is closed the Forvo audio for "{word}" should be in the audio cache')
+def step_loser_cached(context, word):
+    context.audio_generator.close()
+    forvo = ForvoGenerator(api_key="test-key", cache_dir=str(context.audio_cache_dir))
+    context.add_cleanup(forvo.close)
+    cached = forvo._find_cached_forvo_audio(word)
+    assert cached and Path(cached).read_bytes() == recording("liufeimagic"), cached
+
+
+@then('the hedging threshold of "{provider}" should be {seconds:g} seconds')
+def step_hedge_threshold(context, provider, seconds):
+    threshold = context.audio_generator.hedge_threshold(provider)
+    assert threshold == seconds, f"Threshold is {threshold}s"
+
+
+@when('"{provider}" has answered {count:d} requests taking {fastest:d} to {slowest:d} ms')
+def step_record_latencies(context, provider, count, fastest, slowest):
+    step = (slowest - fastest) / (count - 1)
+    for i in range(count):
+        context.audio_generator.latencies[provider].record((fastest + i * step) / 1000)
+
+
+@then('the hedging threshold of "{provider}" should be within 25% above {milliseconds:d} ms')
+def step_hedge_threshold_quantile(context, provider, milliseconds):
+    threshold = context.audio_generator.hedge_threshold(provider) * 1000
+    assert milliseconds <= threshold <= milliseconds * 1.25, f"Threshold is {threshold:.0f} ms"
+
+
+@then('"{provider}" should have {count:d} latency recorded')
+def step_latency_samples(context, provider, count):
+    samples = context.audio_generator.get_latency_stats()[provider].samples
+    assert samples == count, f"{samples} latencies recorded"
+
+
+@then('"{provider}" should have {count:d} latency recorded, of at least {seconds:g} seconds')
+def step_latency_at_least(context, provider, count, seconds):
+    summary = context.audio_generator.get_latency_stats()[provider]
+    assert summary.samples == count and summary.p50 >= seconds, f"Got {summary}"
@@ -0,0 +1,397 @@
+"""Step definitions for EPUB analysis BDD tests."""
+
+import csv
+import json
+import math
+import os
+import random
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from behave import given, when, then
+from click.testing import CliRunner
+from ebooklib import epub
+
+from anki_pleco_importer.cli import cli
+from anki_pleco_importer.epub_analyzer import ChineseEPUBAnalyzer, CoveragePoint
+from anki_pleco_importer.sentence_index import SentenceIndex, split_sentences
+
+SAMPLE_WORDS = ["我们", "今天", "学习", "中文", "朋友", "喜欢", "吃饭", "时候", "已经", "因为", "所以", "老师"]
+
+
+def stub_key_phrases(text):
+    """Deterministic stand-in for Azure: every distinct aligned character pair."""
+    return list(dict.fromkeys(text[i : i + 2] for i in range(0, len(text) - 1, 2)))
+
+
+class KeyPhraseStubHandler(BaseHTTPRequestHandler):
+    """Implements the Language service analyze-text endpoint for key phrases."""
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+
+        with server.lock:
+            server.request_count += 1
+            throttle = server.throttle_remaining > 0
+            if throttle:
+                server.throttle_remaining -= 1
+            else:
+                server.document_counts.append(len(body["analysisInput"]["documents"]))
+
+        if throttle:
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(json.dumps({"error": {"code": "429", "message": "Too many requests"}}).encode())
+            return
+
+        documents = [
+            {"id": doc["id"], "keyPhrases": stub_key_phrases(doc["text"]), "warnings": []}
+            for doc in body["analysisInput"]["documents"]
+        ]
+        response = {
+            "kind": "KeyPhraseExtractionResults",
+            "results": {"documents": documents, "errors": [], "modelVersion": "2022-10-01"},
+        }
+        payload = json.dumps(response, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@given("an Azure key phrase stub server")
+def step_azure_stub_server(context):
+    """Start a local server implementing the key phrase endpoint."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeyPhraseStubHandler)
+    server.lock = threading.Lock()
+    server.request_count = 0
+    server.throttle_remaining = 0
+    server.document_counts = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    context.azure_stub = server
+    context.add_cleanup(server.shutdown)
+
+
+@given("the stub server throttles the first {count:d} requests")
+def step_stub_throttles(context, count):
+    """Make the stub answer the first requests with 429."""
+    context.azure_stub.throttle_remaining = count
+
+
+@given("an EPUB book with {count:d} chapters")
+def step_epub_book(context, count):
+    """Write a synthetic EPUB whose chapters each need one or more chunks."""
+    rng = random.Random(count)
+    book = epub.EpubBook()
+    book.set_identifier("test-book")
+    book.set_title("测试")
+    book.set_language("zh")
+
+    chapters = []
+    for number in range(1, count + 1):
+        paragraphs = "".join(
+            "<p>" + "".join(rng.choice(SAMPLE_WORDS) for _ in range(rng.randint(20, 60))) + "。</p>"
+            for _ in range(rng.randint(1, 12))
+        )
+        chapter = epub.EpubHtml(title=f"第{number}章", file_name=f"chapter_{number}.xhtml", lang="zh")
+        chapter.content = f"<html><body><h1>第{number}章</h1>{paragraphs}</body></html>"
+        book.add_item(chapter)
+        chapters.append(chapter)
+
+    book.toc = chapters
+    book.spine = chapters
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+
+    context.epub_path = context.test_files_dir / f"book_{count}.epub"
+    epub.write_epub(str(context.epub_path), book)
+
+
+@when("I extract key phrases from the book")
+@when("I extract key phrases from the book again")
+def step_extract_key_phrases(context):
+    """Run chapter-wise key phrase extraction against the stub server."""
+    os.environ["AZURE_LANGUAGE_ENDPOINT"] = f"http://127.0.0.1:{context.azure_stub.server_port}"
+    os.environ["AZURE_LANGUAGE_KEY"] = "stub-key"
+
+    cache_dir = context.test_files_dir / f"azure_cache_{id(context.azure_stub)}"
+    analyzer = ChineseEPUBAnalyzer(cache_dir=cache_dir, max_concurrent_requests=2)
+    analyzer.RETRY_BASE_DELAY = 0.01
+    context.add_cleanup(analyzer.close)
+    context.analyzer = analyzer
+    context.key_phrases = analyzer.extract_key_phrases_from_chapters(analyzer.iter_chapters(context.epub_path))
+
+
+def count_chunks(context):
+    """Count the non-empty chunks the analyzer would send for the book."""
+    analyzer = context.analyzer
+    chunk_count = 0
+    for chapter in analyzer.iter_chapters(context.epub_path):
+        chinese_text = "".join(analyzer.chinese_pattern.findall(chapter.text))
+        if chinese_text:
+            chunk_count += len(analyzer._smart_chunk_text(chinese_text, 5000))
+    return chunk_count
+
+
+@when("I analyze the book with the local segmenter using {workers:d} worker")
+@when("I analyze the book with the local segmenter using {workers:d} workers")
+def step_analyze_local(context, workers):
+    """Run a full analysis with the built-in segmenter."""
+    analyzer = ChineseEPUBAnalyzer(segmenter="local", workers=workers)
+    if not hasattr(context, "local_analyses"):
+        context.local_analyses = []
+    context.local_analyses.append(analyzer.analyze_epub(context.epub_path, {"我们"}))
+
+
+@then("both local analyses should report the same word frequencies")
+def step_local_analyses_match(context):
+    """Verify that pooled and in-process segmentation agree."""
+    first, second = context.local_analyses
+    assert first.word_frequencies == second.word_frequencies
+    assert first.chapter_stats == second.chapter_stats
+
+
+@then("every sample word should be counted as a token")
+def step_sample_words_counted(context):
+    """Verify that the segmenter keeps dictionary words whole."""
+    frequencies = context.local_analyses[0].word_frequencies
+    missing = [word for word in SAMPLE_WORDS if word not in frequencies]
+    assert not missing, f"Words not segmented as tokens: {missing}"
+
+
+@then("the stub server should have received {count:d} requests")
+def step_stub_request_exact(context, count):
+    """Verify the exact number of HTTP requests made."""
+    assert context.azure_stub.request_count == count, f"Expected {count}, got {context.azure_stub.request_count}"
+
+
+@then("the stub server should have received one request per {size:d} chunks")
+@then("the stub server should have received {extra:d} requests more than one per {size:d} chunks")
+def step_stub_request_count(context, size, extra=0):
+    """Verify the number of HTTP requests made."""
+    expected = -(-count_chunks(context) // size) + extra
+    assert context.azure_stub.request_count == expected, f"Expected {expected}, got {context.azure_stub.request_count}"
+
+
+@then("the key phrase cache should report one hit per chunk")
+def step_cache_hits(context):
+    """Verify that the last extraction was served entirely from the cache."""
+    stats = context.analyzer.key_phrase_cache.get_stats()
+    assert stats.hits == count_chunks(context), f"Expected {count_chunks(context)} hits, got {stats}"
+    assert stats.misses == 0, f"Expected no misses, got {stats}"
+
+
+@then("every stub request should contain at most {count:d} documents")
+def step_stub_documents_per_request(context, count):
+    """Verify the batch size limit is respected."""
+    assert context.azure_stub.document_counts, "No successful requests were made"
+    assert max(context.azure_stub.document_counts) <= count, context.azure_stub.document_counts
+
+
+@then("the key phrases should match a sequential extraction")
+def step_key_phrases_match_sequential(context):
+    """Compare against sending every chunk one at a time, in order."""
+    analyzer = context.analyzer
+    expected = {}
+    for chapter in analyzer.iter_chapters(context.epub_path):
+        chinese_text = "".join(analyzer.chinese_pattern.findall(chapter.text))
+        for chunk in analyzer._smart_chunk_text(chinese_text, 5000):
+            for phrase in stub_key_phrases(chunk):
+                expected.setdefault(phrase, None)
+
+    assert context.key_phrases == list(expected), "Key phrases differ from sequential extraction"
+
+
+@when("I analyze the book with the local segmenter and {count:d} examples per word")
+def step_analyze_with_examples(context, count):
+    """Run a full analysis that indexes sentences for examples."""
+    analyzer = ChineseEPUBAnalyzer(segmenter="local", cache_dir=context.test_files_dir / "examples_cache")
+    context.analyzer = analyzer
+    context.index_path = SentenceIndex.path_for(analyzer.cache_dir / "sentence_index", context.epub_path)
+    if context.index_path.exists():
+        context.index_mtime = context.index_path.stat().st_mtime_ns
+    context.example_analysis = analyzer.analyze_epub(context.epub_path, {"我们"}, example_count=count)
+
+
+@then("every top unknown word should have the {count:d} shortest sentences containing it as examples")
+def step_examples_shortest(context, count):
+    """Compare the examples with a scan of every sentence in the book."""
+    sentences = [
+        sentence
+        for chapter in context.analyzer.iter_chapters(context.epub_path)
+        for sentence in split_sentences(chapter.text)
+    ]
+    analysis = context.example_analysis
+    assert analysis.high_frequency_unknown, "Expected unknown words"
+    for word, _, _, _ in analysis.high_frequency_unknown:
+        examples = analysis.examples[word]
+        expected_lengths = sorted(len(sentence) for sentence in sentences if word in sentence)[:count]
+        assert all(word in sentence for sentence in examples), f"Example without {word}: {examples}"
+        assert [len(sentence) for sentence in examples] == expected_lengths, f"Not the shortest for {word}"
+
+
+@then("the sentence index should have been reused")
+def step_sentence_index_reused(context):
+    """Verify that the second analysis did not rebuild the index."""
+    assert context.index_path.stat().st_mtime_ns == context.index_mtime, "Sentence index was rebuilt"
+
+
+@given("an EPUB chapter with scripts, styles, ruby annotations and character references")
+def step_epub_chapter_with_markup(context):
+    """Write a one-chapter EPUB whose text is surrounded by non-content markup."""
+    book = epub.EpubBook()
+    book.set_identifier("markup-book")
+    book.set_title("标记")
+    book.set_language("zh")
+
+    chapter = epub.EpubHtml(file_name="chapter_1.xhtml", lang="zh")
+    chapter.content = (
+        "<html><head><style>p { color: red; } /* 样式 */</style>"
+        "<script>var note = '脚本里的中文';</script></head><body>"
+        "<h1>第一章</h1><p>我们<ruby>学<rp>(</rp><rt>xué</rt><rp>)</rp></ruby>习&#20013;&#x6587;&#12290;"
+        "&ldquo;朋友&rdquo;&amp;&lt;老师&gt;<br/>好</p><script>document.write('不要');</script></body></html>"
+    )
+    book.add_item(chapter)
+    book.spine = [chapter]
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+
+    context.epub_path = context.test_files_dir / "markup.epub"
+    epub.write_epub(str(context.epub_path), book)
+
+
+@when("I read the chapters of the book with {workers:d} worker")
+@when("I read the chapters of the book with {workers:d} workers")
+def step_read_chapters(context, workers):
+    """Extract the chapters with serial or pooled HTML parsing."""
+    analyzer = ChineseEPUBAnalyzer(segmenter="local", workers=workers)
+    if not hasattr(context, "chapter_readings"):
+        context.chapter_readings = []
+    context.chapter_readings.append(list(analyzer.iter_chapters(context.epub_path)))
+
+
+@then('the chapter text should be "{text}"')
+def step_chapter_text(context, text):
+    chapters = [chapter for chapter in context.chapter_readings[-1] if "我们" in chapter.text]
+    assert [chapter.text for chapter in chapters] == [text], f"Got {[chapter.text for chapter in chapters]}"
+
+
+@then('the chapter title should be "{title}"')
+def step_chapter_title(context, title):
+    chapters = [chapter for chapter in context.chapter_readings[-1] if "我们" in chapter.text]
+    assert chapters[0].title == title, f"Got title {chapters[0].title}"
+
+
+@then("both readings should give the same chapters")
+def step_readings_match(context):
+    first, second = context.chapter_readings
+    assert first, "Expected chapters"
+    assert first == second
+
+
+def count_words_one_by_one(frequencies, known_words, target):
+    """Learn unknown words in order of frequency until the target coverage is reached."""
+    total = sum(frequencies.values())
+    covered = sum(freq for word, freq in frequencies.items() if word in known_words)
+    learned = 0
+    for freq in sorted((freq for word, freq in frequencies.items() if word not in known_words), reverse=True):
+        if covered >= math.ceil(total * target / 100):
+            break
+        covered += freq
+        learned += 1
+    return learned, covered / total * 100
+
+
+@when('I calculate the coverage of "{frequencies}" knowing "{words}"')
+def step_calculate_coverage(context, frequencies, words):
+    context.frequencies = {
+        word.strip(): int(freq) for word, freq in (entry.split(":") for entry in frequencies.split(","))
+    }
+    context.known_words = set(words.split("|"))
+    context.coverage_targets, context.coverage_curve = ChineseEPUBAnalyzer(segmenter="local").calculate_coverage(
+        context.frequencies, context.known_words, [50, 80, 90, 95, 98]
+    )
+
+
+@then("the coverage targets for 50, 80, 90, 95 and 98% should match counting words one by one")
+def step_coverage_targets_match(context):
+    for target, result in context.coverage_targets.items():
+        learned, _ = count_words_one_by_one(context.frequencies, context.known_words, target)
+        assert result.words_needed == learned, f"{target}%: {result.words_needed} words instead of {learned}"
+        assert len(result.priority_words) == learned
+
+
+@then("the coverage curve should match counting words one by one")
+def step_coverage_curve_match(context):
+    _, current = count_words_one_by_one(context.frequencies, context.known_words, 0)
+    expected = []
+    for percentage in range(math.floor(current) + 1, 101):
+        point = CoveragePoint(*count_words_one_by_one(context.frequencies, context.known_words, percentage))
+        if not expected or expected[-1].words_learned != point.words_learned:
+            expected.append(point)
+    assert len(context.coverage_curve) == len(expected), f"Got {context.coverage_curve}, expected {expected}"
+    for point, expected_point in zip(context.coverage_curve, expected):
+        assert point.words_learned == expected_point.words_learned, f"Got {point}, expected {expected_point}"
+        assert math.isclose(point.coverage, expected_point.coverage), f"Got {point}, expected {expected_point}"
+
+
+@given('an Anki export knowing "{words}"')
+def step_anki_export(context, words):
+    context.anki_path = context.test_files_dir / "anki_export.txt"
+    lines = ["#separator:tab", "#html:true"]
+    lines += [f"Chinese\tpinyin\t{word}\t\tdefinition" for word in words.split("|")]
+    context.anki_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    context.known_words = set(words.split("|"))
+
+
+@when("I run analyze-epub on the book with the local segmenter and --coverage-curve")
+def step_run_analyze_epub_with_curve(context):
+    context.curve_path = context.test_files_dir / "coverage_curve.csv"
+    arguments = ["analyze-epub", str(context.epub_path), str(context.anki_path), "--segmenter", "local"]
+    result = CliRunner().invoke(cli, arguments + ["--coverage-curve", str(context.curve_path)])
+    assert result.exit_code == 0, result.output
+
+
+@then("the coverage curve CSV should list the coverage curve of the book")
+def step_coverage_curve_csv(context):
+    analysis = ChineseEPUBAnalyzer(segmenter="local").analyze_epub(context.epub_path, context.known_words)
+    with open(context.curve_path, encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert analysis.coverage_curve, "Expected a coverage curve"
+    assert [int(row["words_learned"]) for row in rows] == [point.words_learned for point in analysis.coverage_curve]
+    assert [row["coverage"] for row in rows] == [f"{point.coverage:.2f}" for point in analysis.coverage_curve]
+
+
+@then('the first chapters should be "{titles}"')
+def step_first_chapters(context, titles):
+    expected = titles.split("|")
+    chapters = context.chapter_readings[-1]
+    assert [chapter.title for chapter in chapters[: len(expected)]] == expected, [chapter.title for chapter in chapters]
+
+
+@when("I run analyze-epub on the book with the local segmenter and --verbose")
+def step_run_analyze_epub_verbose(context):
+    arguments = ["analyze-epub", str(context.epub_path), str(context.anki_path), "--segmenter", "local", "--verbose"]
+    result = CliRunner().invoke(cli, arguments)
+    assert result.exit_code == 0, result.output
+    context.analyze_output = result.output
+
+
+@then("the chapter statistics should list every chapter with its Chinese characters")
+def step_chapter_statistics(context):
+    lines = context.analyze_output.split("Chapter Statistics", 1)[1].splitlines()
+    rows = [line.split() for line in lines[4:]]
+    rows = rows[: next((i for i, row in enumerate(rows) if not row), len(rows))]
+    chapters = context.chapter_readings[-1]
+    assert len(rows) == len(chapters), f"Got {len(rows)} rows for {len(chapters)} chapters"
+    for index, (row, chapter) in enumerate(zip(rows, chapters), 1):
+        characters = len(re.findall(r"[\u4e00-\u9fff]", chapter.text))
+        assert row[:3] == [str(index), chapter.title, f"{characters:,}"], f"Got {row} for {chapter.title}"
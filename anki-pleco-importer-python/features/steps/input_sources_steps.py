@@ -0,0 +1,94 @@
+"""Step definitions for plain text and subtitle input BDD tests."""
+
+from behave import given, when, then
+
+from anki_pleco_importer import sources
+from anki_pleco_importer.epub_analyzer import ChineseEPUBAnalyzer
+
+SRT_CONTENT = (
+    "1\n00:00:01,000 --> 00:00:02,500\n<i>我们今天学习中文</i>\n\n"
+    "2\n00:00:03,000 --> 00:00:04,000\n{\\an8}朋友喜欢吃饭\n老师已经来了\n"
+)
+ASS_CONTENT = (
+    "[Script Info]\nTitle: episode\n\n"
+    "[V4+ Styles]\nFormat: Name, Fontname\nStyle: Default,Arial\n\n"
+    "[Events]\nFormat: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+    "Dialogue: 0,0:00:01.00,0:00:02.50,Default,,0,0,0,,{\\i1}我们今天学习中文{\\i0}\n"
+    "Comment: 0,0:00:02.50,0:00:03.00,Default,,0,0,0,,注释不是对白\n"
+    "Dialogue: 0,0:00:03.00,0:00:04.00,Default,,0,0,0,,朋友喜欢吃饭\\N老师已经来了\n"
+)
+
+
+@given("a text file with a preface and {count:d} chapters")
+def step_text_file(context, count):
+    lines = ["\ufeff前言：这是一本小说。", ""]
+    for number in "一二三四五六七八九十"[:count]:
+        lines += [f"第{number}章 开始", "我们今天学习中文。", "  朋友喜欢吃饭，老师已经来了！  ", ""]
+    context.text_path = context.test_files_dir / "novel.txt"
+    context.text_path.write_bytes("\r\n".join(lines).encode("utf-8"))
+    context.chapter_count = count
+
+
+@when("I read the text file in blocks of {size:d} bytes")
+def step_read_text_file(context, size):
+    original = sources.READ_BLOCK_SIZE
+    sources.READ_BLOCK_SIZE = size
+    try:
+        context.chapters = list(sources.iter_file_chapters(context.text_path))
+    finally:
+        sources.READ_BLOCK_SIZE = original
+
+
+@then("the text file should give {count:d} chapters titled after its name and headings")
+def step_text_chapter_titles(context, count):
+    titles = [chapter.title for chapter in context.chapters]
+    expected = ["novel"] + [f"第{number}章 开始" for number in "一二三四五六七八九十"[: count - 1]]
+    assert titles == expected, f"Got titles {titles}"
+
+
+@then("the chapters should contain every non-empty line of the file")
+def step_text_chapter_lines(context):
+    expected = [line.strip() for line in context.text_path.read_text(encoding="utf-8-sig").splitlines()]
+    lines = [line for chapter in context.chapters for line in chapter.text.split("\n")]
+    assert lines == [line for line in expected if line], f"Got lines {lines}"
+
+
+@given("an SRT file and an ASS file with the same dialogue")
+def step_subtitle_files(context):
+    context.srt_path = context.test_files_dir / "episode.srt"
+    context.srt_path.write_text(SRT_CONTENT, encoding="utf-8-sig")
+    context.ass_path = context.test_files_dir / "episode.ass"
+    context.ass_path.write_text(ASS_CONTENT, encoding="utf-8")
+
+
+@when("I read both subtitle files")
+def step_read_subtitles(context):
+    context.subtitle_chapters = [
+        list(sources.iter_file_chapters(context.srt_path)),
+        list(sources.iter_file_chapters(context.ass_path)),
+    ]
+
+
+@then('both subtitle files should give the dialogue lines "{lines}"')
+def step_subtitle_lines(context, lines):
+    for chapters in context.subtitle_chapters:
+        assert len(chapters) == 1, f"Expected one chapter, got {len(chapters)}"
+        assert chapters[0].text.split("\n") == lines.split("|"), f"Got {chapters[0].text!r}"
+
+
+@when('I analyze the SRT file with the local segmenter knowing "{word}"')
+def step_analyze_srt(context, word):
+    analyzer = ChineseEPUBAnalyzer(segmenter="local", cache_dir=context.test_files_dir / "subtitle_cache")
+    context.subtitle_analysis = analyzer.analyze_epub(context.srt_path, {word}, example_count=1)
+
+
+@then('the analysis should be titled "{title}"')
+def step_analysis_title(context, title):
+    assert context.subtitle_analysis.title == title
+
+
+@then('"{word}" should be an unknown word of the analysis')
+def step_unknown_word(context, word):
+    analysis = context.subtitle_analysis
+    assert word in analysis.unknown_words, f"Unknown words: {analysis.unknown_words}"
+    assert analysis.examples[word] == ["我们今天学习中文"], f"Examples: {analysis.examples.get(word)}"
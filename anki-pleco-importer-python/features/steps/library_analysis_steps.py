@@ -0,0 +1,89 @@
+"""Step definitions for library analysis BDD tests."""
+
+from behave import given, when, then
+
+from anki_pleco_importer.epub_analyzer import ChineseEPUBAnalyzer
+from anki_pleco_importer.hsk import HSKWordLists
+from anki_pleco_importer.library import (
+    CorpusDatabase,
+    analyze_books_in_pool,
+    find_books,
+    rank_books,
+    split_current_books,
+)
+from anki_pleco_importer.planner import WordBookMatrix, plan_learning
+
+
+@given("a library directory with books of {first:d}, {second:d} and {third:d} chapters")
+def step_library_directory(context, first, second, third):
+    """Write one synthetic EPUB per chapter count into a fresh directory."""
+    context.library_dir = context.test_files_dir / f"library_{first}_{second}_{third}"
+    context.library_dir.mkdir()
+    for count in (first, second, third):
+        context.execute_steps(f"Given an EPUB book with {count} chapters")
+        context.epub_path.rename(context.library_dir / context.epub_path.name)
+    context.corpus = CorpusDatabase(context.library_dir / "corpus.sqlite3")
+    context.add_cleanup(context.corpus.close)
+    context.rankings = []
+
+
+@when('I analyze the library with the local segmenter knowing "{words}"')
+def step_analyze_library(context, words):
+    """Analyze new or changed books in a process pool, then rank all books."""
+    known_words = {word.strip() for word in words.split(",")}
+    hsk_word_lists = HSKWordLists()
+    book_paths = find_books(context.library_dir)
+
+    _, stale = split_current_books(context.corpus, book_paths, "local")
+    for result in analyze_books_in_pool(stale, hsk_word_lists, 2, segmenter="local"):
+        assert result.error is None, result.error
+        context.corpus.store_book(result.path, result.title, "local", result.word_frequencies)
+    context.analyzed_count = len(stale)
+
+    books = [context.corpus.get_book(path) for path in book_paths]
+    analyzer = ChineseEPUBAnalyzer(hsk_word_lists, segmenter="local")
+    context.rankings.append(rank_books(context.corpus, books, known_words, analyzer))
+
+
+@then("{count:d} books should have been analyzed")
+def step_books_analyzed(context, count):
+    assert context.analyzed_count == count, f"Expected {count} analyzed books, got {context.analyzed_count}"
+
+
+@then("the books should be ranked by descending coverage")
+def step_ranked_by_coverage(context):
+    coverages = [readability.coverage for readability in context.rankings[-1]]
+    assert len(coverages) == 3
+    assert coverages == sorted(coverages, reverse=True), f"Not ranked by coverage: {coverages}"
+
+
+@then("the coverage of every book should have increased")
+def step_coverage_increased(context):
+    before = {readability.book.path: readability.coverage for readability in context.rankings[-2]}
+    for readability in context.rankings[-1]:
+        assert readability.coverage > before[readability.book.path], f"Coverage did not increase for {readability.book}"
+
+
+@given("books with word frequencies:")
+def step_book_frequencies(context):
+    context.book_frequencies = {}
+    for row in context.table:
+        context.book_frequencies.setdefault(row["book"], {})[row["word"]] = int(row["frequency"])
+
+
+@when("I plan {count:d} words with a target coverage of {target:d}%")
+def step_plan_words(context, count, target):
+    matrix = WordBookMatrix(context.book_frequencies, set())
+    context.plan = plan_learning(matrix, count, target_coverage=target)
+
+
+@then('the planned words should be "{words}"')
+def step_planned_words(context, words):
+    planned = [planned.word for planned in context.plan.words]
+    assert planned == [word.strip() for word in words.split(",")], f"Unexpected plan: {planned}"
+
+
+@then("no book should be planned past {target:d}% coverage")
+def step_plan_capped(context, target):
+    for book, coverage in context.plan.final_coverage.items():
+        assert coverage <= target + 1e-9, f"{book} planned to {coverage:.2f}%"
@@ -0,0 +1,88 @@
+"""Step definitions for n-gram counting BDD tests."""
+
+import random
+import re
+from collections import Counter
+
+from behave import given, when, then
+
+from anki_pleco_importer.epub_analyzer import ChineseEPUBAnalyzer
+from anki_pleco_importer.ngrams import NgramCounter, select_words
+
+NGRAM_SAMPLE_WORDS = ["我们", "今天", "学习", "中文", "朋友", "喜欢", "吃饭", "时候", "已经", "因为", "所以", "老师"]
+PUNCTUATION = ["，", "。", "！", "？", "、", " ", "\n", "abc"]
+
+
+@given("{count:d} Chinese chapters mixed with punctuation generated with seed {seed:d}")
+def step_ngram_chapters(context, count, seed):
+    rng = random.Random(seed)
+    context.ngram_chapters = [
+        "".join(
+            rng.choice(NGRAM_SAMPLE_WORDS) + (rng.choice(PUNCTUATION) if rng.random() < 0.2 else "")
+            for _ in range(rng.randint(0, 300))
+        )
+        for _ in range(count)
+    ]
+
+
+def make_counter(context, min_length=2, max_length=4):
+    counter = NgramCounter(min_length, max_length)
+    for chapter in context.ngram_chapters:
+        counter.add_text(chapter)
+    return counter
+
+
+@when("I count the n-grams of {min_length:d} to {max_length:d} characters occurring at least {count:d} times")
+def step_count_ngrams(context, min_length, max_length, count):
+    context.ngram_lengths = (min_length, max_length)
+    context.ngram_min_frequency = count
+    context.ngram_counts = make_counter(context, min_length, max_length).count(count)
+
+
+@then("the counts should match counting every substring of the Chinese runs")
+def step_counts_match_substrings(context):
+    min_length, max_length = context.ngram_lengths
+    expected = Counter()
+    for chapter in context.ngram_chapters:
+        for run in re.findall(r"[\u4e00-\u9fff]+", chapter):
+            for length in range(min_length, max_length + 1):
+                expected.update(run[i : i + length] for i in range(len(run) - length + 1))
+    expected = {ngram: count for ngram, count in expected.items() if count >= context.ngram_min_frequency}
+    assert context.ngram_counts == expected
+
+
+@when("I keep the word-like n-grams occurring at least {count:d} times")
+def step_keep_word_like(context, count):
+    context.word_like = select_words(make_counter(context).score(count))
+
+
+@then("every sample word should be kept")
+def step_sample_words_kept(context):
+    missing = [word for word in NGRAM_SAMPLE_WORDS if word not in context.word_like]
+    assert not missing, f"Sample words not kept: {missing}"
+
+
+@then("no n-gram spanning two sample words should be kept")
+def step_no_spanning_ngrams(context):
+    spanning = [ngram for ngram in context.word_like if ngram not in NGRAM_SAMPLE_WORDS]
+    assert not spanning, f"Kept fragments across words: {spanning[:10]}"
+
+
+@when("I analyze the book with the n-gram segmenter")
+def step_analyze_ngram(context):
+    analyzer = ChineseEPUBAnalyzer(segmenter="ngram", cache_dir=context.test_files_dir / "ngram_cache")
+    context.ngram_frequencies, context.ngram_chapter_counts = analyzer.extract_word_frequencies(context.epub_path)
+
+
+@then("every sample word should be found by the n-gram segmenter")
+def step_sample_words_found(context):
+    missing = [word for word in NGRAM_SAMPLE_WORDS if word not in context.ngram_frequencies]
+    assert not missing, f"Sample words not found: {missing}"
+
+
+@then("the chapter counts should add up to the book frequencies")
+def step_chapter_counts_add_up(context):
+    total = Counter()
+    for chapter in context.ngram_chapter_counts:
+        total.update(chapter.counts)
+    assert dict(total) == context.ngram_frequencies
@@ -0,0 +1,79 @@
+"""Step definitions for i+1 sentence finder BDD tests."""
+
+import sqlite3
+
+from behave import given, when, then
+
+from anki_pleco_importer.epub_analyzer import ChineseEPUBAnalyzer
+from anki_pleco_importer.segmenter import ChineseSegmenter
+from anki_pleco_importer.sentence_finder import UnknownWordIndex
+from anki_pleco_importer.sentence_index import split_sentences
+
+FINDER_SAMPLE_WORDS = ["我们", "今天", "学习", "中文", "朋友", "喜欢", "吃饭", "时候", "已经", "因为", "所以", "老师"]
+
+
+def parse_words(words):
+    """Parse a comma-separated word list."""
+    return {word.strip() for word in words.split(",")}
+
+
+def sentence_words(context):
+    """Segment every sentence of the book again, independently of the index."""
+    return [
+        set(context.segmenter.cut(sentence))
+        for chapter in context.analyzer.iter_chapters(context.epub_path)
+        for sentence in split_sentences(chapter.text)
+        if context.segmenter.count_tokens(sentence)
+    ]
+
+
+@given('an unknown word index of the book knowing every sample word except "{words}"')
+def step_unknown_word_index(context, words):
+    context.analyzer = ChineseEPUBAnalyzer(segmenter="local")
+    context.segmenter = ChineseSegmenter()
+    context.index = UnknownWordIndex(context.test_files_dir / f"unknown_words_{id(context)}.sqlite3")
+    context.add_cleanup(context.index.close)
+    context.index.build(
+        context.analyzer.iter_chapters(context.epub_path), context.segmenter.cut, context.epub_path, "test"
+    )
+    context.known_words = set(FINDER_SAMPLE_WORDS) - parse_words(words)
+    context.index.update_known_words(context.known_words)
+
+
+@when('I learn the words "{words}"')
+def step_learn_words(context, words):
+    context.changed_words = parse_words(words)
+    context.known_words = context.known_words | context.changed_words
+    context.touched = context.index.update_known_words(context.known_words)
+
+
+@when('I forget the words "{words}"')
+def step_forget_words(context, words):
+    context.changed_words = parse_words(words)
+    context.known_words = context.known_words - context.changed_words
+    context.touched = context.index.update_known_words(context.known_words)
+
+
+@then('only the sentences containing "{words}" should have been updated')
+def step_only_changed_sentences(context, words):
+    expected = sum(len(parse_words(words) & tokens) for tokens in sentence_words(context))
+    assert expected > 0, "Expected sentences containing the changed words"
+    assert context.touched == expected, f"Updated {context.touched} sentence counts, expected {expected}"
+
+
+@then("the unknown word counts should match a full recount")
+def step_counts_match_recount(context):
+    expected = [len(tokens - context.known_words) for tokens in sentence_words(context)]
+    with sqlite3.connect(str(context.index.db_path)) as conn:
+        stored = [count for (count,) in conn.execute("SELECT unknown_count FROM sentences ORDER BY sentence_id")]
+    assert stored == expected, "Stored unknown word counts differ from a full recount"
+
+
+@then("every sentence found with {count:d} unknown word should contain exactly one unknown word")
+def step_found_sentences(context, count):
+    matches = list(context.index.find_sentences(count))
+    assert matches, "Expected i+1 sentences"
+    for match in matches:
+        unknown = set(context.segmenter.cut(match.text)) - context.known_words
+        assert unknown == set(match.unknown_words), f"{match.text}: {unknown} != {match.unknown_words}"
+        assert len(unknown) == count
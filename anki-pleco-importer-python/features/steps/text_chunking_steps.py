@@ -0,0 +1,132 @@
+"""Step definitions for text chunking BDD tests."""
+
+import random
+import re
+
+from behave import given, when, then
+
+from anki_pleco_importer.chunking import iter_text_chunks
+
+CHINESE_CHARACTERS = "我们今天学习中文朋友喜欢吃饭时候已经因为所以老师的了在"
+SEPARATORS = ["。", "！", "？", "；", "，", "、", " ", "\n", "\n\n", "。\n", "！ \n", "\n \n", "　", "的", "了", "在"]
+
+
+def reference_chunk_text(text, max_chunk_size):
+    """Quadratic paragraph/sentence chunker the linear chunker replaced, kept as the test oracle."""
+    if len(text) <= max_chunk_size:
+        return [text]
+
+    chunks = []
+    current_chunk = ""
+    for paragraph in re.split(r"\n\s*\n|。\s*\n|！\s*\n|？\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+
+        if len(current_chunk) + len(paragraph) + 1 <= max_chunk_size:
+            current_chunk = current_chunk + "\n" + paragraph if current_chunk else paragraph
+        else:
+            if current_chunk:
+                chunks.append(current_chunk)
+            if len(paragraph) > max_chunk_size:
+                sentence_chunks = reference_split_by_sentences(paragraph, max_chunk_size)
+                chunks.extend(sentence_chunks[:-1])
+                current_chunk = sentence_chunks[-1] if sentence_chunks else ""
+            else:
+                current_chunk = paragraph
+
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+
+def reference_split_by_sentences(text, max_chunk_size):
+    """Sentence splitting of the reference chunker, including the trailing unpunctuated sentence."""
+    sentences = re.split(r"([。！？；])", text)
+
+    chunks = []
+    current_chunk = ""
+    for i in range(0, len(sentences), 2):
+        sentence = sentences[i]
+        if i + 1 < len(sentences):
+            sentence += sentences[i + 1]
+
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+
+        if len(current_chunk) + len(sentence) <= max_chunk_size:
+            current_chunk += sentence
+            continue
+
+        if current_chunk:
+            chunks.append(current_chunk)
+
+        while len(sentence) > max_chunk_size:
+            break_point = max_chunk_size
+            for punct in ["，", "、", " ", "的", "了", "在"]:
+                punct_pos = sentence.rfind(punct, max_chunk_size - 200, max_chunk_size)
+                if punct_pos > max_chunk_size - 500:
+                    break_point = punct_pos + len(punct)
+                    break
+            chunks.append(sentence[:break_point])
+            sentence = sentence[break_point:].strip()
+        current_chunk = sentence
+
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+
+def random_text(rng):
+    """Build a text of character runs of very different lengths joined by random separators."""
+    parts = []
+    for _ in range(rng.randint(1, 40)):
+        run_length = int(rng.expovariate(1 / rng.choice([5, 50, 400, 1500])))
+        parts.append("".join(rng.choices(CHINESE_CHARACTERS, k=run_length)))
+        parts.append(rng.choice(SEPARATORS))
+    return "".join(parts)
+
+
+@given("{count:d} random Chinese texts generated with seed {seed:d}")
+def step_random_texts(context, count, seed):
+    rng = random.Random(seed)
+    context.chunking_cases = [(random_text(rng), rng.randint(500, 1500)) for _ in range(count)]
+
+
+@given("a Chinese text of {length:d} characters without punctuation")
+def step_unpunctuated_text(context, length):
+    rng = random.Random(length)
+    context.chinese_text = "".join(rng.choices("我们今天学习中文朋友喜欢吃饭时候已经因为所以老师", k=length))
+
+
+@when("I chunk every text with the linear chunker and the reference chunker")
+def step_chunk_random_texts(context):
+    context.chunking_results = [
+        (list(iter_text_chunks(text, max_size)), reference_chunk_text(text, max_size), max_size)
+        for text, max_size in context.chunking_cases
+    ]
+
+
+@when("I chunk the text with a maximum size of {max_size:d}")
+def step_chunk_text(context, max_size):
+    context.chunks = list(iter_text_chunks(context.chinese_text, max_size))
+
+
+@then("both chunkers should produce identical chunks")
+def step_chunkers_identical(context):
+    for case_number, (chunks, expected, max_size) in enumerate(context.chunking_results):
+        assert chunks == expected, f"Case {case_number} (max {max_size}): chunks differ from the reference"
+
+
+@then("no chunk should exceed its maximum size")
+def step_chunk_sizes(context):
+    for chunks, _, max_size in context.chunking_results:
+        if len(chunks) > 1:
+            assert all(len(chunk) <= max_size for chunk in chunks), f"Chunk longer than {max_size}"
+
+
+@then("the chunks should contain every character of the text")
+def step_chunks_complete(context):
+    assert len(context.chunks) > 1, "Expected the text to be split"
+    assert "".join(context.chunks) == context.chinese_text, "Chunks lost part of the text"
@@ -0,0 +1,15 @@
+Feature: Text Chunking
+  As a Chinese learner
+  I want long chapters split into request-sized chunks at natural boundaries
+  So that key phrase extraction sees whole sentences and no text is lost
+
+  Scenario: The linear chunker matches the reference chunker on random texts
+    Given 500 random Chinese texts generated with seed 20240607
+    When I chunk every text with the linear chunker and the reference chunker
+    Then both chunkers should produce identical chunks
+    And no chunk should exceed its maximum size
+
+  Scenario: Text after the last sentence ending is kept
+    Given a Chinese text of 12000 characters without punctuation
+    When I chunk the text with a maximum size of 5000
+    Then the chunks should contain every character of the text
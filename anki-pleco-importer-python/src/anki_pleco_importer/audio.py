@@ -6,15 +6,45 @@ import tempfile
 import platform
 import subprocess
 import re
+import shlex
+import shutil
+import threading
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from urllib.parse import urlparse
+from typing import List, Dict, Callable, Iterable, Optional, Any, Tuple
 import logging
 
 import requests
 
+from .audio_processing import (
+    DEFAULT_PROCESSING_WORKERS,
+    AudioProcessingError,
+    NormalizationReport,
+    TranscodeReport,
+    encode_mp3,
+    ffmpeg_available,
+    normalize_cache,
+    transcode_cache,
+)
+from .audio_cache import DEFAULT_METADATA_TTL, METADATA_FILENAME, AudioCacheManifest, MetadataCache
+from .http_client import DEFAULT_MAX_RETRIES, HttpClient
+from .latency import LatencyHistogram, LatencySummary
+from .placement import DEFAULT_PLACEMENT, is_same_file, place_file
+
 logger = logging.getLogger(__name__)
 
+# Hedged generation asks the next provider too when the current one is slower than this
+# (seconds) until it has answered MIN_HEDGE_SAMPLES times; then its HEDGE_QUANTILE latency is used
+DEFAULT_HEDGE_BUDGET = 2.0
+HEDGE_QUANTILE = 0.95
+MIN_HEDGE_SAMPLES = 20
+
+# Requests in flight per host (and connections kept open), shared by lookups, previews and downloads
+CONNECTION_POOL_SIZE = 8
+
 
 class AudioGeneratorError(Exception):
     """Base exception for audio generation errors."""
@@ -28,12 +58,49 @@ class TTSProviderNotAvailable(AudioGeneratorError):
     pass
 
 
+class SelectionRequired(AudioGeneratorError):
+    """Raised instead of prompting when generating audio needs the user to choose, on a thread that must not ask."""
+
+    pass
+
+
 class AudioGenerator(ABC):
     """Abstract base class for audio generators."""
 
-    def __init__(self, cache_dir: Optional[str] = None):
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        metadata_ttl: float = DEFAULT_METADATA_TTL,
+        placement: str = DEFAULT_PLACEMENT,
+    ):
+        self.placement = placement
         self.cache_dir = Path(cache_dir) if cache_dir else Path("audio_cache")
         self.cache_dir.mkdir(exist_ok=True)
+        self.manifest = AudioCacheManifest(self.cache_dir)
+        self.metadata_cache = MetadataCache(self.cache_dir / METADATA_FILENAME, metadata_ttl)
+
+    def _get_metadata(self, text: str, language: str, fetch: Callable[[str], Optional[Any]]) -> Optional[Any]:
+        """
+        Get what the provider knows about a text, from the metadata cache or by fetching it.
+
+        Args:
+            text: Text to look up
+            language: Language of the text
+            fetch: Function requesting the metadata of a text, returning None on failure
+
+        Returns:
+            The metadata, or None if it is not cached and could not be fetched
+        """
+        provider = self.get_provider_name()
+        metadata = self.metadata_cache.get(provider, language, text)
+        if metadata is not None:
+            logger.debug(f"Using cached {provider} metadata for '{text}'")
+            return metadata
+
+        metadata = fetch(text)
+        if metadata is not None:
+            self.metadata_cache.put(provider, language, text, metadata)
+        return metadata
 
     def _get_cache_filename(self, text: str, provider: str, details: Optional[str] = None) -> Path:
         """Generate a cache filename based on text, provider, and optional details."""
@@ -59,12 +126,39 @@ class AudioGenerator(ABC):
 
     def _is_cached(self, text: str, provider: str, details: Optional[str] = None) -> bool:
         """Check if audio is already cached."""
-        return self._get_cache_filename(text, provider, details).exists()
+        return self.manifest.get(text, provider, details) is not None
+
+    def has_cached_audio(self, text: str, cache_details: Optional[str] = None) -> bool:
+        """Check whether generate_with_cache would answer from the cache."""
+        return self._is_cached(text, self.get_provider_name(), cache_details)
 
     def _get_cached_path(self, text: str, provider: str, details: Optional[str] = None) -> Optional[str]:
         """Get path to cached audio file."""
-        cache_file = self._get_cache_filename(text, provider, details)
-        return str(cache_file) if cache_file.exists() else None
+        entry = self.manifest.get(text, provider, details)
+        return str(entry.path) if entry else None
+
+    def _add_to_cache(
+        self, text: str, provider: str, cache_file: str, details: Optional[str] = None, username: Optional[str] = None
+    ) -> None:
+        """
+        Record a file written to the cache directory in the manifest.
+
+        If the cache already holds a file with the same content (the same
+        recording serving several words), the new file is replaced by a hard
+        link to it, so both names share one copy on disk.
+        """
+        entry = self.manifest.add(text, provider, Path(cache_file), details, username)
+        duplicate = self.manifest.find_duplicate(entry)
+        if duplicate and not is_same_file(duplicate.path, entry.path):
+            place_file(duplicate.path, entry.path, "hardlink")
+            logger.debug(f"Cached audio for '{text}' shares its file with '{duplicate.text}'")
+
+    def _place_cached_file(self, cache_file: str, output_file: Optional[str]) -> str:
+        """Make a cached file available at output_file, if one was requested, using the placement strategy."""
+        if not output_file or output_file == cache_file:
+            return cache_file
+        place_file(Path(cache_file), Path(output_file), self.placement)
+        return output_file
 
     @abstractmethod
     def generate_audio(self, text: str, output_file: str) -> Optional[str]:
@@ -81,42 +175,45 @@ class AudioGenerator(ABC):
         """Get the name of this provider."""
         pass
 
+    def close(self) -> None:
+        """Close the cache databases."""
+        self.manifest.close()
+        self.metadata_cache.close()
+
     def generate_with_cache(
         self,
         text: str,
         output_file: Optional[str] = None,
         cache_details: Optional[str] = None,
+        prompt: bool = True,
     ) -> Optional[str]:
-        """Generate audio with caching support."""
+        """
+        Generate audio with caching support.
+
+        Generation that prompts must run on the terminal's thread: generators
+        that ask the user to choose raise SelectionRequired instead when prompt
+        is False.
+        """
         provider = self.get_provider_name()
 
         # Check cache first
-        if self._is_cached(text, provider, cache_details):
-            cached_path = self._get_cached_path(text, provider, cache_details)
+        cached_path = self._get_cached_path(text, provider, cache_details)
+        if cached_path:
             logger.info(f"Using cached audio for '{text}' from {provider}")
 
-            # If output_file is specified, copy from cache
-            if output_file and cached_path:
-                import shutil
-
-                shutil.copy2(cached_path, output_file)
-                return output_file
-            return cached_path
-
-        # Generate new audio
-        if not output_file:
-            output_file = str(self._get_cache_filename(text, provider, cache_details))
-
-        result = self.generate_audio(text, output_file)
+            # If output_file is specified, place it from the cache
+            return self._place_cached_file(cached_path, output_file)
 
-        # Cache the result if successful and not already in cache location
-        if result and result != str(self._get_cache_filename(text, provider, cache_details)):
-            cache_file = self._get_cache_filename(text, provider, cache_details)
-            import shutil
-
-            shutil.copy2(result, cache_file)
+        # Generate new audio into the cache, then place it at output_file
+        cache_file = str(self._get_cache_filename(text, provider, cache_details))
+        result = self.generate_audio(text, cache_file)
+        if not result:
+            return None
 
-        return result
+        if result != cache_file:
+            shutil.move(result, cache_file)
+        self._add_to_cache(text, provider, cache_file, cache_details)
+        return self._place_cached_file(cache_file, output_file)
 
 
 class ForvoGenerator(AudioGenerator):
@@ -130,18 +227,38 @@ class ForvoGenerator(AudioGenerator):
         preferred_users: Optional[List[str]] = None,
         download_all_when_no_preferred: bool = True,
         interactive_selection: bool = True,
+        base_url: str = "https://apifree.forvo.com",
+        requests_per_second: float = 5.0,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        metadata_ttl: float = DEFAULT_METADATA_TTL,
+        placement: str = DEFAULT_PLACEMENT,
+        preview_workers: int = 4,
+        preview_limit: Optional[int] = None,
     ):
-        super().__init__(cache_dir)
+        super().__init__(cache_dir, metadata_ttl, placement)
         self.api_key = api_key
         self.language = "zh"
         # Note: Forvo uses the same endpoint for both free and paid APIs
         # The difference is in rate limits and features, not the URL
-        self.base_url = "https://apifree.forvo.com"
+        self.base_url = base_url.rstrip("/")
         self.use_paid_api = use_paid_api
         self.preferred_users = preferred_users or []
         self.download_all_when_no_preferred = download_all_when_no_preferred
         self.interactive_selection = interactive_selection
-        self._cached_selection: Optional[Dict[str, Any]] = None
+
+        # One client for API calls and downloads: the API host is held to
+        # requests_per_second, and throttled or failed requests are retried
+        self.http = HttpClient("forvo", max_concurrency=CONNECTION_POOL_SIZE, max_retries=max_retries)
+        self.http.configure_host(urlparse(self.base_url).netloc, requests_per_second)
+
+        # Previews of the listed pronunciations (the top preview_limit by votes, or all),
+        # downloaded in the background while the user chooses, by audio URL
+        self.preview_workers = max(1, preview_workers)
+        self.preview_limit = preview_limit
+        self._preview_dir: Optional[tempfile.TemporaryDirectory] = None
+        self._preview_executor: Optional[ThreadPoolExecutor] = None
+        self._previews: Dict[str, Future] = {}
+        self._previews_lock = threading.Lock()
 
     def is_available(self) -> bool:
         """Check if Forvo API is available."""
@@ -150,13 +267,95 @@ class ForvoGenerator(AudioGenerator):
     def get_provider_name(self) -> str:
         return "forvo"
 
+    def close(self) -> None:
+        """Stop preview downloads, delete the previews and close the session and caches."""
+        with self._previews_lock:
+            if self._preview_executor is not None:
+                # shutdown(cancel_futures=True) needs Python 3.9
+                for future in self._previews.values():
+                    future.cancel()
+                self._preview_executor.shutdown(wait=True)
+                self._preview_executor = None
+            if self._preview_dir is not None:
+                self._preview_dir.cleanup()
+                self._preview_dir = None
+            self._previews.clear()
+        self.http.close()
+        super().close()
+
+    def _needs_choice(self, pronunciations: List[Dict]) -> bool:
+        """Check whether selecting among these pronunciations prompts the user."""
+        if not self.interactive_selection:
+            return False
+        return not any(pronunciation.get("username") in self.preferred_users for pronunciation in pronunciations)
+
+    def has_cached_audio(self, text: str, cache_details: Optional[str] = None) -> bool:
+        """Check whether any Forvo audio of the text is cached, as generate_with_cache uses it."""
+        return self._find_cached_forvo_audio(text) is not None
+
     def _find_cached_forvo_audio(self, text: str) -> Optional[str]:
         """Find any cached Forvo audio for this text, regardless of username."""
-        # Look for any existing Forvo cache files for this text
-        safe_text = re.sub(r'[<>:"/\\|?*]', "", text).replace(" ", "_")
-        pattern = f"{safe_text}_forvo_*.mp3"
-        cache_files = list(self.cache_dir.glob(pattern))
-        return str(cache_files[0]) if cache_files else None
+        entry = self.manifest.find(text, self.get_provider_name())
+        return str(entry.path) if entry else None
+
+    def _pronunciations_url(self, text: str) -> str:
+        """Build the word-pronunciations API URL for a word."""
+        return (
+            f"{self.base_url}/key/{self.api_key}/format/json/"
+            f"action/word-pronunciations/word/{text}/language/{self.language}"
+        )
+
+    def _fetch_pronunciations(self, text: str) -> Optional[List[Dict]]:
+        """
+        Request the pronunciation list of a word from the Forvo API.
+
+        Args:
+            text: Word to look up
+
+        Returns:
+            Pronunciation items (possibly empty), or None if the request failed
+        """
+        url = self._pronunciations_url(text)
+        logger.info(f"Forvo API request: {url}")
+
+        try:
+            response = self.http.get(url, timeout=10)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Forvo network error: {e}")
+            return None
+        logger.info(f"Forvo API response status: {response.status_code}")
+
+        if response.status_code == 401:
+            logger.error("Forvo API authentication failed - check your API key")
+            return None
+        elif response.status_code == 403:
+            logger.error("Forvo API access forbidden - check your subscription status")
+            return None
+        elif response.status_code == 429:
+            logger.error("Forvo API rate limit exceeded, still throttled after retrying")
+            return None
+
+        try:
+            response.raise_for_status()
+            data = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.error(f"Forvo API error response: {e}")
+            return None
+
+        # Check for API error messages
+        if isinstance(data, dict) and "error" in data:
+            logger.error(f"Forvo API error: {data['error']}")
+            return None
+
+        items = data.get("items", []) if isinstance(data, dict) else None
+        if not isinstance(items, list):
+            logger.error(f"Forvo API returned an unexpected response: {data!r}")
+            return None
+        return [item for item in items if isinstance(item, dict)]
+
+    def _get_pronunciations(self, text: str) -> Optional[List[Dict]]:
+        """Get the pronunciation list of a word, from the metadata cache if it was fetched before."""
+        return self._get_metadata(text, self.language, self._fetch_pronunciations)
 
     def _format_pronunciation_info(self, pronunciation: Dict) -> str:
         """Format pronunciation information for display."""
@@ -297,42 +496,91 @@ class ForvoGenerator(AudioGenerator):
             return False
 
     def _download_pronunciation_preview(self, pronunciation: Dict, text: str) -> Optional[str]:
-        """Download pronunciation to temporary file for preview."""
+        """Download pronunciation to the preview directory."""
         audio_url = pronunciation.get("pathmp3")
-        if not audio_url:
+        if not audio_url or self._preview_dir is None:
             return None
 
         try:
-            # Create temporary file
-            username = pronunciation.get("username", "unknown")
-            temp_file = tempfile.NamedTemporaryFile(suffix=f"_{username}_{text[:10]}.mp3", delete=False)
-            temp_file.close()
+            preview_file = Path(self._preview_dir.name) / f"{hashlib.md5(audio_url.encode('utf-8')).hexdigest()}.mp3"
 
             # Download audio
             logger.debug(f"Downloading preview audio from: {audio_url}")
-            audio_response = requests.get(audio_url, timeout=30)
+            audio_response = self.http.get(audio_url, timeout=30)
             audio_response.raise_for_status()
 
-            with open(temp_file.name, "wb") as f:
+            with open(preview_file, "wb") as f:
                 f.write(audio_response.content)
 
-            return temp_file.name
+            return str(preview_file)
 
         except Exception as e:
-            logger.warning(f"Failed to download preview audio: {e}")
+            logger.warning(f"Failed to download preview audio for '{text}': {e}")
             return None
 
-    def _cleanup_preview_files(self, preview_files: List[str]) -> None:
-        """Clean up temporary preview files."""
-        for file_path in preview_files:
-            try:
-                if os.path.exists(file_path):
-                    os.unlink(file_path)
-            except Exception as e:
-                logger.warning(f"Failed to cleanup preview file {file_path}: {e}")
+    def _start_preview_downloads(self, pronunciations: List[Dict], text: str) -> None:
+        """Download previews of pronunciations in the background, best rated first."""
+        ranked = sorted(
+            pronunciations,
+            key=lambda x: (x.get("num_positive_votes", 0), x.get("num_votes", 0)),
+            reverse=True,
+        )
+        if self.preview_limit:
+            ranked = ranked[: self.preview_limit]
+
+        with self._previews_lock:
+            if self._preview_executor is None:
+                self._preview_dir = tempfile.TemporaryDirectory(prefix="forvo_previews_")
+                self._preview_executor = ThreadPoolExecutor(
+                    max_workers=self.preview_workers, thread_name_prefix="forvo-preview"
+                )
+            for pronunciation in ranked:
+                audio_url = pronunciation.get("pathmp3")
+                if audio_url and audio_url not in self._previews:
+                    self._previews[audio_url] = self._preview_executor.submit(
+                        self._download_pronunciation_preview, pronunciation, text
+                    )
+
+    def _get_preview(self, pronunciation: Dict, text: str) -> Optional[str]:
+        """Get the preview file of a pronunciation, waiting only if it is still downloading."""
+        self._start_preview_downloads([pronunciation], text)
+        with self._previews_lock:
+            future = self._previews.get(pronunciation.get("pathmp3", ""))
+        return future.result() if future else None
+
+    def _take_preview(self, pronunciation: Dict) -> Optional[str]:
+        """Remove the preview of a pronunciation from the previews, returning its file if it was downloaded."""
+        with self._previews_lock:
+            future = self._previews.pop(pronunciation.get("pathmp3", ""), None)
+        if future is None or future.cancel():
+            return None
+        preview_file = future.result()
+        return preview_file if preview_file and os.path.exists(preview_file) else None
+
+    def _discard_previews(self, pronunciations: List[Dict]) -> None:
+        """Cancel or delete the previews of pronunciations that were not selected."""
+        for pronunciation in pronunciations:
+            with self._previews_lock:
+                future = self._previews.pop(pronunciation.get("pathmp3", ""), None)
+            if future is None or future.cancel():
+                continue
+            future.add_done_callback(self._delete_preview)
+
+    @staticmethod
+    def _delete_preview(future: Future) -> None:
+        """Delete a downloaded preview file."""
+        preview_file = future.result()
+        try:
+            if preview_file and os.path.exists(preview_file):
+                os.unlink(preview_file)
+        except Exception as e:
+            logger.warning(f"Failed to cleanup preview file {preview_file}: {e}")
 
     def _interactive_pronunciation_selection(self, pronunciations: List[Dict], text: str) -> Optional[Dict]:
         """Allow interactive selection of pronunciation with audio preview."""
+        # Start downloading previews while the list is read, so playing an option starts at once
+        self._start_preview_downloads(pronunciations, text)
+
         print(f"\n🎵 {text} - Found {len(pronunciations)} pronunciations:")
 
         for i, pronunciation in enumerate(pronunciations, 1):
@@ -342,7 +590,7 @@ class ForvoGenerator(AudioGenerator):
         print("\nCommands: <number> to play, s<number> to select, 's' to skip")
         print("Example: '1' to play option 1, 's1' to select option 1, 's' to skip all")
 
-        preview_files = []  # Track temporary files for cleanup
+        selected: Optional[Dict] = None
 
         try:
             while True:
@@ -375,15 +623,13 @@ class ForvoGenerator(AudioGenerator):
                             pronunciation = pronunciations[play_num - 1]
                             username = pronunciation.get("username", "unknown")
 
-                            print(f"🔊 Downloading and playing pronunciation by {username}...")
-
-                            # Download to temporary file
-                            temp_file = self._download_pronunciation_preview(pronunciation, text)
-                            if temp_file:
-                                preview_files.append(temp_file)
+                            print(f"🔊 Playing pronunciation by {username}...")
 
+                            # Previews are usually downloaded already
+                            preview_file = self._get_preview(pronunciation, text)
+                            if preview_file:
                                 # Try to play the audio
-                                if self._play_audio(temp_file):
+                                if self._play_audio(preview_file):
                                     print(f"✅ Played pronunciation by {username}")
                                 else:
                                     print("❌ Could not play audio (file downloaded but playback failed)")
@@ -399,85 +645,77 @@ class ForvoGenerator(AudioGenerator):
                     print("\nSkipping pronunciation selection...")
                     return None
         finally:
-            # Clean up temporary preview files
-            if preview_files:
-                self._cleanup_preview_files(preview_files)
+            # Keep only the selected preview, which becomes the cached audio
+            self._discard_previews([pronunciation for pronunciation in pronunciations if pronunciation is not selected])
 
-    def generate_audio(self, text: str, output_file: str) -> Optional[str]:
-        """Download audio from Forvo with smart user selection."""
-        if not self.is_available():
-            raise TTSProviderNotAvailable("Forvo API not available")
+    def _select_pronunciation(self, text: str, prompt: bool = True) -> Optional[Dict]:
+        """
+        Look up the pronunciations of a word once and select one of them.
 
-        try:
-            # Get pronunciation URL
-            url = (
-                f"{self.base_url}/key/{self.api_key}/format/json/"
-                f"action/word-pronunciations/word/{text}/language/{self.language}"
-            )
-            logger.info(f"Forvo API request: {url}")
+        Raises:
+            SelectionRequired: If prompt is False and the user would be asked to choose
+        """
+        pronunciations = self._get_pronunciations(text)
+        if not pronunciations:
+            logger.warning(f"No Forvo pronunciation items found for '{text}'")
+            return None
+        if not prompt and self._needs_choice(pronunciations):
+            raise SelectionRequired(f"Choosing a Forvo pronunciation of '{text}' needs the user")
+
+        selected_pronunciation = self._select_best_pronunciation(pronunciations, text)
+        if not selected_pronunciation:
+            logger.info(f"No pronunciation selected for '{text}'")
+        return selected_pronunciation
+
+    def _download_pronunciation(self, pronunciation: Dict, text: str, output_file: str) -> Optional[str]:
+        """
+        Download the audio of a selected pronunciation.
+
+        Args:
+            pronunciation: Pronunciation item from the Forvo API
+            text: Word being pronounced, for logging
+            output_file: Path to write the audio to
+
+        Returns:
+            Path to the downloaded file, or None if it has no audio URL
+        """
+        username = pronunciation.get("username", "unknown")
+        audio_url = pronunciation.get("pathmp3")
 
-            response = requests.get(url, timeout=10)
-            logger.info(f"Forvo API response status: {response.status_code}")
+        if not audio_url:
+            logger.warning(f"No audio URL found in selected pronunciation for '{text}'")
+            return None
 
-            if response.status_code == 401:
-                logger.error("Forvo API authentication failed - check your API key")
-                return None
-            elif response.status_code == 403:
-                logger.error("Forvo API access forbidden - check your subscription status")
-                return None
-            elif response.status_code == 429:
-                logger.error("Forvo API rate limit exceeded")
-                return None
+        # A preview played during selection is promoted instead of downloaded again
+        preview_file = self._take_preview(pronunciation)
+        if preview_file:
+            shutil.move(preview_file, output_file)
+            logger.info(f"Forvo preview of '{text}' by '{username}' saved to {output_file}")
+            return output_file
 
-            response.raise_for_status()
+        logger.info(f"Downloading audio from: {audio_url}")
+        logger.info(f"Selected pronunciation by: {username}")
 
-            data = response.json()
+        audio_response = self.http.get(audio_url, timeout=30)
+        audio_response.raise_for_status()
 
-            # Check for API error messages
-            if "error" in data:
-                logger.error(f"Forvo API error: {data['error']}")
-                return None
+        # Write to output file
+        with open(output_file, "wb") as f:
+            f.write(audio_response.content)
 
-            pronunciations = data.get("items", [])
-            if not pronunciations:
-                logger.warning(f"No Forvo pronunciation items found for '{text}'")
-                return None
+        logger.info(f"Forvo downloaded audio for '{text}' by '{username}' to {output_file}")
+        return output_file
 
-            # Use cached selection if available, otherwise select
-            selected_pronunciation: Optional[Dict[str, Any]] = None
-            if hasattr(self, "_cached_selection") and self._cached_selection:
-                selected_pronunciation = self._cached_selection
-                # Clear the cache after using it
-                self._cached_selection = None
-                logger.info(f"Using cached pronunciation selection for '{text}'")
-            else:
-                selected_pronunciation = self._select_best_pronunciation(pronunciations, text)
+    def generate_audio(self, text: str, output_file: str) -> Optional[str]:
+        """Download audio from Forvo with smart user selection."""
+        if not self.is_available():
+            raise TTSProviderNotAvailable("Forvo API not available")
 
+        try:
+            selected_pronunciation = self._select_pronunciation(text)
             if not selected_pronunciation:
-                logger.info(f"No pronunciation selected for '{text}'")
                 return None
-
-            # Get user info for logging and filename
-            username = selected_pronunciation.get("username", "unknown")
-            audio_url = selected_pronunciation.get("pathmp3")
-
-            if not audio_url:
-                logger.warning(f"No audio URL found in selected pronunciation for '{text}'")
-                return None
-
-            logger.info(f"Downloading audio from: {audio_url}")
-            logger.info(f"Selected pronunciation by: {username}")
-
-            # Download the audio file
-            audio_response = requests.get(audio_url, timeout=30)
-            audio_response.raise_for_status()
-
-            # Write to output file
-            with open(output_file, "wb") as f:
-                f.write(audio_response.content)
-
-            logger.info(f"Forvo downloaded audio for '{text}' by '{username}' to {output_file}")
-            return output_file
+            return self._download_pronunciation(selected_pronunciation, text, output_file)
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Forvo network error: {e}")
@@ -491,58 +729,130 @@ class ForvoGenerator(AudioGenerator):
         text: str,
         output_file: Optional[str] = None,
         cache_details: Optional[str] = None,
+        prompt: bool = True,
     ) -> Optional[str]:
-        """Generate audio with Forvo-specific caching that includes username."""
+        """
+        Generate audio with Forvo-specific caching that includes username.
+
+        The pronunciation list is requested once: the selected pronunciation
+        gives the username for the cache filename and the URL to download.
+        If prompt is False, SelectionRequired is raised instead of asking the
+        user; the list stays in the metadata cache for the prompting call.
+        """
         # Check for any existing cached audio first
         cached_audio = self._find_cached_forvo_audio(text)
         if cached_audio:
             logger.info(f"Using cached Forvo audio for '{text}': {cached_audio}")
-            if output_file and output_file != cached_audio:
-                import shutil
-
-                shutil.copy2(cached_audio, output_file)
-                return output_file
-            return cached_audio
+            return self._place_cached_file(cached_audio, output_file)
 
-        # No cache found, need to download and determine username first
         try:
-            # Get pronunciation URL to determine username
-            url = (
-                f"{self.base_url}/key/{self.api_key}/format/json/"
-                f"action/word-pronunciations/word/{text}/language/{self.language}"
-            )
-            response = requests.get(url, timeout=10)
-
-            if response.status_code != 200:
-                return None
-
-            data = response.json()
-            pronunciations = data.get("items", [])
-            if not pronunciations:
-                return None
-
-            # Select the best pronunciation to get username - cache the result
-            selected_pronunciation = self._select_best_pronunciation(pronunciations, text)
+            selected_pronunciation = self._select_pronunciation(text, prompt)
             if not selected_pronunciation:
                 return None
 
-            # Store the selection to avoid re-prompting
-            self._cached_selection = selected_pronunciation
             username = selected_pronunciation.get("username", "unknown")
+            cache_file = str(self._get_cache_filename(text, self.get_provider_name(), username))
+            if not self._download_pronunciation(selected_pronunciation, text, cache_file):
+                return None
+            self._add_to_cache(text, self.get_provider_name(), cache_file, username, username)
+            return self._place_cached_file(cache_file, output_file)
 
-            # Use new caching system with username as cache_details
-            return super().generate_with_cache(text, output_file, username)
-
+        except SelectionRequired:
+            raise
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Forvo network error: {e}")
+            return None
         except Exception as e:
-            logger.error(f"Forvo cache lookup error: {e}")
+            logger.error(f"Forvo unexpected error: {e}")
             return None
 
 
+class LocalTTSGenerator(AudioGenerator):
+    """
+    Offline speech synthesis with a locally installed engine, espeak-ng by default.
+
+    The engine runs as a subprocess from a command template whose
+    placeholders {text}, {output}, {voice} and {speed} are filled in for each
+    text. Engines writing anything but MP3 are encoded to MP3 with ffmpeg.
+    """
+
+    DEFAULT_COMMAND = ["espeak-ng", "-v", "{voice}", "-s", "{speed}", "-w", "{output}", "{text}"]
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        command: Optional[Any] = None,
+        voice: str = "cmn",
+        speed: int = 150,
+        output_format: str = "wav",
+        timeout: float = 30.0,
+        placement: str = DEFAULT_PLACEMENT,
+    ):
+        """
+        Create a generator running a speech synthesis command.
+
+        Args:
+            cache_dir: Directory to cache audio files
+            command: Command template as a list of arguments or a shell-like string
+            voice: Voice filled in for {voice}; cached audio is kept per voice
+            speed: Speaking rate filled in for {speed} (words per minute for espeak-ng)
+            output_format: Format the command writes to {output}
+            timeout: Seconds allowed for synthesizing one text
+            placement: How cached files are placed at output paths
+        """
+        super().__init__(cache_dir, placement=placement)
+        if isinstance(command, str):
+            command = shlex.split(command)
+        self.command = list(command or self.DEFAULT_COMMAND)
+        self.voice = voice
+        self.speed = speed
+        self.output_format = output_format.lower().lstrip(".")
+        self.timeout = timeout
+
+    def is_available(self) -> bool:
+        """Check that the engine (and ffmpeg, if its output needs encoding) is installed."""
+        if not self.command or shutil.which(self.command[0]) is None:
+            return False
+        return self.output_format == "mp3" or ffmpeg_available()
+
+    def get_provider_name(self) -> str:
+        return "local"
+
+    def get_cache_details(self) -> str:
+        """Cache audio per voice."""
+        return self.voice
+
+    def generate_audio(self, text: str, output_file: str) -> Optional[str]:
+        """Synthesize speech for a text into an MP3 file."""
+        with tempfile.TemporaryDirectory(prefix="tts_") as temp_dir:
+            if self.output_format == "mp3":
+                raw_file = output_file
+            else:
+                raw_file = os.path.join(temp_dir, f"speech.{self.output_format}")
+            fields = {"text": text, "output": raw_file, "voice": self.voice, "speed": self.speed}
+            arguments = [argument.format(**fields) for argument in self.command]
+            try:
+                subprocess.run(arguments, check=True, capture_output=True, timeout=self.timeout)
+                if raw_file != output_file:
+                    encode_mp3(raw_file, output_file)
+            except (OSError, subprocess.SubprocessError, AudioProcessingError) as e:
+                logger.error(f"Local speech synthesis failed for '{text}': {e}")
+                return None
+
+        logger.info(f"🗣️ Synthesized '{text}' with {os.path.basename(self.command[0])} ({self.voice})")
+        return output_file
+
+
 class AudioGeneratorFactory:
     """Factory for creating audio generators."""
 
     @staticmethod
-    def create_generator(provider: str, config: Dict[str, Any], cache_dir: Optional[str] = None) -> AudioGenerator:
+    def create_generator(
+        provider: str,
+        config: Dict[str, Any],
+        cache_dir: Optional[str] = None,
+        placement: str = DEFAULT_PLACEMENT,
+    ) -> AudioGenerator:
         """Create an audio generator based on provider and configuration."""
         if provider == "forvo":
             api_key = config.get("api_key")
@@ -555,6 +865,23 @@ class AudioGeneratorFactory:
                 preferred_users=config.get("preferred_users", []),
                 download_all_when_no_preferred=config.get("download_all_when_no_preferred", True),
                 interactive_selection=config.get("interactive_selection", True),
+                base_url=config.get("base_url", "https://apifree.forvo.com"),
+                requests_per_second=config.get("requests_per_second", 5.0),
+                max_retries=config.get("max_retries", DEFAULT_MAX_RETRIES),
+                metadata_ttl=config.get("metadata_ttl_days", DEFAULT_METADATA_TTL / 86400) * 86400,
+                placement=placement,
+                preview_workers=config.get("preview_workers", 4),
+                preview_limit=config.get("preview_limit"),
+            )
+        elif provider == "local":
+            return LocalTTSGenerator(
+                cache_dir=cache_dir,
+                command=config.get("command"),
+                voice=config.get("voice", "cmn"),
+                speed=config.get("speed", 150),
+                output_format=config.get("output_format", "wav"),
+                timeout=config.get("timeout", 30.0),
+                placement=placement,
             )
         else:
             raise ValueError(f"Unknown audio provider: {provider}")
@@ -564,7 +891,7 @@ class AudioGeneratorFactory:
         """Get list of available providers based on configuration."""
         available = []
 
-        for provider in ["forvo"]:
+        for provider in ["forvo", "local"]:
             try:
                 generator = AudioGeneratorFactory.create_generator(provider, config.get(provider, {}), cache_dir=None)
                 if generator.is_available():
@@ -583,59 +910,333 @@ class MultiProviderAudioGenerator:
         providers: List[str],
         config: Dict[str, Dict[str, Any]],
         cache_dir: Optional[str] = None,
+        placement: str = DEFAULT_PLACEMENT,
+        fallback_providers: Optional[List[str]] = None,
+        hedge: bool = False,
+        hedge_budget: float = DEFAULT_HEDGE_BUDGET,
     ):
+        """
+        Create the generators of the available providers.
+
+        Args:
+            providers: Providers tried in order for each text
+            config: Configuration of each provider
+            cache_dir: Directory to cache audio files
+            placement: How cached files are placed at output paths
+            fallback_providers: Providers (e.g. "local" speech synthesis) used by
+                generate_fallback_audio for texts the others gave no audio for
+            hedge: Ask the next provider as well when one is slow, instead of waiting for it
+            hedge_budget: Seconds to wait for a provider before hedging, until its own
+                latencies are known
+        """
         self.providers = providers
         self.config = config
         self.cache_dir = cache_dir
-        self.generators = {}
         self.skipped_words: List[str] = []  # Track words with no pronunciation selected
+        self._skipped_lock = threading.Lock()  # generate_audio may run on several threads
 
         # Initialize generators
+        self.generators = self._create_generators(providers, placement)
+        self.fallback_generators = self._create_generators(fallback_providers or [], placement)
+
+        # Latency of every provider, which sets how long hedged generation waits for it
+        self.hedge = hedge
+        self.hedge_budget = hedge_budget
+        self.latencies = {provider: LatencyHistogram() for provider in self.generators}
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self._hedge_lock = threading.Lock()
+
+    def _create_generators(self, providers: List[str], placement: str) -> Dict[str, AudioGenerator]:
+        """Create the generators of the available providers among providers."""
+        generators: Dict[str, AudioGenerator] = {}
         for provider in providers:
             try:
-                generator = AudioGeneratorFactory.create_generator(provider, config.get(provider, {}), cache_dir)
+                generator = AudioGeneratorFactory.create_generator(
+                    provider, self.config.get(provider, {}), self.cache_dir, placement
+                )
                 if generator.is_available():
-                    self.generators[provider] = generator
+                    generators[provider] = generator
                     logger.info(f"Audio provider '{provider}' is available")
                 else:
                     logger.warning(f"Audio provider '{provider}' is not available")
+                    generator.close()
             except Exception as e:
                 logger.error(f"Failed to initialize audio provider '{provider}': {e}")
+        return generators
 
-    def generate_audio(self, text: str, output_file: Optional[str] = None) -> Optional[str]:
-        """Generate audio using the first available provider."""
-        for provider in self.providers:
-            generator = self.generators.get(provider)
-            if generator:
-                try:
-                    # Get cache details if the generator supports it
-                    cache_details = None
-                    if hasattr(generator, "get_cache_details"):
-                        cache_details = generator.get_cache_details()
+    def _generate_with(
+        self, provider: str, text: str, output_file: Optional[str], prompt: bool = True
+    ) -> Optional[str]:
+        """
+        Generate audio with one provider, recording how long it took.
+
+        The provider is first asked without prompting, so its lookups and
+        downloads are timed together. Only requests to the provider count
+        towards its latency: cache hits and words waiting for the user to
+        choose would skew the hedging threshold.
+
+        Raises:
+            SelectionRequired: If prompt is False and the user would be asked to choose
+        """
+        generator = self.generators[provider]
+        # Get cache details if the generator supports it
+        cache_details = None
+        if hasattr(generator, "get_cache_details"):
+            cache_details = generator.get_cache_details()
+
+        if generator.has_cached_audio(text, cache_details):
+            return generator.generate_with_cache(text, output_file, cache_details)
+
+        started = time.monotonic()
+        needs_choice = False
+        try:
+            return generator.generate_with_cache(text, output_file, cache_details, prompt=False)
+        except SelectionRequired:
+            needs_choice = True
+            if not prompt:
+                raise
+        finally:
+            if not needs_choice:
+                self.latencies[provider].record(time.monotonic() - started)
+
+        # The lookup is in the metadata cache now, so only the choice and its download remain
+        return generator.generate_with_cache(text, output_file, cache_details)
+
+    def hedge_threshold(self, provider: str) -> float:
+        """Seconds to wait for a provider before also asking the next one."""
+        latency = self.latencies[provider]
+        if latency.count < MIN_HEDGE_SAMPLES:
+            return self.hedge_budget
+        return latency.quantile(HEDGE_QUANTILE)
+
+    def get_latency_stats(self) -> Dict[str, LatencySummary]:
+        """Get the latency quantiles of each provider."""
+        return {provider: latency.summary() for provider, latency in self.latencies.items()}
+
+    def generate_audio(self, text: str, output_file: Optional[str] = None, prompt: bool = True) -> Optional[str]:
+        """
+        Generate audio using the first available provider, or the fastest acceptable one when hedging.
+
+        Args:
+            text: Text to generate audio for
+            output_file: Where to place the audio, if not only in the cache
+            prompt: Whether the user may be asked to choose on this thread
+
+        Raises:
+            SelectionRequired: If prompt is False and a provider would ask the user to choose
+        """
+        providers = [provider for provider in self.providers if provider in self.generators]
+        if self.hedge and len(providers) > 1:
+            return self._generate_hedged(text, output_file, providers, prompt)
 
-                    result = generator.generate_with_cache(text, output_file, cache_details)
-                    if result:
-                        logger.info(f"Successfully generated audio for '{text}' using {provider}")
-                        return result
-                    else:
-                        # No result could mean user skipped or no pronunciation found
-                        if text not in self.skipped_words:
-                            self.skipped_words.append(text)
-                        logger.info(f"No audio generated for '{text}' using {provider}")
-                except Exception as e:
-                    logger.error(f"Provider '{provider}' failed for '{text}': {e}")
-                    continue
+        for provider in providers:
+            try:
+                result = self._generate_with(provider, text, output_file, prompt)
+                if result:
+                    logger.info(f"Successfully generated audio for '{text}' using {provider}")
+                    return result
+                else:
+                    # No result could mean user skipped or no pronunciation found
+                    self._add_skipped_word(text)
+                    logger.info(f"No audio generated for '{text}' using {provider}")
+            except SelectionRequired:
+                raise
+            except Exception as e:
+                logger.error(f"Provider '{provider}' failed for '{text}': {e}")
+                continue
 
         # All providers failed - also track as skipped
-        if text not in self.skipped_words:
-            self.skipped_words.append(text)
+        self._add_skipped_word(text)
         logger.error(f"All audio providers failed for '{text}'")
         return None
 
+    def _generate_hedged(
+        self, text: str, output_file: Optional[str], providers: List[str], prompt: bool = True
+    ) -> Optional[str]:
+        """
+        Race the providers in order of preference, starting each when the previous one is late or fails.
+
+        The first provider to return audio wins. Requests of the others that
+        have not started are cancelled; those already running finish in the
+        background, so their audio is in the cache for later. Providers look
+        up what they offer inside the race, without prompting: if one needs the
+        user to choose before another has answered, the race ends and the user
+        is asked on this thread.
+        """
+        with self._hedge_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=4 * len(self.generators), thread_name_prefix="hedge"
+                )
+            executor = self._hedge_executor
+
+        remaining = list(providers)
+        running: Dict[Future, str] = {}
+        winner: Optional[Tuple[str, str]] = None
+        chooser: Optional[str] = None
+
+        def start_next() -> str:
+            provider = remaining.pop(0)
+            # Generate into the cache only: several providers must not write output_file at once
+            running[executor.submit(self._generate_with, provider, text, None, False)] = provider
+            return provider
+
+        latest = start_next()
+        while running and winner is None and chooser is None:
+            timeout = self.hedge_threshold(latest) if remaining else None
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                logger.info(
+                    f"⏱️ '{latest}' has not answered for '{text}' in {timeout:.2f}s, asking '{remaining[0]}' too"
+                )
+                latest = start_next()
+                continue
+            for future in done:
+                provider = running.pop(future)
+                try:
+                    result = future.result()
+                except SelectionRequired:
+                    chooser = chooser or provider
+                    continue
+                except Exception as e:
+                    logger.error(f"Provider '{provider}' failed for '{text}': {e}")
+                    result = None
+                if result and winner is None:
+                    winner = (provider, result)
+                elif not result:
+                    logger.info(f"No audio generated for '{text}' using {provider}")
+            if winner is None and chooser is None and remaining:
+                latest = start_next()
+
+        for future, provider in running.items():
+            if not future.cancel():
+                logger.debug(f"Leaving '{provider}' to cache its audio for '{text}'")
+
+        if winner is None and chooser is not None:
+            if not prompt:
+                raise SelectionRequired(f"'{chooser}' needs the user to choose audio for '{text}'")
+            result = self._generate_with(chooser, text, output_file)
+            if not result:
+                self._add_skipped_word(text)
+                logger.info(f"No audio generated for '{text}' using {chooser}")
+            return result
+
+        if winner is None:
+            self._add_skipped_word(text)
+            logger.error(f"All audio providers failed for '{text}'")
+            return None
+        provider, result = winner
+        logger.info(f"Successfully generated audio for '{text}' using {provider}")
+        return self.generators[provider]._place_cached_file(result, output_file)
+
+    def _add_skipped_word(self, text: str) -> None:
+        """Record a word that got no audio, once."""
+        with self._skipped_lock:
+            if text not in self.skipped_words:
+                self.skipped_words.append(text)
+
     def get_available_providers(self) -> List[str]:
         """Get list of available providers."""
         return list(self.generators.keys())
 
+    def get_fallback_providers(self) -> List[str]:
+        """Get list of available fallback providers."""
+        return list(self.fallback_generators.keys())
+
+    def generate_fallback_audio(
+        self, texts: Iterable[str], workers: int = DEFAULT_PROCESSING_WORKERS
+    ) -> Dict[str, Optional[str]]:
+        """
+        Generate audio with the fallback providers for texts, in parallel.
+
+        Meant for the texts left without audio at the end of a run; those
+        that get audio are no longer reported as skipped.
+
+        Args:
+            texts: Texts without audio
+            workers: Threads running the fallback providers
+
+        Returns:
+            Dictionary mapping each text to its audio file, or None if no fallback provider made one
+        """
+        texts = list(dict.fromkeys(texts))
+        if not texts or not self.fallback_generators:
+            return {text: None for text in texts}
+
+        def generate(text: str) -> Optional[str]:
+            for provider, generator in self.fallback_generators.items():
+                try:
+                    cache_details = generator.get_cache_details() if hasattr(generator, "get_cache_details") else None
+                    result = generator.generate_with_cache(text, None, cache_details)
+                    if result:
+                        return result
+                except Exception as e:
+                    logger.error(f"Fallback provider '{provider}' failed for '{text}': {e}")
+            return None
+
+        logger.info(f"🗣️ Generating fallback audio for {len(texts)} words on {workers} threads")
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="fallback") as executor:
+            results = dict(zip(texts, executor.map(generate, texts)))
+
+        with self._skipped_lock:
+            self.skipped_words = [word for word in self.skipped_words if not results.get(word)]
+        return results
+
+    def _manifests(self) -> List[AudioCacheManifest]:
+        """Get the manifests of the caches of all providers, once each."""
+        generators = [*self.generators.values(), *self.fallback_generators.values()]
+        return list({generator.manifest.db_path: generator.manifest for generator in generators}.values())
+
+    def normalize_audio(self, workers: int = DEFAULT_PROCESSING_WORKERS) -> NormalizationReport:
+        """
+        Loudness-normalize the cached audio not normalized yet.
+
+        Args:
+            workers: Worker processes
+
+        Returns:
+            Counts of normalized, failed and skipped recordings
+        """
+        normalized = failed = skipped = 0
+        for manifest in self._manifests():
+            report = normalize_cache(manifest, workers)
+            normalized += report.normalized
+            failed += report.failed
+            skipped += report.skipped
+        return NormalizationReport(normalized, failed, skipped)
+
+    def transcode_audio(
+        self, paths: Iterable[str], audio_format: str, workers: int = DEFAULT_PROCESSING_WORKERS
+    ) -> Tuple[Dict[str, str], TranscodeReport]:
+        """
+        Get cached audio files in a compact format, transcoding them where needed.
+
+        Args:
+            paths: Cached audio files
+            audio_format: One of AUDIO_FORMATS
+            workers: Worker processes
+
+        Returns:
+            Tuple of the variant of each file that has one, and the combined report
+        """
+        files = [Path(path) for path in paths]
+        compact: Dict[str, str] = {}
+        totals = [0] * len(TranscodeReport._fields)
+        for manifest in self._manifests():
+            variants, report = transcode_cache(manifest, files, audio_format, workers)
+            compact.update({str(path): str(variant) for path, variant in variants.items()})
+            totals = [total + count for total, count in zip(totals, report)]
+        return compact, TranscodeReport(*totals)
+
+    def close(self) -> None:
+        """Release the resources of all providers, once hedged requests still running have finished."""
+        with self._hedge_lock:
+            if self._hedge_executor is not None:
+                self._hedge_executor.shutdown(wait=True)
+                self._hedge_executor = None
+        for generator in [*self.generators.values(), *self.fallback_generators.values()]:
+            generator.close()
+
     def get_skipped_words(self) -> List[str]:
         """Get list of words for which no pronunciation was selected."""
         return self.skipped_words.copy()
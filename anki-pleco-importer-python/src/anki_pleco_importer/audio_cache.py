@@ -0,0 +1,407 @@
+"""SQLite manifest of the audio files in an audio cache directory, and a cache of provider metadata."""
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterator, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "manifest.sqlite3"
+METADATA_FILENAME = "metadata.sqlite3"
+
+# Provider responses (e.g. Forvo pronunciation lists) are reused for this long
+DEFAULT_METADATA_TTL = 30 * 24 * 60 * 60
+
+# Cache filenames are "{text}_{provider}[_{details}]_{hash}.mp3", see AudioGenerator._get_cache_filename
+CACHE_FILENAME_PATTERN = re.compile(r"^(?P<text>.+?)_(?P<provider>[a-z]+)(?:_(?P<details>.+))?_(?P<hash>[0-9a-f]{8})$")
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Columns of audio_files in the order of AudioCacheEntry (with the filename in place of the path)
+ENTRY_COLUMNS = "text, provider, details, filename, content_hash, size, username, loudness, gain_db"
+
+
+class AudioCacheEntry(NamedTuple):
+    """A cached audio file and what it pronounces."""
+
+    text: str
+    provider: str
+    details: str  # provider-specific variant, e.g. the Forvo username; empty if none
+    path: Path
+    content_hash: str  # SHA-256 of the file content
+    size: int
+    username: Optional[str]  # speaker who recorded the audio, for community providers
+    loudness: Optional[float] = None  # integrated loudness (LUFS) before normalization; None if not normalized
+    gain_db: Optional[float] = None  # gain applied by normalization
+
+
+class AudioCacheVariant(NamedTuple):
+    """A cached audio file transcoded to another format."""
+
+    content_hash: str  # hash of the recording it was transcoded from
+    format: str
+    path: Path
+    size: int
+
+
+def hash_file(path: Path) -> str:
+    """Get the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def parse_cache_filename(path: Path) -> Optional[Tuple[str, str, str]]:
+    """
+    Recover the (text, provider, details) of a file named by AudioGenerator._get_cache_filename.
+
+    The hash in the name is checked against the recovered fields, so files
+    whose text was changed by sanitizing, or that were named by hand, are
+    rejected rather than indexed under the wrong text.
+
+    Args:
+        path: Audio file in the cache directory
+
+    Returns:
+        Tuple of (text, provider, details), or None if the name does not match
+    """
+    match = CACHE_FILENAME_PATTERN.match(path.stem)
+    if not match:
+        return None
+    text, provider, details = match.group("text"), match.group("provider"), match.group("details") or ""
+    expected = hashlib.md5(f"{text}_{provider}_{details}".encode("utf-8")).hexdigest()[:8]
+    if expected != match.group("hash"):
+        return None
+    return text, provider, details
+
+
+class AudioCacheManifest:
+    """
+    Index of cached audio files by (text, provider, details).
+
+    Lookups are primary-key reads instead of a directory listing per word.
+    The manifest lives next to the audio files and is rebuilt from their
+    filenames when it is missing, e.g. for caches made before it existed.
+    """
+
+    def __init__(self, cache_dir: Path):
+        """
+        Open the manifest of a cache directory, rebuilding it if it does not exist.
+
+        Args:
+            cache_dir: Directory holding the cached audio files
+        """
+        self.cache_dir = cache_dir
+        self.db_path = cache_dir / MANIFEST_FILENAME
+        self._lock = threading.Lock()
+
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        is_new = not self.db_path.exists()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS audio_files ("
+            "text TEXT NOT NULL, provider TEXT NOT NULL, details TEXT NOT NULL, filename TEXT NOT NULL, "
+            "content_hash TEXT NOT NULL, size INTEGER NOT NULL, username TEXT, loudness REAL, gain_db REAL, "
+            "PRIMARY KEY (text, provider, details)) WITHOUT ROWID"
+        )
+        # Manifests written before normalization existed lack its columns
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(audio_files)")}
+        for column in ("loudness", "gain_db"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE audio_files ADD COLUMN {column} REAL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS audio_files_content_hash ON audio_files (content_hash)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS audio_variants ("
+            "content_hash TEXT NOT NULL, format TEXT NOT NULL, filename TEXT NOT NULL, size INTEGER NOT NULL, "
+            "PRIMARY KEY (content_hash, format)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+        if is_new:
+            self.rebuild()
+
+    def rebuild(self) -> int:
+        """
+        Re-index the audio files of the cache directory from their filenames.
+
+        Returns:
+            Number of files indexed
+        """
+        rows = []
+        for path in sorted(self.cache_dir.glob("*.mp3")):
+            fields = parse_cache_filename(path)
+            if fields is None:
+                logger.debug(f"Not indexing audio file with unrecognized name: {path.name}")
+                continue
+            text, provider, details = fields
+            username = details if provider == "forvo" and details else None
+            rows.append((text, provider, details, path.name, hash_file(path), path.stat().st_size, username))
+
+        with self._lock:
+            self._conn.execute("DELETE FROM audio_files")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO audio_files "
+                "(text, provider, details, filename, content_hash, size, username) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+        logger.info(f"🗂️ Indexed {len(rows)} cached audio files in {self.cache_dir}")
+        return len(rows)
+
+    def _entry(self, row: tuple) -> AudioCacheEntry:
+        """Build an entry from a table row."""
+        text, provider, details, filename, content_hash, size, username, loudness, gain_db = row
+        return AudioCacheEntry(
+            text, provider, details, self.cache_dir / filename, content_hash, size, username, loudness, gain_db
+        )
+
+    def _existing(self, row: Optional[tuple]) -> Optional[AudioCacheEntry]:
+        """Turn a row into an entry, forgetting it if its file was deleted."""
+        if row is None:
+            return None
+        entry = self._entry(row)
+        if entry.path.exists():
+            return entry
+        logger.debug(f"Cached audio file disappeared: {entry.path}")
+        self.remove(entry.text, entry.provider, entry.details)
+        return None
+
+    def get(self, text: str, provider: str, details: Optional[str] = None) -> Optional[AudioCacheEntry]:
+        """Look up the cached audio of a text from a provider variant."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {ENTRY_COLUMNS} FROM audio_files WHERE text = ? AND provider = ? AND details = ?",
+                (text, provider, details or ""),
+            ).fetchone()
+        return self._existing(row)
+
+    def find(self, text: str, provider: str) -> Optional[AudioCacheEntry]:
+        """Look up cached audio of a text from any variant of a provider."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {ENTRY_COLUMNS} FROM audio_files WHERE text = ? AND provider = ? ORDER BY details",
+                (text, provider),
+            ).fetchall()
+        for row in rows:
+            entry = self._existing(row)
+            if entry:
+                return entry
+        return None
+
+    def add(
+        self,
+        text: str,
+        provider: str,
+        path: Path,
+        details: Optional[str] = None,
+        username: Optional[str] = None,
+    ) -> AudioCacheEntry:
+        """
+        Record an audio file that was written to the cache directory.
+
+        Args:
+            text: Text the audio pronounces
+            provider: Provider that generated it
+            path: Audio file inside the cache directory
+            details: Provider-specific variant, e.g. the Forvo username
+            username: Speaker who recorded the audio, if known
+
+        Returns:
+            The recorded entry
+        """
+        entry = AudioCacheEntry(text, provider, details or "", path, hash_file(path), path.stat().st_size, username)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO audio_files "
+                "(text, provider, details, filename, content_hash, size, username) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (text, provider, entry.details, path.name, entry.content_hash, entry.size, username),
+            )
+            self._conn.commit()
+        return entry
+
+    def find_file(self, path: Path) -> Optional[AudioCacheEntry]:
+        """Look up the entry of a file in the cache directory."""
+        if Path(path).parent.resolve() != self.cache_dir.resolve():
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {ENTRY_COLUMNS} FROM audio_files WHERE filename = ? ORDER BY text LIMIT 1",
+                (Path(path).name,),
+            ).fetchone()
+        return self._existing(row)
+
+    def find_duplicate(self, entry: AudioCacheEntry) -> Optional[AudioCacheEntry]:
+        """Look up another cached file with the same content as an entry."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {ENTRY_COLUMNS} FROM audio_files WHERE content_hash = ? AND filename != ? ORDER BY filename",
+                (entry.content_hash, entry.path.name),
+            ).fetchall()
+        for row in rows:
+            duplicate = self._existing(row)
+            if duplicate:
+                return duplicate
+        return None
+
+    def unnormalized(self) -> List[AudioCacheEntry]:
+        """Get the entries whose audio has not been loudness-normalized, grouped by content hash."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {ENTRY_COLUMNS} FROM audio_files WHERE loudness IS NULL ORDER BY content_hash, filename"
+            ).fetchall()
+        return [entry for entry in map(self._entry, rows) if entry.path.exists()]
+
+    def record_normalization(self, content_hash: str, normalized: Path, loudness: float, gain_db: float) -> None:
+        """
+        Record that the audio with a content hash was normalized into a new file content.
+
+        Args:
+            content_hash: Hash of the audio before normalization
+            normalized: Normalized file, shared by every entry that had that content
+            loudness: Integrated loudness (LUFS) measured before normalization
+            gain_db: Gain applied
+        """
+        new_hash = hash_file(normalized)
+        size = normalized.stat().st_size
+        with self._lock:
+            self._conn.execute(
+                "UPDATE audio_files SET content_hash = ?, size = ?, loudness = ?, gain_db = ? WHERE content_hash = ?",
+                (new_hash, size, loudness, gain_db, content_hash),
+            )
+            # Variants of the audio before normalization are stale
+            self._conn.execute("DELETE FROM audio_variants WHERE content_hash = ?", (content_hash,))
+            self._conn.commit()
+
+    def get_variant(self, content_hash: str, audio_format: str) -> Optional[AudioCacheVariant]:
+        """Look up the transcoded variant of a recording in a format."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT filename, size FROM audio_variants WHERE content_hash = ? AND format = ?",
+                (content_hash, audio_format),
+            ).fetchone()
+        if row is None:
+            return None
+        variant = AudioCacheVariant(content_hash, audio_format, self.cache_dir / row[0], row[1])
+        if variant.path.exists():
+            return variant
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM audio_variants WHERE content_hash = ? AND format = ?", (content_hash, audio_format)
+            )
+            self._conn.commit()
+        return None
+
+    def add_variant(self, content_hash: str, audio_format: str, path: Path) -> AudioCacheVariant:
+        """
+        Record a transcoded variant of a recording written to the cache directory.
+
+        Args:
+            content_hash: Hash of the recording it was transcoded from
+            audio_format: Format it was transcoded to
+            path: Transcoded file inside the cache directory
+
+        Returns:
+            The recorded variant
+        """
+        variant = AudioCacheVariant(content_hash, audio_format, path, path.stat().st_size)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO audio_variants (content_hash, format, filename, size) VALUES (?, ?, ?, ?)",
+                (content_hash, audio_format, path.name, variant.size),
+            )
+            self._conn.commit()
+        return variant
+
+    def remove(self, text: str, provider: str, details: Optional[str] = None) -> None:
+        """Forget the cached audio of a text from a provider variant."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM audio_files WHERE text = ? AND provider = ? AND details = ?",
+                (text, provider, details or ""),
+            )
+            self._conn.commit()
+
+    def __iter__(self) -> Iterator[AudioCacheEntry]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {ENTRY_COLUMNS} FROM audio_files ORDER BY text, provider, details"
+            ).fetchall()
+        return iter([self._entry(row) for row in rows])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM audio_files").fetchone()[0])
+
+    def close(self) -> None:
+        """Close the manifest database."""
+        with self._lock:
+            self._conn.close()
+
+
+class MetadataCache:
+    """
+    Provider responses about a word, kept for a limited time.
+
+    Responses are keyed by provider, language and word, so a word looked
+    up once (even if no audio was downloaded for it) is not requested
+    again until its entry is older than the TTL.
+    """
+
+    def __init__(self, db_path: Path, ttl_seconds: float = DEFAULT_METADATA_TTL):
+        """
+        Open (or create) the cache database and drop expired entries.
+
+        Args:
+            db_path: Path to the SQLite database file
+            ttl_seconds: Age after which an entry is fetched again
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS metadata ("
+            "provider TEXT NOT NULL, language TEXT NOT NULL, text TEXT NOT NULL, "
+            "data TEXT NOT NULL, fetched REAL NOT NULL, "
+            "PRIMARY KEY (provider, language, text)) WITHOUT ROWID"
+        )
+        self._conn.execute("DELETE FROM metadata WHERE fetched < ?", (time.time() - ttl_seconds,))
+        self._conn.commit()
+
+    def get(self, provider: str, language: str, text: str) -> Optional[Any]:
+        """Look up the unexpired response of a provider about a word."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM metadata WHERE provider = ? AND language = ? AND text = ? AND fetched >= ?",
+                (provider, language, text, time.time() - self.ttl_seconds),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, provider: str, language: str, text: str, data: Any) -> None:
+        """Store the response of a provider about a word."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO metadata (provider, language, text, data, fetched) VALUES (?, ?, ?, ?, ?)",
+                (provider, language, text, json.dumps(data, ensure_ascii=False), time.time()),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the cache database."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,123 @@
+"""Generate audio for many words alongside other work, prompting the user only where needed."""
+
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from .audio import MultiProviderAudioGenerator, SelectionRequired
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AUDIO_WORKERS = 4
+
+# How often the selection loop checks whether the workers have finished
+POLL_INTERVAL = 0.1
+
+
+class AudioPipeline:
+    """
+    Audio generation split into unattended work and human selection.
+
+    Cache hits, automatic selection and downloads run on a thread pool. Words
+    whose provider needs the user to choose a pronunciation are queued for
+    run_selections, which prompts on the calling thread (the terminal's), so
+    prompts never interleave while the rest of the work keeps going.
+    """
+
+    def __init__(self, generator: MultiProviderAudioGenerator, workers: int = DEFAULT_AUDIO_WORKERS):
+        """
+        Create an idle pipeline.
+
+        Args:
+            generator: Generator producing the audio
+            workers: Threads doing unattended audio work
+        """
+        self.generator = generator
+        self.workers = max(1, workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._selections: "queue.Queue[str]" = queue.Queue()
+        self._results: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._finished = 0
+        self.selection_count = 0
+
+    def start(self, texts: Iterable[str]) -> int:
+        """
+        Start generating audio for texts in the background.
+
+        Args:
+            texts: Texts that need audio; duplicates are generated once
+
+        Returns:
+            Number of distinct texts submitted
+        """
+        pending: List[str] = []
+        with self._lock:
+            for text in dict.fromkeys(texts):
+                if text not in self._results:
+                    self._results[text] = None
+                    pending.append(text)
+            self._submitted += len(pending)
+
+        if pending:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="audio")
+            executor = self._executor
+            for text in pending:
+                executor.submit(self._process, text)
+
+        logger.info(f"🎧 Generating audio for {len(pending)} words on {self.workers} threads")
+        return len(pending)
+
+    def _process(self, text: str) -> None:
+        """Generate audio for a text, or queue it for selection if the user has to choose."""
+        try:
+            self._store(text, self.generator.generate_audio(text, prompt=False))
+        except SelectionRequired:
+            self._selections.put(text)
+        except Exception as e:
+            logger.error(f"Audio generation failed for '{text}': {e}")
+            self._store(text, None)
+
+    def _store(self, text: str, audio_file: Optional[str]) -> None:
+        """Record the outcome of a text."""
+        with self._lock:
+            self._results[text] = audio_file
+            self._finished += 1
+
+    def _all_finished(self) -> bool:
+        with self._lock:
+            return self._finished >= self._submitted
+
+    def run_selections(self) -> None:
+        """Prompt for the queued selections on this thread as they arrive, until every text is done."""
+        while not (self._all_finished() and self._selections.empty()):
+            try:
+                text = self._selections.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+
+            self.selection_count += 1
+            try:
+                audio_file = self.generator.generate_audio(text)
+            except Exception as e:
+                logger.error(f"Audio generation failed for '{text}': {e}")
+                audio_file = None
+            self._store(text, audio_file)
+
+    def results(self) -> Dict[str, Optional[str]]:
+        """
+        Wait for all audio and get it.
+
+        Returns:
+            Dictionary mapping each submitted text to its audio file, or None if none was generated
+        """
+        self.run_selections()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._lock:
+            return dict(self._results)
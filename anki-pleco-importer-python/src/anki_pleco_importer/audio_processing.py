@@ -0,0 +1,362 @@
+"""Loudness normalization and transcoding of cached audio with ffmpeg."""
+
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Tuple, Union
+
+from .audio_cache import AudioCacheEntry, AudioCacheManifest, AudioCacheVariant
+from .placement import place_file
+
+logger = logging.getLogger(__name__)
+
+# EBU R128 loudness targets suited to short speech clips
+TARGET_LOUDNESS = -16.0  # integrated loudness, LUFS
+TARGET_TRUE_PEAK = -1.5  # dBTP
+TARGET_LOUDNESS_RANGE = 11.0  # LU
+
+DEFAULT_PROCESSING_WORKERS = os.cpu_count() or 1
+
+# Silence quieter than this is trimmed from both ends before transcoding, keeping a short margin
+SILENCE_THRESHOLD = "-50dB"
+SILENCE_MARGIN = 0.05  # seconds
+SILENCE_TRIM_FILTER = ",".join(
+    [
+        f"silenceremove=start_periods=1:start_threshold={SILENCE_THRESHOLD}:start_silence={SILENCE_MARGIN}",
+        "areverse",  # silenceremove only trims reliably from the start, so trim the reversed audio too
+        f"silenceremove=start_periods=1:start_threshold={SILENCE_THRESHOLD}:start_silence={SILENCE_MARGIN}",
+        "areverse",
+    ]
+)
+
+# The JSON block printed by loudnorm at the end of ffmpeg's log
+LOUDNORM_REPORT_PATTERN = re.compile(r"\{[^{}]*\"input_i\"[^{}]*\}")
+
+
+class AudioProcessingError(Exception):
+    """Raised when ffmpeg fails on an audio file."""
+
+    pass
+
+
+class LoudnessMeasurement(NamedTuple):
+    """Loudness statistics measured by ffmpeg's loudnorm filter."""
+
+    integrated: float  # LUFS
+    true_peak: float  # dBTP
+    loudness_range: float  # LU
+    threshold: float  # LUFS
+    target_offset: float  # LU
+
+
+class NormalizationResult(NamedTuple):
+    """Outcome of normalizing one file."""
+
+    path: str
+    loudness: float  # integrated loudness before normalization, LUFS
+    gain_db: float
+
+
+class NormalizationReport(NamedTuple):
+    """Summary of normalizing the audio cache."""
+
+    normalized: int  # distinct recordings normalized
+    failed: int
+    skipped: int  # cache entries normalized before
+
+
+class AudioFormat(NamedTuple):
+    """A compact format cached audio can be transcoded to."""
+
+    suffix: str  # appended to the cache filename stem
+    codec_arguments: List[str]  # ffmpeg output options
+
+
+# Speech stays intelligible at these bitrates, a fraction of Forvo's MP3s
+AUDIO_FORMATS: Dict[str, AudioFormat] = {
+    "opus": AudioFormat(".opus", ["-c:a", "libopus", "-b:a", "24k", "-ac", "1", "-application", "voip"]),
+    "mp3-48k": AudioFormat(".48k.mp3", ["-c:a", "libmp3lame", "-b:a", "48k", "-ac", "1"]),
+}
+
+
+class TranscodeReport(NamedTuple):
+    """Summary of transcoding the audio of a run."""
+
+    transcoded: int  # distinct recordings transcoded now
+    reused: int  # distinct recordings transcoded in an earlier run
+    failed: int
+    original_bytes: int  # size of the recordings that have a variant
+    compact_bytes: int  # size of their variants
+
+    @property
+    def bytes_saved(self) -> int:
+        """Bytes the variants save in the media folder."""
+        return self.original_bytes - self.compact_bytes
+
+
+def ffmpeg_available() -> bool:
+    """Check whether the ffmpeg executable is on the PATH."""
+    return shutil.which("ffmpeg") is not None
+
+
+def _run_ffmpeg(arguments: List[str]) -> str:
+    """Run ffmpeg quietly and return its log, raising AudioProcessingError on failure."""
+    command = ["ffmpeg", "-hide_banner", "-nostdin", "-nostats", *arguments]
+    result = subprocess.run(command, capture_output=True, text=True, errors="replace")
+    if result.returncode != 0:
+        raise AudioProcessingError(f"ffmpeg failed ({result.returncode}): {result.stderr.strip()[-500:]}")
+    return result.stderr
+
+
+def _loudnorm_filter(**options: Union[float, str]) -> str:
+    """Build the loudnorm filter for the targets, with further options such as the values of a first pass."""
+    settings = [f"I={TARGET_LOUDNESS}", f"TP={TARGET_TRUE_PEAK}", f"LRA={TARGET_LOUDNESS_RANGE}"]
+    settings += [f"{name}={value}" for name, value in options.items()]
+    return "loudnorm=" + ":".join(settings)
+
+
+def parse_loudnorm_report(log: str) -> LoudnessMeasurement:
+    """
+    Read the measurement loudnorm prints with print_format=json.
+
+    Args:
+        log: ffmpeg's standard error output
+
+    Returns:
+        The measured input loudness statistics
+    """
+    reports = LOUDNORM_REPORT_PATTERN.findall(log)
+    if not reports:
+        raise AudioProcessingError("No loudnorm report in ffmpeg output")
+    report = json.loads(reports[-1])
+    return LoudnessMeasurement(
+        integrated=float(report["input_i"]),
+        true_peak=float(report["input_tp"]),
+        loudness_range=float(report["input_lra"]),
+        threshold=float(report["input_thresh"]),
+        target_offset=float(report["target_offset"]),
+    )
+
+
+def measure_loudness(path: str) -> LoudnessMeasurement:
+    """Measure the loudness of an audio file (first loudnorm pass)."""
+    log = _run_ffmpeg(["-i", path, "-af", _loudnorm_filter(print_format="json"), "-f", "null", "-"])
+    return parse_loudnorm_report(log)
+
+
+def encode_mp3(source: str, destination: str) -> None:
+    """Encode an audio file (e.g. the WAV of a speech synthesizer) to MP3."""
+    _run_ffmpeg(["-y", "-i", source, "-ac", "1", "-c:a", "libmp3lame", "-q:a", "4", destination])
+
+
+def normalize_file(path: str) -> NormalizationResult:
+    """
+    Normalize an MP3 file to the target loudness in place.
+
+    Two loudnorm passes are made: one to measure, and one applying a linear
+    gain with the measured values, so the recording's dynamics are kept.
+    The result replaces the file atomically, giving it a new inode, so hard
+    links to the original elsewhere keep the original.
+
+    Args:
+        path: MP3 file to normalize
+
+    Returns:
+        Loudness before normalization and the gain applied
+    """
+    measurement = measure_loudness(path)
+    if not math.isfinite(measurement.integrated):
+        raise AudioProcessingError("Recording is silent or too short to measure")
+    audio_filter = _loudnorm_filter(
+        measured_I=measurement.integrated,
+        measured_TP=measurement.true_peak,
+        measured_LRA=measurement.loudness_range,
+        measured_thresh=measurement.threshold,
+        offset=measurement.target_offset,
+        linear="true",
+    )
+
+    directory = os.path.dirname(path) or "."
+    fd, temp_path = tempfile.mkstemp(suffix=".mp3", dir=directory)
+    os.close(fd)
+    try:
+        # loudnorm resamples to 192 kHz internally; write the usual 44.1 kHz back out
+        _run_ffmpeg(
+            ["-y", "-i", path, "-af", audio_filter, "-ar", "44100", "-c:a", "libmp3lame", "-q:a", "2", temp_path]
+        )
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+    return NormalizationResult(path, measurement.integrated, TARGET_LOUDNESS - measurement.integrated)
+
+
+def normalize_cache(manifest: AudioCacheManifest, workers: int = DEFAULT_PROCESSING_WORKERS) -> NormalizationReport:
+    """
+    Normalize every cached recording that has not been normalized yet.
+
+    Each distinct recording (content hash) is normalized once across a
+    process pool, then every cache entry sharing it is linked to the
+    normalized file. Loudness and gain are stored in the manifest, so
+    later runs skip these files.
+
+    Args:
+        manifest: Manifest of the audio cache
+        workers: Worker processes
+
+    Returns:
+        Counts of normalized, failed and skipped recordings
+    """
+    skipped = len(manifest) - len(manifest.unnormalized())
+    if not ffmpeg_available():
+        logger.warning("ffmpeg not found - skipping audio normalization")
+        return NormalizationReport(0, 0, skipped)
+
+    by_hash: Dict[str, List[AudioCacheEntry]] = defaultdict(list)
+    for entry in manifest.unnormalized():
+        by_hash[entry.content_hash].append(entry)
+    if not by_hash:
+        return NormalizationReport(0, 0, skipped)
+
+    logger.info(f"🔉 Normalizing {len(by_hash)} recordings to {TARGET_LOUDNESS} LUFS on {workers} processes")
+    normalized = failed = 0
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            content_hash: executor.submit(normalize_file, str(entries[0].path))
+            for content_hash, entries in by_hash.items()
+        }
+        for content_hash, future in futures.items():
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.warning(f"Could not normalize {by_hash[content_hash][0].path.name}: {e}")
+                failed += 1
+                continue
+
+            normalized_path = Path(result.path)
+            for entry in by_hash[content_hash][1:]:
+                place_file(normalized_path, entry.path, "hardlink")
+            manifest.record_normalization(content_hash, normalized_path, result.loudness, result.gain_db)
+            normalized += 1
+
+    logger.info(f"🔉 Normalized {normalized} recordings, {failed} failed, {skipped} already normalized")
+    return NormalizationReport(normalized, failed, skipped)
+
+
+def transcode_file(source: str, destination: str, audio_format: str) -> int:
+    """
+    Transcode an audio file to a compact format, trimming leading and trailing silence.
+
+    Args:
+        source: Audio file to transcode
+        destination: Path of the transcoded file; replaced atomically if it exists
+        audio_format: One of AUDIO_FORMATS
+
+    Returns:
+        Size of the transcoded file in bytes
+    """
+    target = AUDIO_FORMATS[audio_format]
+    directory = os.path.dirname(destination) or "."
+    fd, temp_path = tempfile.mkstemp(suffix=target.suffix, dir=directory)
+    os.close(fd)
+    try:
+        _run_ffmpeg(
+            ["-y", "-i", source, "-af", SILENCE_TRIM_FILTER, "-map_metadata", "-1", *target.codec_arguments, temp_path]
+        )
+        os.replace(temp_path, destination)
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+    return os.path.getsize(destination)
+
+
+def transcode_cache(
+    manifest: AudioCacheManifest,
+    paths: Iterable[Path],
+    audio_format: str,
+    workers: int = DEFAULT_PROCESSING_WORKERS,
+) -> Tuple[Dict[Path, Path], TranscodeReport]:
+    """
+    Get cached audio files in a compact format, transcoding those not transcoded yet.
+
+    Each distinct recording (content hash) is transcoded once across a
+    process pool. The variant is written next to the original, named after
+    it with the format's suffix, and recorded in the manifest, so later runs
+    reuse it. Files the manifest does not know are left out.
+
+    Args:
+        manifest: Manifest of the audio cache
+        paths: Cached audio files
+        audio_format: One of AUDIO_FORMATS
+        workers: Worker processes
+
+    Returns:
+        Tuple of the variant of each file that has one, and the report
+    """
+    if audio_format not in AUDIO_FORMATS:
+        raise ValueError(f"Unknown audio format: {audio_format} (choose from {', '.join(AUDIO_FORMATS)})")
+
+    by_hash: Dict[str, List[AudioCacheEntry]] = defaultdict(list)
+    requested: Dict[str, List[Path]] = defaultdict(list)
+    for path in dict.fromkeys(Path(path) for path in paths):
+        entry = manifest.find_file(path)
+        if entry is None:
+            logger.debug(f"Not transcoding audio outside the cache: {path}")
+            continue
+        by_hash[entry.content_hash].append(entry)
+        requested[entry.content_hash].append(path)
+
+    variants: Dict[str, AudioCacheVariant] = {}
+    missing: Dict[str, AudioCacheEntry] = {}
+    for content_hash, entries in by_hash.items():
+        variant = manifest.get_variant(content_hash, audio_format)
+        if variant:
+            variants[content_hash] = variant
+        else:
+            missing[content_hash] = entries[0]
+    reused = len(variants)
+
+    transcoded = failed = 0
+    if missing and not ffmpeg_available():
+        logger.warning("ffmpeg not found - keeping the original audio format")
+        failed = len(missing)
+    elif missing:
+        logger.info(f"🗜️ Transcoding {len(missing)} recordings to {audio_format} on {workers} processes")
+        suffix = AUDIO_FORMATS[audio_format].suffix
+        with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {
+                content_hash: executor.submit(
+                    transcode_file, str(entry.path), str(entry.path.with_name(entry.path.stem + suffix)), audio_format
+                )
+                for content_hash, entry in missing.items()
+            }
+            for content_hash, future in futures.items():
+                entry = missing[content_hash]
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.warning(f"Could not transcode {entry.path.name}: {e}")
+                    failed += 1
+                    continue
+                variant_path = entry.path.with_name(entry.path.stem + suffix)
+                variants[content_hash] = manifest.add_variant(content_hash, audio_format, variant_path)
+                transcoded += 1
+
+    compact = {path: variant.path for content_hash, variant in variants.items() for path in requested[content_hash]}
+    original_bytes = sum(by_hash[content_hash][0].size for content_hash in variants)
+    compact_bytes = sum(variant.size for variant in variants.values())
+    report = TranscodeReport(transcoded, reused, failed, original_bytes, compact_bytes)
+    logger.info(
+        f"🗜️ {len(variants)} recordings in {audio_format} ({transcoded} transcoded, {reused} reused, {failed} failed), "
+        f"saving {report.bytes_saved} bytes"
+    )
+    return compact, report
@@ -23,8 +23,13 @@ try:
 except ImportError:
     SELENIUM_AVAILABLE = False
 
+from .http_client import HttpClient
+
 logger = logging.getLogger(__name__)
 
+# The dictionary pages are scraped, so stay well below what a browser would request
+CHINESEPOD_REQUESTS_PER_SECOND = 2.0
+
 
 class ChinesePodError(Exception):
     """Base exception for ChinesePod-related errors."""
@@ -370,18 +375,21 @@ class ChinesePodSeleniumChecker:
 class ChinesePodChecker:
     """Checker for ChinesePod dictionary pronunciation availability."""
 
-    def __init__(self, timeout: int = 10):
+    def __init__(self, timeout: int = 10, max_retries: int = 3):
         """Initialize the ChinesePod checker.
 
         Args:
             timeout: Request timeout in seconds
+            max_retries: Retries of a throttled or failed request before trying the next URL
         """
         self.base_url = "https://www.chinesepod.com/dictionary"
         self.timeout = timeout
-        self._session = requests.Session()
+        self._http = HttpClient(
+            "chinesepod", requests_per_second=CHINESEPOD_REQUESTS_PER_SECOND, max_concurrency=2, max_retries=max_retries
+        )
 
         # Set user agent to avoid blocking
-        self._session.headers.update(
+        self._http.session.headers.update(
             {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"}
         )
 
@@ -422,7 +430,7 @@ class ChinesePodChecker:
                 logger.debug(f"URL: {url_attempt}")
 
                 # Make request
-                response = self._session.get(url_attempt, timeout=self.timeout, allow_redirects=True)
+                response = self._http.get(url_attempt, timeout=self.timeout, allow_redirects=True)
                 response.raise_for_status()
 
                 logger.debug(f"Final URL after redirects: {response.url}")
@@ -624,7 +632,7 @@ class ChinesePodChecker:
     def is_available(self) -> bool:
         """Check if ChinesePod service is available."""
         try:
-            response = self._session.get(self.base_url, timeout=5)
+            response = self._http.get(self.base_url, timeout=5)
             return response.status_code == 200
         except:
             return False
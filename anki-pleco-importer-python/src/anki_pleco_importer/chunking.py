@@ -0,0 +1,165 @@
+"""Split long texts into chunks that fit a text analysis request document."""
+
+import re
+from typing import Iterator, List, Tuple
+
+# Paragraph breaks: blank lines, or a line ending with Chinese end punctuation
+PARAGRAPH_BREAK_PATTERN = re.compile(r"\n\s*\n|。\s*\n|！\s*\n|？\s*\n")
+
+# Chinese sentence endings
+SENTENCE_END_PATTERN = re.compile(r"[。！？；]")
+
+# Preferred break characters for sentences longer than a chunk, in order of preference
+FORCED_BREAK_CHARACTERS = ("，", "、", " ", "的", "了", "在")
+
+# How far back from the chunk size to look for a preferred break character
+FORCED_BREAK_WINDOW = 200
+
+
+def _strip_span(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Narrow a span of text the way str.strip() would."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _paragraph_spans(text: str) -> Iterator[Tuple[int, int]]:
+    """Yield the (start, end) offsets of the paragraphs of a text."""
+    start = 0
+    for match in PARAGRAPH_BREAK_PATTERN.finditer(text):
+        yield start, match.start()
+        start = match.end()
+    yield start, len(text)
+
+
+def _sentence_spans(text: str, start: int, end: int) -> Iterator[Tuple[int, int]]:
+    """Yield the (start, end) offsets of the sentences in text[start:end], punctuation included."""
+    for match in SENTENCE_END_PATTERN.finditer(text, start, end):
+        yield start, match.end()
+        start = match.end()
+    yield start, end
+
+
+def _forced_break_spans(text: str, start: int, end: int, max_chunk_size: int) -> Iterator[Tuple[int, int]]:
+    """
+    Split a sentence longer than max_chunk_size, preferring commas and particles near the limit.
+
+    Break characters are searched for in a window of the original text, so
+    no remainder of the sentence is ever copied.
+
+    Yields:
+        (start, end) offsets of the pieces; the last piece may be empty
+    """
+    while end - start > max_chunk_size:
+        limit = start + max_chunk_size
+        window_start = max(start, limit - FORCED_BREAK_WINDOW)
+        break_point = limit
+        for character in FORCED_BREAK_CHARACTERS:
+            position = text.rfind(character, window_start, limit)
+            if position >= 0:
+                break_point = position + 1
+                break
+
+        yield start, break_point
+        start, end = _strip_span(text, break_point, end)
+
+    yield start, end
+
+
+def _iter_sentence_chunks(text: str, start: int, end: int, max_chunk_size: int) -> Iterator[str]:
+    """Chunk a paragraph longer than max_chunk_size at sentence boundaries."""
+    pieces: List[str] = []
+    size = 0
+
+    for sentence_start, sentence_end in _sentence_spans(text, start, end):
+        sentence_start, sentence_end = _strip_span(text, sentence_start, sentence_end)
+        length = sentence_end - sentence_start
+        if not length:
+            continue
+
+        if size + length <= max_chunk_size:
+            pieces.append(text[sentence_start:sentence_end])
+            size += length
+            continue
+
+        if size:
+            yield "".join(pieces)
+
+        if length > max_chunk_size:
+            *full_spans, (rest_start, rest_end) = _forced_break_spans(
+                text, sentence_start, sentence_end, max_chunk_size
+            )
+            for piece_start, piece_end in full_spans:
+                yield text[piece_start:piece_end]
+            sentence_start, sentence_end = rest_start, rest_end
+
+        pieces = [text[sentence_start:sentence_end]]
+        size = sentence_end - sentence_start
+
+    if size:
+        yield "".join(pieces)
+
+
+def iter_text_chunks(text: str, max_chunk_size: int) -> Iterator[str]:
+    """
+    Split text into chunks respecting paragraph and sentence boundaries.
+
+    Paragraphs are packed into chunks joined by newlines. A paragraph longer
+    than a chunk is split at sentence endings, and a sentence longer than a
+    chunk at a comma or particle shortly before the limit. The text is scanned
+    once and every chunk is built from slices at the boundary offsets, so the
+    cost is linear in the text length.
+
+    Args:
+        text: Input text to chunk
+        max_chunk_size: Maximum size for each chunk
+
+    Yields:
+        Text chunks with natural boundaries preserved
+    """
+    if len(text) <= max_chunk_size:
+        yield text
+        return
+
+    pieces: List[str] = []
+    size = 0
+
+    for start, end in _paragraph_spans(text):
+        start, end = _strip_span(text, start, end)
+        length = end - start
+        if not length:
+            continue
+
+        # If paragraph is small enough, add to current chunk
+        if size + length + 1 <= max_chunk_size:
+            if size:
+                pieces.append("\n")
+                size += 1
+            pieces.append(text[start:end])
+            size += length
+            continue
+
+        if size:
+            yield "".join(pieces)
+        pieces = []
+        size = 0
+
+        if length <= max_chunk_size:
+            pieces.append(text[start:end])
+            size = length
+            continue
+
+        # Emit all sentence chunks but the last, which later paragraphs may join
+        last_chunk = None
+        for chunk in _iter_sentence_chunks(text, start, end, max_chunk_size):
+            if last_chunk is not None:
+                yield last_chunk
+            last_chunk = chunk
+        if last_chunk:
+            pieces.append(last_chunk)
+            size = len(last_chunk)
+
+    if size:
+        yield "".join(pieces)
@@ -1,23 +1,48 @@
 """Command line interface for Anki Pleco Importer."""
 
 import click
+import hashlib
 import re
 import pandas as pd
 import os
 import json
-import shutil
 import random
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Set, Tuple
 
 from .parser import PlecoTSVParser
-from .pleco import pleco_to_anki, format_examples_with_semantic_markup
-from .audio import MultiProviderAudioGenerator
+from .pleco import pleco_to_anki, format_examples_with_semantic_markup, find_existing_pronunciation
+from .audio import DEFAULT_HEDGE_BUDGET, MultiProviderAudioGenerator
+from .audio_pipeline import DEFAULT_AUDIO_WORKERS, AudioPipeline
+from .audio_processing import AUDIO_FORMATS
+from .placement import DEFAULT_PLACEMENT, PLACEMENT_STRATEGIES, place_file
 from .hsk import HSKWordLists
 from .epub_analyzer import ChineseEPUBAnalyzer, BookAnalysis
+from .library import (
+    DEFAULT_CORPUS_DB,
+    CorpusDatabase,
+    analyze_books_in_pool,
+    find_books,
+    rank_books,
+    split_current_books,
+)
+from . import planner
+from .ngrams import (
+    DEFAULT_MIN_COHESION,
+    DEFAULT_MIN_ENTROPY,
+    MAX_NGRAM_LENGTH,
+    NgramCounter,
+    NgramScore,
+    select_words,
+)
+from .sentence_finder import UnknownWordIndex
+from .sentence_index import SentenceIndex
+from .anki import AnkiCard as NewAnkiCard
 from .anki_parser import AnkiExportParser, AnkiCard
 from .improver import AnkiImprover
-from .llm import GptFieldGenerator
+from .llm import GptFieldGenerator, TokenUsage
 
 
 def convert_to_html_format(text: str) -> str:
@@ -229,7 +254,24 @@ def cli() -> None:
 @click.option(
     "--audio-providers",
     default="forvo",
-    help="Audio provider (only Forvo supported for high-quality human pronunciation)",
+    help="Audio providers in order of preference: forvo (human pronunciation), local (speech synthesis)",
+)
+@click.option(
+    "--audio-fallback",
+    default=None,
+    help="Providers synthesizing audio for words left without any at the end, e.g. local (espeak-ng)",
+)
+@click.option(
+    "--audio-hedge",
+    is_flag=True,
+    help="Also ask the next audio provider when one is slower than its usual (p95) latency",
+)
+@click.option(
+    "--audio-hedge-budget",
+    type=float,
+    default=DEFAULT_HEDGE_BUDGET,
+    show_default=True,
+    help="Seconds to wait for a provider before hedging, until its latencies are known",
 )
 @click.option(
     "--audio-config",
@@ -242,6 +284,31 @@ def cli() -> None:
     type=click.Path(),
     help="Directory to copy selected audio files to",
 )
+@click.option(
+    "--audio-placement",
+    type=click.Choice(PLACEMENT_STRATEGIES),
+    default=DEFAULT_PLACEMENT,
+    show_default=True,
+    help="How audio files are placed from the cache: links avoid duplicate copies, falling back to copy",
+)
+@click.option(
+    "--audio-workers",
+    type=int,
+    default=DEFAULT_AUDIO_WORKERS,
+    show_default=True,
+    help="Threads downloading audio while cards are built",
+)
+@click.option(
+    "--normalize-audio",
+    is_flag=True,
+    help="Normalize the loudness of new audio in the cache with ffmpeg (EBU R128)",
+)
+@click.option(
+    "--audio-format",
+    type=click.Choice(list(AUDIO_FORMATS)),
+    default=None,
+    help="Transcode audio to a compact format with silence trimmed (default: keep the original MP3)",
+)
 @click.option("--use-gpt", is_flag=True, help="Use GPT to generate etymology and structural decomposition")
 @click.option("--gpt-config", type=click.Path(exists=True), help="Path to GPT configuration JSON file")
 @click.option("--gpt-model", default=None, help="Override GPT model name")
@@ -251,9 +318,16 @@ def convert(
     tsv_file: Path,
     audio: bool,
     audio_providers: str,
+    audio_fallback: Optional[str],
+    audio_hedge: bool,
+    audio_hedge_budget: float,
     audio_config: Optional[str],
     audio_cache_dir: str,
     audio_dest_dir: Optional[str],
+    audio_placement: str,
+    audio_workers: int,
+    normalize_audio: bool,
+    audio_format: Optional[str],
     use_gpt: bool,
     gpt_config: Optional[str],
     gpt_model: Optional[str],
@@ -296,9 +370,16 @@ def convert(
             try:
                 config = load_audio_config(audio_config, verbose)
                 providers = [p.strip() for p in audio_providers.split(",")]
+                fallback_providers = [p.strip() for p in audio_fallback.split(",")] if audio_fallback else []
 
                 audio_generator = MultiProviderAudioGenerator(
-                    providers=providers, config=config, cache_dir=audio_cache_dir
+                    providers=providers,
+                    config=config,
+                    cache_dir=audio_cache_dir,
+                    placement=audio_placement,
+                    fallback_providers=fallback_providers,
+                    hedge=audio_hedge,
+                    hedge_budget=audio_hedge_budget,
                 )
 
                 available_providers = audio_generator.get_available_providers()
@@ -369,55 +450,109 @@ def convert(
                     thinking=llm_cfg.get("thinking"),
                 )
 
-            for i, entry in enumerate(collection, 1):
-                # Generate fields directly to capture token usage if GPT is used
-                field_result = None
-                token_usage = None
-                if field_generator:
-                    field_result = field_generator.generate(entry.chinese, entry.pinyin)
-                    token_usage = field_result.token_usage
+            def build_cards() -> List[Tuple[NewAnkiCard, Optional[TokenUsage]]]:
+                """Generate the fields of every entry, in order, with their GPT token usage."""
+                built = []
+                for entry in collection:
+                    # Generate fields directly to capture token usage if GPT is used
+                    field_result = None
+                    if field_generator:
+                        field_result = field_generator.generate(entry.chinese, entry.pinyin)
+                    anki_card = pleco_to_anki(entry, anki_parser, pregenerated_result=field_result)
+                    built.append((anki_card, field_result.token_usage if field_result else None))
+                return built
+
+            audio_files: Dict[str, Optional[str]] = {}
+            if audio_generator and not dry_run:
+                # Build cards on a background thread while audio is generated on a worker pool.
+                # Selection prompts run on this thread; characters whose audio is reused from
+                # existing cards need none.
+                words = [
+                    entry.chinese
+                    for entry in collection
+                    if not find_existing_pronunciation(entry.chinese, entry.pinyin, anki_parser)
+                ]
+                pipeline = AudioPipeline(audio_generator, workers=audio_workers)
+                pipeline.start(words)
+                with ThreadPoolExecutor(max_workers=1, thread_name_prefix="cards") as card_builder:
+                    cards_future = card_builder.submit(build_cards)
+                    audio_files = pipeline.results()
+                    built_cards = cards_future.result()
+                if verbose:
+                    click.echo(f"Generated audio for {len(words)} words, {pipeline.selection_count} chosen by hand")
+                    for provider, latency in audio_generator.get_latency_stats().items():
+                        if latency.samples:
+                            click.echo(
+                                f"  {provider}: {latency.samples} requests, "
+                                f"p50 {latency.p50 * 1000:.0f} ms, p95 {latency.p95 * 1000:.0f} ms"
+                            )
 
-                    # Track usage statistics
-                    if token_usage:
-                        total_tokens += token_usage.total_tokens
-                        total_cost += token_usage.cost_usd
-                        gpt_calls += 1
+                # Synthesize audio offline for the words still silent
+                silent_words = [text for text, path in audio_files.items() if not path]
+                if silent_words and audio_generator.get_fallback_providers():
+                    fallback_files = audio_generator.generate_fallback_audio(silent_words)
+                    audio_files.update({text: path for text, path in fallback_files.items() if path})
+                    click.echo(
+                        f"Synthesized audio for {sum(1 for path in fallback_files.values() if path)}"
+                        f"/{len(silent_words)} words without a recording"
+                    )
 
-                anki_card = pleco_to_anki(entry, anki_parser, pregenerated_result=field_result)
+                # Normalize before the files are placed in the media folder
+                if normalize_audio:
+                    report = audio_generator.normalize_audio()
+                    click.echo(
+                        f"Normalized {report.normalized} recordings ({report.failed} failed, "
+                        f"{report.skipped} normalized before)"
+                    )
+
+                # Compact variants replace the originals on the cards and in the media folder
+                if audio_format:
+                    variants, transcode_report = audio_generator.transcode_audio(
+                        [path for path in audio_files.values() if path], audio_format
+                    )
+                    audio_files = {
+                        text: variants.get(path, path) if path else None for text, path in audio_files.items()
+                    }
+                    click.echo(
+                        f"Transcoded {transcode_report.transcoded} recordings to {audio_format} "
+                        f"({transcode_report.reused} reused, {transcode_report.failed} failed), "
+                        f"saving {transcode_report.bytes_saved / 1024:.1f} KB of media"
+                    )
+            else:
+                built_cards = build_cards()
+
+            for i, (anki_card, token_usage) in enumerate(built_cards, 1):
+                # Track usage statistics
+                if token_usage:
+                    total_tokens += token_usage.total_tokens
+                    total_cost += token_usage.cost_usd
+                    gpt_calls += 1
 
-                # Generate audio if requested and not in dry-run mode and not skipped
+                # Attach audio if requested and not in dry-run mode and not skipped
                 if audio_generator and not dry_run and not anki_card.nohearing:
-                    try:
+                    audio_file = audio_files.get(anki_card.simplified)
+                    if audio_file:
+                        anki_card.pronunciation = audio_file
                         if verbose:
-                            click.echo(f"    Generating audio for '{anki_card.simplified}'...")
-
-                        audio_file = audio_generator.generate_audio(anki_card.simplified)
-                        if audio_file:
-                            anki_card.pronunciation = audio_file
-                            if verbose:
-                                click.echo(f"    Audio saved to: {audio_file}")
-
-                            # Copy to destination directory if specified
-                            if audio_dest_dir:
-                                try:
-                                    audio_filename = Path(audio_file).name
-                                    dest_path = Path(audio_dest_dir) / audio_filename
-                                    shutil.copy2(audio_file, dest_path)
-                                    if verbose:
-                                        click.echo(f"    Audio copied to: {dest_path}")
-                                except Exception as copy_error:
-                                    click.echo(
-                                        click.style(
-                                            f"    Warning: Failed to copy audio to destination: {copy_error}",
-                                            fg="yellow",
-                                        )
-                                    )
-                        elif verbose:
-                            click.echo(f"    No audio generated for '{anki_card.simplified}'")
+                            click.echo(f"    Audio saved to: {audio_file}")
 
-                    except Exception as e:
-                        if verbose:
-                            click.echo(f"    Audio generation failed for '{anki_card.simplified}': {e}")
+                        # Place in destination directory if specified
+                        if audio_dest_dir:
+                            try:
+                                audio_filename = Path(audio_file).name
+                                dest_path = Path(audio_dest_dir) / audio_filename
+                                placed_with = place_file(Path(audio_file), dest_path, audio_placement)
+                                if verbose:
+                                    click.echo(f"    Audio placed at: {dest_path} ({placed_with})")
+                            except Exception as copy_error:
+                                click.echo(
+                                    click.style(
+                                        f"    Warning: Failed to copy audio to destination: {copy_error}",
+                                        fg="yellow",
+                                    )
+                                )
+                    elif verbose:
+                        click.echo(f"    No audio generated for '{anki_card.simplified}'")
 
                 anki_cards.append(anki_card)
 
@@ -587,15 +722,23 @@ def convert(
 
                 traceback.print_exc()
             raise click.Abort()
+        finally:
+            if audio_generator:
+                audio_generator.close()
     else:
         click.echo("Anki Pleco Importer")
         click.echo("Usage: anki-pleco-importer <tsv_file>")
         click.echo("\nOptions:")
         click.echo("  --audio                 Generate pronunciation audio files")
         click.echo("  --audio-providers TEXT  Audio provider (default: forvo)")
+        click.echo("  --audio-fallback TEXT   Provider for words left without audio, e.g. local (espeak-ng)")
+        click.echo("  --audio-hedge           Ask the next provider too when one is slow")
         click.echo("  --audio-config PATH     Audio configuration JSON file (default: audio-config.json)")
         click.echo("  --audio-cache-dir PATH  Audio cache directory (default: audio_cache)")
         click.echo("  --audio-dest-dir PATH   Directory to copy selected audio files to")
+        click.echo("  --audio-placement TEXT  hardlink, reflink, symlink or copy (default: hardlink)")
+        click.echo("  --normalize-audio       Normalize the loudness of new audio (needs ffmpeg)")
+        click.echo("  --audio-format TEXT     Transcode audio to opus or mp3-48k (needs ffmpeg)")
         click.echo("  --dry-run              Show what would be done without making changes")
         click.echo("  --verbose, -v          Enable verbose output")
         click.echo("\nEnvironment variables:")
@@ -955,6 +1098,85 @@ def missing_hsk(anki_file: Path, count: int, max_level: int, verbose: bool) -> N
         raise click.Abort()
 
 
+def _configure_analysis_logging(verbose: bool) -> None:
+    """Show analyzer progress logs and silence noisy HTTP client loggers."""
+    import logging
+
+    # Force configure logging by clearing existing handlers first
+    for handler in logging.root.handlers[:]:
+        logging.root.removeHandler(handler)
+
+    # Configure logging with appropriate level
+    if verbose:
+        logging.basicConfig(level=logging.DEBUG, format="%(levelname)s: %(message)s")
+    else:
+        logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+    # Ensure all loggers are at the right level
+    logging.getLogger().setLevel(logging.DEBUG if verbose else logging.INFO)
+    epub_logger = logging.getLogger("anki_pleco_importer.epub_analyzer")
+    epub_logger.setLevel(logging.DEBUG if verbose else logging.INFO)
+
+    # Silence noisy Azure SDK loggers
+    logging.getLogger("azure.core.pipeline.policies.http_logging_policy").setLevel(logging.WARNING)
+    logging.getLogger("azure.core.pipeline.policies").setLevel(logging.WARNING)
+    logging.getLogger("azure.core").setLevel(logging.WARNING)
+    logging.getLogger("urllib3").setLevel(logging.WARNING)
+    logging.getLogger("requests").setLevel(logging.WARNING)
+
+
+def _load_known_words(
+    anki_file: Path, proper_names_file: Optional[Path], known_words_file: Optional[Path]
+) -> Tuple[Set[str], Set[str]]:
+    """
+    Load the words of the Anki collection plus optional proper names and known words files.
+
+    Returns:
+        Tuple of (all known words, proper names)
+    """
+    # Load Anki collection
+    click.echo("Loading Anki collection...")
+    anki_parser = AnkiExportParser()
+    cards = anki_parser.parse_file(anki_file)
+
+    # Get all words from Anki cards
+    anki_words = set()
+    for card in cards:
+        clean_chars = card.get_clean_characters()
+        if clean_chars:
+            anki_words.add(clean_chars)
+
+    click.echo(f"Loaded {len(anki_words)} words from Anki collection")
+
+    # Load proper names file if provided
+    proper_names = set()
+    if proper_names_file:
+        click.echo(f"Loading proper names from {proper_names_file}...")
+        try:
+            with open(proper_names_file, "r", encoding="utf-8") as f:
+                proper_names = {line.strip() for line in f if line.strip()}
+            click.echo(f"Loaded {len(proper_names)} proper names")
+            # Add proper names to known words
+            anki_words.update(proper_names)
+        except Exception as e:
+            click.echo(f"Warning: Failed to load proper names file: {e}")
+
+    # Load additional known words file if provided
+    additional_known = set()
+    if known_words_file:
+        click.echo(f"Loading additional known words from {known_words_file}...")
+        try:
+            with open(known_words_file, "r", encoding="utf-8") as f:
+                additional_known = {line.strip() for line in f if line.strip()}
+            click.echo(f"Loaded {len(additional_known)} additional known words")
+            # Add to known words
+            anki_words.update(additional_known)
+        except Exception as e:
+            click.echo(f"Warning: Failed to load additional known words file: {e}")
+
+    return anki_words, proper_names
+
+
 @cli.command()
 @click.argument("epub_file", type=click.Path(exists=True, path_type=Path))
 @click.argument("anki_file", type=click.Path(exists=True, path_type=Path))
@@ -986,6 +1208,34 @@ def missing_hsk(anki_file: Path, count: int, max_level: int, verbose: bool) -> N
     type=click.Path(exists=True, path_type=Path),
     help="File containing additional words to treat as known (one per line)",
 )
+@click.option(
+    "--segmenter",
+    type=click.Choice(["azure", "local", "ngram"]),
+    default="azure",
+    help="Vocabulary extraction: Azure key phrases, the built-in offline word segmenter, "
+    "or word-like n-grams of the book itself (default: azure)",
+)
+@click.option(
+    "--workers",
+    default=1,
+    help="Number of processes for the local segmenter, chapters are split across them (default: 1)",
+)
+@click.option(
+    "--coverage-curve",
+    type=click.Path(path_type=Path),
+    help="Write the coverage curve (words learned vs. text coverage) to this CSV file",
+)
+@click.option(
+    "--examples",
+    "example_count",
+    default=0,
+    help="Show the K shortest book sentences containing each top unknown word (default: 0)",
+)
+@click.option(
+    "--examples-output",
+    type=click.Path(path_type=Path),
+    help="Write the example sentences, formatted for the card examples field, to this CSV file",
+)
 def analyze_epub(
     epub_file: Path,
     anki_file: Path,
@@ -995,80 +1245,26 @@ def analyze_epub(
     verbose: bool,
     proper_names_file: Optional[Path],
     known_words_file: Optional[Path],
+    segmenter: str,
+    workers: int,
+    coverage_curve: Optional[Path],
+    example_count: int,
+    examples_output: Optional[Path],
 ) -> None:
-    """Analyze Chinese vocabulary in an EPUB file against your Anki collection."""
-
-    # Configure logging level
-    import logging
-
-    # Force configure logging by clearing existing handlers first
-    for handler in logging.root.handlers[:]:
-        logging.root.removeHandler(handler)
-
-    # Configure logging with appropriate level
-    if verbose:
-        logging.basicConfig(level=logging.DEBUG, format="%(levelname)s: %(message)s")
-    else:
-        logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    """Analyze Chinese vocabulary in an EPUB, text (.txt) or subtitle (.srt, .ass) file against your Anki collection."""
 
-    # Ensure all loggers are at the right level
-    logging.getLogger().setLevel(logging.DEBUG if verbose else logging.INFO)
-    epub_logger = logging.getLogger("anki_pleco_importer.epub_analyzer")
-    epub_logger.setLevel(logging.DEBUG if verbose else logging.INFO)
-
-    # Silence noisy Azure SDK loggers
-    logging.getLogger("azure.core.pipeline.policies.http_logging_policy").setLevel(logging.WARNING)
-    logging.getLogger("azure.core.pipeline.policies").setLevel(logging.WARNING)
-    logging.getLogger("azure.core").setLevel(logging.WARNING)
-    logging.getLogger("urllib3").setLevel(logging.WARNING)
-    logging.getLogger("requests").setLevel(logging.WARNING)
+    _configure_analysis_logging(verbose)
 
     try:
-        # Load Anki collection
-        click.echo("Loading Anki collection...")
-        anki_parser = AnkiExportParser()
-        cards = anki_parser.parse_file(anki_file)
-
-        # Get all words from Anki cards
-        anki_words = set()
-        for card in cards:
-            clean_chars = card.get_clean_characters()
-            if clean_chars:
-                anki_words.add(clean_chars)
-
-        click.echo(f"Loaded {len(anki_words)} words from Anki collection")
-
-        # Load proper names file if provided
-        proper_names = set()
-        if proper_names_file:
-            click.echo(f"Loading proper names from {proper_names_file}...")
-            try:
-                with open(proper_names_file, "r", encoding="utf-8") as f:
-                    proper_names = {line.strip() for line in f if line.strip()}
-                click.echo(f"Loaded {len(proper_names)} proper names")
-                # Add proper names to known words
-                anki_words.update(proper_names)
-            except Exception as e:
-                click.echo(f"Warning: Failed to load proper names file: {e}")
-
-        # Load additional known words file if provided
-        additional_known = set()
-        if known_words_file:
-            click.echo(f"Loading additional known words from {known_words_file}...")
-            try:
-                with open(known_words_file, "r", encoding="utf-8") as f:
-                    additional_known = {line.strip() for line in f if line.strip()}
-                click.echo(f"Loaded {len(additional_known)} additional known words")
-                # Add to known words
-                anki_words.update(additional_known)
-            except Exception as e:
-                click.echo(f"Warning: Failed to load additional known words file: {e}")
+        anki_words, proper_names = _load_known_words(anki_file, proper_names_file, known_words_file)
 
         # Initialize EPUB analyzer
         click.echo("Initializing EPUB analyzer...")
         try:
             hsk_word_lists = HSKWordLists(Path("."))
-            analyzer = ChineseEPUBAnalyzer(hsk_word_lists)
+            analyzer = ChineseEPUBAnalyzer(
+                hsk_word_lists, segmenter=segmenter, workers=workers, user_words=proper_names
+            )
         except ImportError as e:
             click.echo(f"Error: {e}")
             click.echo("Please install required dependencies:")
@@ -1076,18 +1272,40 @@ def analyze_epub(
             raise click.Abort()
 
         # Analyze EPUB
-        click.echo(f"Analyzing EPUB file: {epub_file}")
-        analysis = analyzer.analyze_epub(
-            epub_file,
-            anki_words,
-            min_frequency=min_frequency,
-            target_coverages=list(target_coverage),
-            top_unknown_count=top_unknown,
-        )
+        click.echo(f"Analyzing {epub_file}")
+        with analyzer:
+            analysis = analyzer.analyze_epub(
+                epub_file,
+                anki_words,
+                min_frequency=min_frequency,
+                target_coverages=list(target_coverage),
+                top_unknown_count=top_unknown,
+                example_count=example_count,
+            )
 
         # Generate comprehensive report
         _generate_epub_analysis_report(analysis, verbose, list(target_coverage))
 
+        if coverage_curve:
+            curve_df = pd.DataFrame(analysis.coverage_curve, columns=["words_learned", "coverage"])
+            curve_df.to_csv(coverage_curve, index=False, float_format="%.2f")
+            click.echo(f"Coverage curve written to {coverage_curve}")
+
+        if examples_output and analysis.examples:
+            examples_df = pd.DataFrame(
+                [
+                    {
+                        "word": word,
+                        "pinyin": pinyin,
+                        "frequency": freq,
+                        "examples": format_examples_with_semantic_markup(analysis.examples.get(word)) or "",
+                    }
+                    for word, freq, pinyin, _ in analysis.high_frequency_unknown
+                ]
+            )
+            examples_df.to_csv(examples_output, index=False)
+            click.echo(f"Example sentences written to {examples_output}")
+
     except Exception as e:
         click.echo(f"Error analyzing EPUB: {e}", err=True)
         if verbose:
@@ -1097,6 +1315,12 @@ def analyze_epub(
         raise click.Abort()
 
 
+def _pad_display(text: str, width: int) -> str:
+    """Pad text to a terminal width, counting CJK characters as two columns."""
+    display_width = sum(2 if char >= "\u2e80" else 1 for char in text)
+    return text + " " * max(0, width - display_width)
+
+
 def _generate_epub_analysis_report(analysis: BookAnalysis, verbose: bool, target_coverages: List[int]) -> None:
     """Generate and display comprehensive EPUB analysis report."""
 
@@ -1119,6 +1343,14 @@ def _generate_epub_analysis_report(analysis: BookAnalysis, verbose: bool, target
         diversity = analysis.stats.unique_words / analysis.stats.total_words
         click.echo(f"Vocabulary diversity: {diversity:.3f}")
 
+    cache_lookups = analysis.cache_stats.hits + analysis.cache_stats.misses
+    if cache_lookups > 0:
+        hit_rate = analysis.cache_stats.hits / cache_lookups * 100
+        click.echo(
+            f"Azure cache: {analysis.cache_stats.hits:,} hits, {analysis.cache_stats.misses:,} misses "
+            f"({hit_rate:.1f}% of chunks served from cache)"
+        )
+
     # HSK Level Distribution
     click.echo(f"\n{click.style('📊 HSK Level Distribution', fg='green', bold=True)}")
     click.echo("-" * 60)
@@ -1175,6 +1407,19 @@ def _generate_epub_analysis_report(analysis: BookAnalysis, verbose: bool, target
     for target_pct, target in analysis.coverage_targets.items():
         click.echo(f"{target_pct:>7}% {target.words_needed:>14,}")
 
+    # Coverage curve (verbose mode), sampled every 5%
+    if verbose and analysis.coverage_curve:
+        click.echo(f"\n{click.style('📈 Coverage Curve', fg='magenta', bold=True)}")
+        click.echo("-" * 30)
+        click.echo(f"{'Words':>8} {'Coverage':>15}")
+        click.echo("-" * 30)
+
+        next_mark = 0.0
+        for point in analysis.coverage_curve:
+            if point.coverage >= next_mark or point is analysis.coverage_curve[-1]:
+                click.echo(f"{point.words_learned:>8,} {point.coverage:>14.1f}%")
+                next_mark = (point.coverage // 5 + 1) * 5
+
     # High-Frequency Unknown Words
     if analysis.high_frequency_unknown:
         click.echo(f"\n{click.style('🔥 High-Frequency Unknown Words', fg='red', bold=True)}")
@@ -1202,6 +1447,9 @@ def _generate_epub_analysis_report(analysis: BookAnalysis, verbose: bool, target
             formatted_line = formatted_line.replace(hsk_text, colored_hsk)
             click.echo(formatted_line)
 
+            for sentence in analysis.examples.get(word, []):
+                click.echo(f"{'':>8}· {sentence}")
+
         # Show count if truncated
         if len(analysis.high_frequency_unknown) > 20:
             remaining = len(analysis.high_frequency_unknown) - 20
@@ -1249,6 +1497,21 @@ def _generate_epub_analysis_report(analysis: BookAnalysis, verbose: bool, target
                     remaining = len(target.priority_words) - 50
                     click.echo(f"  ... and {remaining} more words")
 
+    # Per-chapter statistics (verbose mode)
+    if verbose and analysis.chapter_stats:
+        click.echo(f"\n{click.style('📑 Chapter Statistics', fg='cyan', bold=True)}")
+        click.echo("-" * 80)
+        click.echo(f"{'#':>3} {'Chapter':<30} {'Chars':>8} {'Words':>7} {'Unique':>7} {'Unknown':>8} {'Coverage':>9}")
+        click.echo("-" * 80)
+
+        for index, chapter in enumerate(analysis.chapter_stats, 1):
+            chapter_title = chapter.title if len(chapter.title) <= 15 else chapter.title[:14] + "…"
+            click.echo(
+                f"{index:>3} {_pad_display(chapter_title, 30)} {chapter.chinese_characters:>8,} "
+                f"{chapter.total_words:>7,} {chapter.unique_words:>7,} {chapter.unknown_words:>8,} "
+                f"{chapter.coverage:>8.1f}%"
+            )
+
     # HSK Learning Targets
     if analysis.hsk_learning_targets:
         click.echo(f"\n{click.style('📚 HSK Learning Targets', fg='blue', bold=True)}")
@@ -1280,6 +1543,429 @@ def _generate_epub_analysis_report(analysis: BookAnalysis, verbose: bool, target
     click.echo()
 
 
+@cli.command()
+@click.argument("library_dir", type=click.Path(exists=True, file_okay=False, path_type=Path))
+@click.argument("anki_file", type=click.Path(exists=True, path_type=Path))
+@click.option(
+    "--corpus-db",
+    type=click.Path(path_type=Path),
+    default=DEFAULT_CORPUS_DB,
+    show_default=True,
+    help="SQLite database storing the word frequencies of analyzed books",
+)
+@click.option(
+    "--segmenter",
+    type=click.Choice(["azure", "local", "ngram"]),
+    default="azure",
+    help="Vocabulary extraction: Azure key phrases, the built-in offline word segmenter, "
+    "or word-like n-grams of the book itself (default: azure)",
+)
+@click.option("--workers", default=4, help="Number of books analyzed in parallel processes (default: 4)")
+@click.option(
+    "--sort-by",
+    type=click.Choice(["coverage", "95", "98"]),
+    default="coverage",
+    help="Rank by current coverage or by words needed for 95%/98% coverage (default: coverage)",
+)
+@click.option("--reanalyze", is_flag=True, help="Extract vocabulary again even for unchanged books")
+@click.option(
+    "--proper-names-file",
+    type=click.Path(exists=True, path_type=Path),
+    help="File containing proper names to treat as known (one per line)",
+)
+@click.option(
+    "--known-words-file",
+    type=click.Path(exists=True, path_type=Path),
+    help="File containing additional words to treat as known (one per line)",
+)
+@click.option("--verbose", "-v", is_flag=True, help="Show detailed progress")
+def analyze_library(
+    library_dir: Path,
+    anki_file: Path,
+    corpus_db: Path,
+    segmenter: str,
+    workers: int,
+    sort_by: str,
+    reanalyze: bool,
+    proper_names_file: Optional[Path],
+    known_words_file: Optional[Path],
+    verbose: bool,
+) -> None:
+    """Rank the books (EPUB, text or subtitle files) in a directory by readability with your Anki collection."""
+    _configure_analysis_logging(verbose)
+
+    corpus = None
+    try:
+        anki_words, proper_names = _load_known_words(anki_file, proper_names_file, known_words_file)
+
+        book_paths = find_books(library_dir)
+        if not book_paths:
+            click.echo(f"No EPUB, text or subtitle files found in {library_dir}")
+            return
+
+        corpus = CorpusDatabase(corpus_db)
+        current, stale = split_current_books(corpus, book_paths, segmenter, reanalyze)
+        click.echo(f"Found {len(book_paths)} books: {len(current)} already analyzed, {len(stale)} to analyze")
+
+        hsk_word_lists = HSKWordLists(Path("."))
+        if stale:
+            processes = max(1, min(workers, len(stale)))
+            click.echo(f"Analyzing {len(stale)} books with {processes} processes...")
+            results = analyze_books_in_pool(
+                stale, hsk_word_lists, processes, segmenter=segmenter, user_words=proper_names
+            )
+            for index, result in enumerate(results, 1):
+                if result.error:
+                    click.echo(f"  [{index}/{len(stale)}] ❌ {result.path.name}: {result.error}", err=True)
+                    continue
+                corpus.store_book(result.path, result.title, segmenter, result.word_frequencies)
+                click.echo(f"  [{index}/{len(stale)}] ✅ {result.title} ({len(result.word_frequencies):,} words)")
+
+        # Coverage is always recomputed from the stored frequencies
+        books = [book for book in (corpus.get_book(path) for path in book_paths) if book is not None]
+        analyzer = ChineseEPUBAnalyzer(hsk_word_lists, segmenter="local")
+        ranking = rank_books(corpus, books, anki_words, analyzer, targets=[95, 98], sort_by=sort_by)
+
+        click.echo(f"\n{click.style('📚 Library Readability', fg='cyan', bold=True)}")
+        click.echo("-" * 80)
+        click.echo(f"{'#':>3} {'Title':<30} {'Words':>9} {'Unique':>7} {'Coverage':>9} {'To 95%':>7} {'To 98%':>7}")
+        click.echo("-" * 80)
+        for rank, readability in enumerate(ranking, 1):
+            book = readability.book
+            title = book.title if len(book.title) <= 15 else book.title[:14] + "…"
+            click.echo(
+                f"{rank:>3} {_pad_display(title, 30)} {book.total_words:>9,} {book.unique_words:>7,} "
+                f"{readability.coverage:>8.1f}% "
+                f"{readability.words_needed[95]:>7,} {readability.words_needed[98]:>7,}"
+            )
+        click.echo()
+
+    except Exception as e:
+        click.echo(f"Error analyzing library: {e}", err=True)
+        if verbose:
+            import traceback
+
+            traceback.print_exc()
+        raise click.Abort()
+    finally:
+        if corpus:
+            corpus.close()
+
+
+@cli.command()
+@click.argument("anki_file", type=click.Path(exists=True, path_type=Path))
+@click.option(
+    "--corpus-db",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    default=DEFAULT_CORPUS_DB,
+    show_default=True,
+    help="Corpus database written by analyze-library",
+)
+@click.option("--count", "-n", default=100, help="Number of words to plan (default: 100)")
+@click.option(
+    "--target-coverage",
+    default=98.0,
+    help="Coverage percentage beyond which a book no longer needs words (default: 98)",
+)
+@click.option(
+    "--book",
+    "book_filters",
+    multiple=True,
+    help="Only plan for books whose title or file name contains this text (repeatable)",
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(path_type=Path),
+    help="Write the plan with per-book coverage gains to this CSV file",
+)
+@click.option(
+    "--proper-names-file",
+    type=click.Path(exists=True, path_type=Path),
+    help="File containing proper names to treat as known (one per line)",
+)
+@click.option(
+    "--known-words-file",
+    type=click.Path(exists=True, path_type=Path),
+    help="File containing additional words to treat as known (one per line)",
+)
+@click.option("--verbose", "-v", is_flag=True, help="Show the coverage each word adds per book")
+def plan_learning(
+    anki_file: Path,
+    corpus_db: Path,
+    count: int,
+    target_coverage: float,
+    book_filters: Tuple[str, ...],
+    output: Optional[Path],
+    proper_names_file: Optional[Path],
+    known_words_file: Optional[Path],
+    verbose: bool,
+) -> None:
+    """Plan the words to learn next for the most coverage across the books of analyze-library."""
+    _configure_analysis_logging(verbose)
+
+    corpus = None
+    try:
+        anki_words, _ = _load_known_words(anki_file, proper_names_file, known_words_file)
+
+        corpus = CorpusDatabase(corpus_db)
+        books = [
+            book
+            for book in corpus.get_books()
+            if not book_filters or any(text in book.title or text in Path(book.path).name for text in book_filters)
+        ]
+        if not books:
+            click.echo("No matching books in the corpus database, run analyze-library first")
+            return
+
+        # Key books by title, adding the file name where titles repeat
+        title_counts = Counter(book.title for book in books)
+        book_frequencies = {
+            (book.title if title_counts[book.title] == 1 else f"{book.title} ({Path(book.path).name})"): (
+                corpus.get_word_frequencies(book.book_id)
+            )
+            for book in books
+        }
+
+        matrix = planner.WordBookMatrix(book_frequencies, anki_words)
+        plan = planner.plan_learning(matrix, count, target_coverage)
+        analyzer = ChineseEPUBAnalyzer(HSKWordLists(Path(".")), segmenter="local")
+
+        click.echo(f"\n{click.style('🎯 Learning Plan', fg='cyan', bold=True)}")
+        click.echo(f"({len(plan.words)} words for {len(book_frequencies)} books, books capped at {target_coverage:g}%)")
+        click.echo("-" * 80)
+        click.echo(f"{'#':>4} {'Word':<8} {'Pinyin':<18} {'HSK':>4} {'Gain':>8} {'Books':>6}")
+        click.echo("-" * 80)
+        for index, planned in enumerate(plan.words, 1):
+            hsk_level = analyzer.get_word_hsk_level(planned.word)
+            click.echo(
+                f"{index:>4} {_pad_display(planned.word, 8)} {analyzer.get_word_pinyin(planned.word):<18} "
+                f"{hsk_level or '-':>4} {planned.gain:>7.2f}% {len(planned.book_gains):>6}"
+            )
+            if verbose:
+                top_gains = sorted(planned.book_gains.items(), key=lambda x: -x[1])[:3]
+                click.echo("       " + ", ".join(f"{book} +{gain:.2f}%" for book, gain in top_gains))
+
+        click.echo(f"\n{click.style('📚 Coverage by Book', fg='cyan', bold=True)}")
+        click.echo("-" * 80)
+        for book_name, initial in plan.initial_coverage.items():
+            title = book_name if len(book_name) <= 20 else book_name[:19] + "…"
+            click.echo(f"  {_pad_display(title, 40)} {initial:>6.1f}% → {plan.final_coverage[book_name]:>6.1f}%")
+        click.echo()
+
+        if output:
+            rows = [{"word": planned.word, "gain": planned.gain, **planned.book_gains} for planned in plan.words]
+            plan_df = pd.DataFrame(rows, columns=["word", "gain", *book_frequencies]).fillna(0)
+            plan_df.to_csv(output, index=False, float_format="%.4f")
+            click.echo(f"Learning plan written to {output}")
+
+    except Exception as e:
+        click.echo(f"Error planning learning: {e}", err=True)
+        if verbose:
+            import traceback
+
+            traceback.print_exc()
+        raise click.Abort()
+    finally:
+        if corpus:
+            corpus.close()
+
+
+@cli.command()
+@click.argument("epub_file", type=click.Path(exists=True, path_type=Path))
+@click.argument("anki_file", type=click.Path(exists=True, path_type=Path))
+@click.option(
+    "--unknown",
+    "unknown_count",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of unknown words a sentence must contain (default: 1, i+1 sentences)",
+)
+@click.option("--per-word", default=3, help="Sentences shown for each unknown word (default: 3)")
+@click.option("--limit", default=50, help="Number of unknown words to show sentences for (default: 50)")
+@click.option("--min-length", default=6, help="Minimum sentence length in characters (default: 6)")
+@click.option("--max-length", default=40, help="Maximum sentence length in characters (default: 40)")
+@click.option(
+    "--min-word-length",
+    default=1,
+    help="Ignore shorter words, e.g. 2 to skip single characters (default: 1)",
+)
+@click.option(
+    "--proper-names-file",
+    type=click.Path(exists=True, path_type=Path),
+    help="File containing proper names to treat as known (one per line)",
+)
+@click.option(
+    "--known-words-file",
+    type=click.Path(exists=True, path_type=Path),
+    help="File containing additional words to treat as known (one per line)",
+)
+@click.option("--output", "-o", type=click.Path(path_type=Path), help="Write every matching sentence to this CSV file")
+@click.option("--verbose", "-v", is_flag=True, help="Enable verbose output")
+def find_sentences(
+    epub_file: Path,
+    anki_file: Path,
+    unknown_count: int,
+    per_word: int,
+    limit: int,
+    min_length: int,
+    max_length: int,
+    min_word_length: int,
+    proper_names_file: Optional[Path],
+    known_words_file: Optional[Path],
+    output: Optional[Path],
+    verbose: bool,
+) -> None:
+    """Find sentences of a book or subtitle file with exactly one (or N) words not in your Anki collection."""
+    _configure_analysis_logging(verbose)
+
+    index = None
+    try:
+        anki_words, proper_names = _load_known_words(anki_file, proper_names_file, known_words_file)
+        analyzer = ChineseEPUBAnalyzer(HSKWordLists(Path(".")), segmenter="local", user_words=proper_names)
+
+        # The index is segmented once per book; later runs only apply deck changes
+        index = UnknownWordIndex(SentenceIndex.path_for(analyzer.cache_dir / "unknown_words", epub_file))
+        names_digest = hashlib.sha256("\n".join(sorted(proper_names)).encode("utf-8")).hexdigest()[:16]
+        settings = f"min_word_length={min_word_length};names={names_digest}"
+        if not index.is_current(epub_file, settings):
+            click.echo(f"Segmenting sentences of {epub_file}...")
+            index.build(
+                analyzer.iter_chapters(epub_file),
+                lambda sentence: [
+                    word for word in analyzer.word_segmenter.cut(sentence) if len(word) >= min_word_length
+                ],
+                epub_file,
+                settings,
+            )
+        index.update_known_words(anki_words)
+
+        # Group sentences by their unknown words, most useful words first
+        groups: Dict[Tuple[str, ...], List[str]] = {}
+        for match in index.find_sentences(unknown_count, min_length, max_length):
+            groups.setdefault(tuple(match.unknown_words), []).append(match.text)
+        ranked = sorted(groups.items(), key=lambda item: -len(item[1]))
+
+        sentence_total = sum(len(sentences) for sentences in groups.values())
+        click.echo(f"\n{click.style(f'🔎 Sentences with {unknown_count} Unknown Word(s)', fg='cyan', bold=True)}")
+        click.echo(f"({sentence_total:,} sentences for {len(groups):,} unknown word combinations)")
+        click.echo("-" * 80)
+        for words, sentences in ranked[:limit]:
+            pinyin = " / ".join(analyzer.get_word_pinyin(word) for word in words)
+            click.echo(f"\n{click.style('、'.join(words), bold=True)} {pinyin} ({len(sentences)} sentences)")
+            for sentence in sentences[:per_word]:
+                for word in words:
+                    sentence = sentence.replace(word, click.style(word, fg="red", bold=True))
+                click.echo(f"  · {sentence}")
+        if len(ranked) > limit:
+            click.echo(f"\n  ... and {len(ranked) - limit} more (use --limit or --output for all)")
+        click.echo()
+
+        if output:
+            rows = [
+                {
+                    "unknown_words": "、".join(words),
+                    "pinyin": " / ".join(analyzer.get_word_pinyin(word) for word in words),
+                    "sentence": sentence,
+                }
+                for words, sentences in ranked
+                for sentence in sentences
+            ]
+            pd.DataFrame(rows, columns=["unknown_words", "pinyin", "sentence"]).to_csv(output, index=False)
+            click.echo(f"Sentences written to {output}")
+
+    except Exception as e:
+        click.echo(f"Error finding sentences: {e}", err=True)
+        if verbose:
+            import traceback
+
+            traceback.print_exc()
+        raise click.Abort()
+    finally:
+        if index:
+            index.close()
+
+
+@cli.command()
+@click.argument("epub_file", type=click.Path(exists=True, path_type=Path))
+@click.option("--min-frequency", default=3, help="Minimum number of occurrences (default: 3)")
+@click.option("--min-length", type=click.IntRange(1, MAX_NGRAM_LENGTH), default=2, help="Shortest n-gram (default: 2)")
+@click.option("--max-length", type=click.IntRange(1, MAX_NGRAM_LENGTH), default=4, help="Longest n-gram (default: 4)")
+@click.option(
+    "--word-like/--all",
+    default=False,
+    help="Keep only word-like n-grams (varied neighbours, cohesive characters) or list every n-gram (default: all)",
+)
+@click.option(
+    "--min-entropy",
+    default=DEFAULT_MIN_ENTROPY,
+    show_default=True,
+    help="Minimum left and right branching entropy for --word-like",
+)
+@click.option(
+    "--min-cohesion",
+    default=DEFAULT_MIN_COHESION,
+    show_default=True,
+    help="Minimum cohesion (pointwise mutual information of the weakest split) for --word-like",
+)
+@click.option("--limit", default=50, help="Number of n-grams to show (default: 50)")
+@click.option("--output", "-o", type=click.Path(path_type=Path), help="Write every n-gram with its scores to CSV")
+@click.option("--verbose", "-v", is_flag=True, help="Enable verbose output")
+def count_ngrams(
+    epub_file: Path,
+    min_frequency: int,
+    min_length: int,
+    max_length: int,
+    word_like: bool,
+    min_entropy: float,
+    min_cohesion: float,
+    limit: int,
+    output: Optional[Path],
+    verbose: bool,
+) -> None:
+    """Count the character n-grams of a book or subtitle file offline, optionally keeping only word-like ones."""
+    _configure_analysis_logging(verbose)
+
+    try:
+        analyzer = ChineseEPUBAnalyzer(HSKWordLists(Path(".")), segmenter="ngram")
+        counter = NgramCounter(min_length, max_length)
+        for chapter in analyzer.iter_chapters(epub_file):
+            counter.add_text(chapter.text)
+
+        scores = counter.score(min_frequency)
+        if word_like:
+            kept = select_words(scores, min_entropy, min_cohesion)
+            scores = [score for score in scores if score.ngram in kept]
+
+        click.echo(f"\n{click.style('🔤 Character N-grams', fg='cyan', bold=True)}")
+        click.echo(
+            f"({len(scores):,} {'word-like ' if word_like else ''}n-grams occurring {min_frequency}+ times "
+            f"in {counter.character_count:,} Chinese characters)"
+        )
+        click.echo("-" * 80)
+        click.echo(f"{'N-gram':<10} {'Freq':>8} {'Left H':>8} {'Right H':>8} {'Cohesion':>9}")
+        for score in scores[:limit]:
+            click.echo(
+                f"{_pad_display(score.ngram, 10)} {score.frequency:>8,} {score.left_entropy:>8.2f} "
+                f"{score.right_entropy:>8.2f} {score.cohesion:>9.2f}"
+            )
+        if len(scores) > limit:
+            click.echo(f"  ... and {len(scores) - limit:,} more (use --limit or --output for all)")
+        click.echo()
+
+        if output:
+            pd.DataFrame(scores, columns=NgramScore._fields).to_csv(output, index=False)
+            click.echo(f"N-grams written to {output}")
+
+    except Exception as e:
+        click.echo(f"Error counting n-grams: {e}", err=True)
+        if verbose:
+            import traceback
+
+            traceback.print_exc()
+        raise click.Abort()
+
+
 @cli.command()
 @click.argument("anki_file", type=click.Path(exists=True, path_type=Path))
 @click.option("--max-suggestions", default=10, help="Maximum number of improvement suggestions to show (default: 10)")
@@ -2,15 +2,16 @@
 
 import re
 import logging
-import json
-import hashlib
 import os
-import time
-from collections import Counter
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Set, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Set, NamedTuple, Optional, Sequence, Tuple, Union
 import math
 
+import numpy as np
+
 try:
     import ebooklib
     from ebooklib import epub
@@ -22,6 +23,7 @@ except ImportError:
 try:
     from azure.ai.textanalytics import TextAnalyticsClient
     from azure.core.credentials import AzureKeyCredential
+    from azure.core.exceptions import HttpResponseError, ServiceRequestError
 
     AZURE_AVAILABLE = True
 except ImportError:
@@ -34,10 +36,46 @@ try:
 except ImportError:
     PYPINYIN_AVAILABLE = False
 
+from .chunking import iter_text_chunks
 from .hsk import HSKWordLists
+from .html_text import extract_text, extract_texts_in_pool
+from .http_client import RateLimitedClient
+from .key_phrase_cache import CacheStats, KeyPhraseCache
+from .ngrams import NgramCounter, select_words
+from .segmenter import ChineseSegmenter, count_tokens_in_pool
+from .sentence_index import SentenceIndex
+from .sources import Chapter, is_epub, iter_file_chapters
 
 logger = logging.getLogger(__name__)
 
+# Available vocabulary extraction backends
+SEGMENTERS = ("azure", "local", "ngram")
+
+# Where the Azure key phrase cache and sentence indexes are kept unless a cache directory is given
+DEFAULT_CACHE_DIR = Path.home() / ".anki_pleco_importer" / "azure_cache"
+KEY_PHRASE_CACHE_FILENAME = "key_phrases.sqlite3"
+
+
+class ChapterCounts(NamedTuple):
+    """Phrase counts for a single chapter, without the chapter text."""
+
+    chapter_id: str
+    title: str
+    chinese_characters: int
+    counts: Counter
+
+
+class ChapterStats(NamedTuple):
+    """Vocabulary statistics for a single chapter."""
+
+    chapter_id: str
+    title: str
+    chinese_characters: int
+    total_words: int
+    unique_words: int
+    unknown_words: int  # unique words in this chapter not in the Anki collection
+    coverage: float  # percentage of word occurrences covered by known words
+
 
 class VocabularyStats(NamedTuple):
     """Statistics for vocabulary analysis."""
@@ -58,20 +96,53 @@ class HSKDistribution(NamedTuple):
     coverage_percentage: float
 
 
+class LazyWordList(Sequence):
+    """
+    Read-only list of word tuples whose details are looked up on access.
+
+    Pinyin and HSK lookups are comparatively slow, and reports only display
+    the first few words of long lists, so details are computed for the items
+    actually read.
+    """
+
+    def __init__(self, words: List[Tuple[str, int]], details: Callable[[str, int], Tuple[Any, ...]]):
+        self._words = words
+        self._details = details
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self._details(word, freq) for word, freq in self._words[index]]
+        word, freq = self._words[index]
+        return self._details(word, freq)
+
+    def __repr__(self) -> str:
+        return f"LazyWordList({len(self)} words)"
+
+
 class CoverageTarget(NamedTuple):
     """Coverage target calculation results."""
 
     target_percentage: float
     words_needed: int
     current_coverage: float
-    priority_words: List[Tuple[str, int, str, Optional[int]]]  # (word, frequency, pinyin, hsk_level)
+    priority_words: Sequence[Tuple[str, int, str, Optional[int]]]  # (word, frequency, pinyin, hsk_level)
+
+
+class CoveragePoint(NamedTuple):
+    """A point on the coverage curve."""
+
+    words_learned: int  # most frequent unknown words learned
+    coverage: float  # resulting percentage of text covered
 
 
 class HSKLearningTarget(NamedTuple):
     """HSK level learning recommendations."""
 
     level: int
-    unknown_words: List[Tuple[str, int, str]]  # (word, frequency, pinyin) ordered by frequency
+    unknown_words: Sequence[Tuple[str, int, str]]  # (word, frequency, pinyin) ordered by frequency
     potential_coverage_gain: float  # percentage coverage gained if all words learned
     total_word_count: int  # total occurrences of these words in text
 
@@ -87,17 +158,45 @@ class BookAnalysis(NamedTuple):
     unknown_words: Dict[str, int]  # word -> frequency
     high_frequency_unknown: List[Tuple[str, int, str, Optional[int]]]  # (word, frequency, pinyin, hsk_level)
     coverage_targets: Dict[int, CoverageTarget]  # target_percentage -> results
+    coverage_curve: List[CoveragePoint]  # words to learn to pass each whole coverage percentage
     non_hsk_words: Dict[str, int]  # words not in any HSK level -> frequency
     hsk_learning_targets: List[HSKLearningTarget]  # HSK-based learning suggestions
+    chapter_stats: List[ChapterStats]  # per-chapter statistics in reading order
+    cache_stats: CacheStats  # Azure key phrase cache hits and misses for this book
+    examples: Dict[str, List[str]]  # top unknown word -> shortest sentences containing it
+
+
+class _PendingBatch:
+    """Chunks waiting to be sent, or in flight, as one multi-document request."""
+
+    def __init__(self) -> None:
+        self.chunks: List[str] = []
+        self.keys: List[str] = []
+        self.future: Optional["Future[List[Optional[List[str]]]]"] = None
+        self.results: Optional[List[Optional[List[str]]]] = None
+        self.number = 0
 
 
 class ChineseEPUBAnalyzer:
     """Analyzer for Chinese vocabulary in EPUB files."""
 
+    # Service limits for synchronous key phrase extraction requests
+    MAX_DOCUMENTS_PER_REQUEST = 10
+    MAX_DOCUMENT_SIZE = 5120
+    RETRY_BASE_DELAY = 1.0
+    API_VERSION = "2023-04-01"
+    LANGUAGE = "zh-hans"
+
     def __init__(
         self,
         hsk_word_lists: Optional[HSKWordLists] = None,
         cache_dir: Optional[Path] = None,
+        max_concurrent_requests: int = 4,
+        max_retries: int = 5,
+        max_cache_size: int = 256 * 1024 * 1024,
+        segmenter: str = "azure",
+        workers: int = 1,
+        user_words: Optional[Set[str]] = None,
     ):
         """
         Initialize the EPUB analyzer.
@@ -105,19 +204,50 @@ class ChineseEPUBAnalyzer:
         Args:
             hsk_word_lists: HSK word lists for level analysis
             cache_dir: Optional directory for caching Azure API results
+            max_concurrent_requests: Maximum number of Azure requests in flight
+            max_retries: Retries for throttled (429) or failed (5xx) Azure requests
+            max_cache_size: Size in bytes above which old cache entries are evicted
+            segmenter: "azure" for Azure key phrases, "local" for the built-in word segmenter,
+                "ngram" for word-like character n-grams counted in the book itself
+            workers: Number of processes for HTML parsing and local segmentation (chapters are spread across them)
+            user_words: Extra words, such as proper names, the local segmenter keeps whole
         """
         if not EBOOKLIB_AVAILABLE:
             raise ImportError("ebooklib is required for EPUB analysis. " "Install it with: pip install ebooklib")
 
+        if segmenter not in SEGMENTERS:
+            raise ValueError(f"Unknown segmenter: {segmenter} (choose from {', '.join(SEGMENTERS)})")
+
+        self.hsk_word_lists = hsk_word_lists or HSKWordLists()
+        self.chinese_pattern = re.compile(r"[\u4e00-\u9fff]+")
+        self.segmenter = segmenter
+        self.workers = max(1, workers)
+        self.user_words = set(user_words or [])
+        self.max_concurrent_requests = max(1, max_concurrent_requests)
+        self.max_retries = max_retries
+        self.key_phrase_cache: Optional[KeyPhraseCache] = None
+        self._word_segmenter: Optional[ChineseSegmenter] = None
+        self._hsk_levels: Optional[Dict[str, int]] = None
+        self._pinyin_cache: Dict[str, str] = {}
+
+        # Key phrase cache and sentence indexes live here
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+
+        if segmenter == "local":
+            logger.info("Using the built-in word segmenter (no Azure API calls)")
+            return
+
+        if segmenter == "ngram":
+            logger.info("Using n-gram statistics of the book itself (no Azure API calls)")
+            return
+
         if not AZURE_AVAILABLE:
             raise ImportError(
                 "Azure Text Analytics is required for key phrase extraction. "
-                "Install with: pip install azure-ai-textanalytics==5.3.0"
+                "Install with: pip install azure-ai-textanalytics==5.3.0 "
+                "(or use the local segmenter)"
             )
 
-        self.hsk_word_lists = hsk_word_lists or HSKWordLists()
-        self.chinese_pattern = re.compile(r"[\u4e00-\u9fff]+")
-
         # Set up Azure credentials
         try:
             self.endpoint = os.environ["AZURE_LANGUAGE_ENDPOINT"]
@@ -125,97 +255,154 @@ class ChineseEPUBAnalyzer:
         except KeyError:
             raise ValueError("Please set the AZURE_LANGUAGE_ENDPOINT and " "AZURE_LANGUAGE_KEY environment variables.")
 
-        # Initialize Azure Text Analytics client
+        # Initialize Azure Text Analytics client. Retries are handled by
+        # azure_client, which also adapts the requests in flight to throttling.
         self.text_analytics_client = TextAnalyticsClient(
-            endpoint=self.endpoint, credential=AzureKeyCredential(self.key)
+            endpoint=self.endpoint,
+            credential=AzureKeyCredential(self.key),
+            api_version=self.API_VERSION,
+            retry_total=0,
+        )
+        self.azure_client = RateLimitedClient(
+            "azure",
+            max_concurrency=self.max_concurrent_requests,
+            max_retries=self.max_retries,
+            base_delay=self.RETRY_BASE_DELAY,
         )
 
         # Set up cache directory
-        default_cache = Path.home() / ".anki_pleco_importer" / "azure_cache"
-        self.cache_dir = cache_dir or default_cache
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.key_phrase_cache = KeyPhraseCache(self.cache_dir / KEY_PHRASE_CACHE_FILENAME, max_cache_size)
         logger.info(f"Using Azure API cache directory: {self.cache_dir}")
 
-    def extract_text_from_epub(self, epub_path: Path) -> Tuple[str, str]:
-        """
-        Extract text content from EPUB file.
+    @property
+    def word_segmenter(self) -> ChineseSegmenter:
+        """The local word segmenter, loaded on first use."""
+        if self._word_segmenter is None:
+            self._word_segmenter = ChineseSegmenter(user_words=self.user_words)
+        return self._word_segmenter
 
-        Args:
-            epub_path: Path to the EPUB file
+    def close(self) -> None:
+        """Close the key phrase cache, evicting old entries beyond its size limit."""
+        if self.key_phrase_cache is not None:
+            self.key_phrase_cache.close()
+            self.key_phrase_cache = None
 
-        Returns:
-            Tuple of (title, full_text)
-        """
+    def __enter__(self) -> "ChineseEPUBAnalyzer":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        self.close()
+
+    def _read_epub(self, epub_path: Path) -> "epub.EpubBook":
+        """Read an EPUB file, logging failures."""
         try:
-            book = epub.read_epub(str(epub_path))
+            return epub.read_epub(str(epub_path))
+        except Exception as e:
+            logger.error(f"Failed to read EPUB: {e}")
+            raise
 
-            # Get book title
-            title = book.get_metadata("DC", "title")[0][0] if book.get_metadata("DC", "title") else "Unknown"
+    def _get_book_title(self, book: "epub.EpubBook") -> str:
+        """Get the book title from the EPUB metadata."""
+        return book.get_metadata("DC", "title")[0][0] if book.get_metadata("DC", "title") else "Unknown"
 
-            # Extract text from all HTML documents
-            full_text = []
+    def open_source(self, source_path: Path) -> Tuple[str, Union[Path, "epub.EpubBook"]]:
+        """
+        Open a book, text or subtitle file for analysis.
 
-            for item in book.get_items():
-                if item.get_type() == ebooklib.ITEM_DOCUMENT:
-                    content = item.get_content().decode("utf-8", errors="ignore")
+        EPUB files are read once so their chapters can be streamed repeatedly;
+        text and subtitle files are streamed from disk on every pass.
 
-                    # Remove HTML tags and extract plain text
-                    text = self._clean_html(content)
-                    if text.strip():
-                        full_text.append(text)
+        Args:
+            source_path: EPUB, plain text or subtitle file
 
-            combined_text = "\n".join(full_text)
-            logger.info(f"Extracted {len(combined_text)} characters from '{title}'")
+        Returns:
+            Tuple of (title, source to pass to iter_chapters)
+        """
+        if is_epub(source_path):
+            book = self._read_epub(source_path)
+            return self._get_book_title(book), book
+        return source_path.stem, source_path
+
+    def _get_toc_titles(self, book: "epub.EpubBook") -> Dict[str, str]:
+        """Map document file names to their table of contents titles."""
+        titles: Dict[str, str] = {}
+
+        def visit(entries: Iterable) -> None:
+            for entry in entries:
+                if isinstance(entry, tuple):
+                    section, children = entry
+                    href = getattr(section, "href", None)
+                    if href:
+                        titles.setdefault(href.split("#")[0], section.title)
+                    visit(children)
+                elif getattr(entry, "href", None):
+                    titles.setdefault(entry.href.split("#")[0], entry.title)
+
+        visit(book.toc)
+        return titles
+
+    def iter_chapters(self, epub_source: Union[Path, "epub.EpubBook"]) -> Iterator[Chapter]:
+        """
+        Yield the text of an EPUB (or a text or subtitle file) one document at a time.
 
-            return title, combined_text
+        Only the current chapter's text is held in memory, so callers that
+        consume chapters as they arrive never build a copy of the whole book.
+        Documents are cleaned with an HTML parser that skips scripts, styles
+        and the document head; with more than one worker they are parsed in
+        a process pool.
 
-        except Exception as e:
-            logger.error(f"Failed to extract text from EPUB: {e}")
-            raise
+        Args:
+            epub_source: Path to the EPUB, text or subtitle file, or an already opened book
+
+        Yields:
+            Chapter tuples of (chapter_id, title, cleaned_text) in reading order
+        """
+        if isinstance(epub_source, Path) and not is_epub(epub_source):
+            yield from iter_file_chapters(epub_source)
+            return
+
+        book = epub_source if isinstance(epub_source, epub.EpubBook) else self._read_epub(epub_source)
+        toc_titles = self._get_toc_titles(book)
+
+        documents = [item for item in book.get_items() if item.get_type() == ebooklib.ITEM_DOCUMENT]
+        contents = (item.get_content() for item in documents)
+        if self.workers > 1 and len(documents) > 1:
+            # Large omnibus books: parse documents in parallel, still yielding in reading order
+            extracted = extract_texts_in_pool(contents, self.workers)
+        else:
+            extracted = (extract_text(content) for content in contents)
+
+        for item, document in zip(documents, extracted):
+            if not document.text:
+                continue
 
-    def _clean_html(self, html_content: str) -> str:
+            chapter_id = item.get_id() or item.get_name()
+            title = toc_titles.get(item.get_name()) or document.title or chapter_id
+            yield Chapter(chapter_id=chapter_id, title=title, text=document.text)
+
+    def extract_text_from_epub(self, epub_path: Path) -> Tuple[str, str]:
         """
-        Clean HTML content and extract plain text.
+        Extract text content from EPUB file.
 
         Args:
-            html_content: Raw HTML content
+            epub_path: Path to the EPUB file
 
         Returns:
-            Clean plain text
+            Tuple of (title, full_text)
         """
-        # Remove HTML tags
-        text = re.sub(r"<[^>]+>", "", html_content)
-
-        # Remove common HTML entities
-        text = text.replace("&nbsp;", " ")
-        text = text.replace("&lt;", "<")
-        text = text.replace("&gt;", ">")
-        text = text.replace("&amp;", "&")
-        text = text.replace("&quot;", '"')
-        text = text.replace("&#39;", "'")
-
-        # Normalize whitespace
-        text = re.sub(r"\s+", " ", text)
+        try:
+            book = self._read_epub(epub_path)
+            title = self._get_book_title(book)
 
-        return text.strip()
+            combined_text = "\n".join(chapter.text for chapter in self.iter_chapters(book))
+            logger.info(f"Extracted {len(combined_text)} characters from '{title}'")
 
-    def _get_cache_key(self, text: str) -> str:
-        """Generate a cache key for the given text."""
-        return hashlib.md5(text.encode("utf-8")).hexdigest()
+            return title, combined_text
 
-    def _load_from_cache(self, cache_key: str) -> Optional[List[str]]:
-        """Load key phrases from cache if available."""
-        cache_file = self.cache_dir / f"{cache_key}.json"
-        if cache_file.exists():
-            try:
-                with open(cache_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    logger.debug(f"📁 Loaded from cache: {cache_file.name}")
-                    phrases = data.get("key_phrases", [])
-                    return phrases if isinstance(phrases, list) else []
-            except Exception as e:
-                logger.warning(f"Failed to load cache file {cache_file}: {e}")
-        return None
+        except Exception as e:
+            logger.error(f"Failed to extract text from EPUB: {e}")
+            raise
 
     def _smart_chunk_text(self, text: str, max_chunk_size: int) -> List[str]:
         """
@@ -228,42 +415,7 @@ class ChineseEPUBAnalyzer:
         Returns:
             List of text chunks with natural boundaries preserved
         """
-        if len(text) <= max_chunk_size:
-            return [text]
-
-        chunks = []
-        current_chunk = ""
-
-        # Split by paragraphs first (double newlines, or common Chinese punctuation)
-        paragraphs = re.split(r"\n\s*\n|。\s*\n|！\s*\n|？\s*\n", text)
-
-        for paragraph in paragraphs:
-            paragraph = paragraph.strip()
-            if not paragraph:
-                continue
-
-            # If paragraph is small enough, add to current chunk
-            if len(current_chunk) + len(paragraph) + 1 <= max_chunk_size:
-                if current_chunk:
-                    current_chunk += "\n" + paragraph
-                else:
-                    current_chunk = paragraph
-            else:
-                # Current chunk is ready, start new one
-                if current_chunk:
-                    chunks.append(current_chunk)
-
-                # If paragraph itself is too large, split by sentences
-                if len(paragraph) > max_chunk_size:
-                    sentence_chunks = self._split_by_sentences(paragraph, max_chunk_size)
-                    chunks.extend(sentence_chunks[:-1])  # Add all but last
-                    current_chunk = sentence_chunks[-1] if sentence_chunks else ""
-                else:
-                    current_chunk = paragraph
-
-        # Add final chunk
-        if current_chunk:
-            chunks.append(current_chunk)
+        chunks = list(iter_text_chunks(text, max_chunk_size))
 
         # Log chunk sizes for debugging
         chunk_sizes = [len(chunk) for chunk in chunks]
@@ -271,78 +423,135 @@ class ChineseEPUBAnalyzer:
 
         return chunks
 
-    def _split_by_sentences(self, text: str, max_chunk_size: int) -> List[str]:
+    def _extract_batch_with_retry(self, batch: List[str]) -> List[Optional[List[str]]]:
         """
-        Split text by sentence boundaries when paragraph is too large.
+        Send one multi-document request, retrying on throttling and server errors.
 
         Args:
-            text: Input text to split
-            max_chunk_size: Maximum size for each chunk
+            batch: Text chunks to send as the documents of one request
 
         Returns:
-            List of sentence-based chunks
+            Raw key phrases for each chunk in the order of the batch, or None
+            for documents the service reported an error for
         """
-        # Chinese sentence endings
-        sentences = re.split(r"([。！？；])", text)
+        documents = [{"id": str(i), "language": self.LANGUAGE, "text": chunk} for i, chunk in enumerate(batch)]
 
-        chunks = []
-        current_chunk = ""
+        response = self.azure_client.call(
+            urlparse(self.endpoint).netloc,
+            lambda: self.text_analytics_client.extract_key_phrases(documents=documents),
+            retry_on=(HttpResponseError, ServiceRequestError),
+        )
 
-        # Rejoin sentences with their punctuation
-        for i in range(0, len(sentences) - 1, 2):
-            sentence = sentences[i]
-            if i + 1 < len(sentences):
-                sentence += sentences[i + 1]  # Add punctuation
+        phrases_by_document: Dict[str, List[str]] = {}
+        for doc in response:
+            if not doc.is_error:
+                phrases_by_document[doc.id] = list(doc.key_phrases)
+            else:
+                logger.error(f"Error processing text chunk {doc.id}: " f"{doc.error.message}")
 
-            sentence = sentence.strip()
-            if not sentence:
-                continue
+        return [phrases_by_document.get(document["id"]) for document in documents]
 
-            if len(current_chunk) + len(sentence) <= max_chunk_size:
-                current_chunk += sentence
+    def extract_key_phrases_from_chunks(self, chunks: Iterable[str], min_length: int = 1) -> Iterator[List[str]]:
+        """
+        Extract key phrases from text chunks using the cache and batched, concurrent Azure requests.
+
+        Each chunk is looked up in the per-chunk cache first. Misses are packed
+        into multi-document requests which are sent through a bounded thread
+        pool. Results are yielded in the order of the input, and only a few
+        batches are kept in flight so the input can be streamed.
+
+        Args:
+            chunks: Text chunks of at most MAX_DOCUMENT_SIZE characters
+            min_length: Minimum phrase length to include
+
+        Yields:
+            Filtered key phrases for each non-empty chunk, in input order
+        """
+        cache = self.key_phrase_cache
+        if cache is None:
+            raise ValueError("Key phrase extraction requires the Azure segmenter")
+        # Each slot is either (None, cached_phrases) or (batch, index_in_batch)
+        slots: deque = deque()
+        batch = _PendingBatch()
+        in_flight = 0
+        request_count = 0
+
+        def resolve(pending: _PendingBatch) -> None:
+            nonlocal in_flight
+            in_flight -= 1
+            assert pending.future is not None
+            try:
+                pending.results = pending.future.result()
+                logger.info(f"✅ Azure API call completed for batch {pending.number}")
+            except Exception as e:
+                logger.error(f"❌ Azure API error for batch {pending.number}: {e}")
+                pending.results = [None] * len(pending.chunks)
+
+            for key, phrases in zip(pending.keys, pending.results):
+                if phrases is not None:
+                    cache.put(key, phrases)
+
+        def pop_slot() -> List[str]:
+            pending, value = slots.popleft()
+            if pending is None:
+                phrases = value
             else:
-                if current_chunk:
-                    chunks.append(current_chunk)
-
-                # If single sentence is still too long, force split
-                if len(sentence) > max_chunk_size:
-                    # Split at max_chunk_size but try to find a comma or space near the boundary
-                    while sentence:
-                        if len(sentence) <= max_chunk_size:
-                            current_chunk = sentence
-                            break
-
-                        # Look for a good break point near max_chunk_size
-                        break_point = max_chunk_size
-                        for punct in ["，", "、", " ", "的", "了", "在"]:
-                            punct_pos = sentence.rfind(punct, max_chunk_size - 200, max_chunk_size)
-                            if punct_pos > max_chunk_size - 500:  # Within reasonable range
-                                break_point = punct_pos + len(punct)
-                                break
-
-                        chunks.append(sentence[:break_point])
-                        sentence = sentence[break_point:].strip()
-
-                    current_chunk = sentence
+                if pending.results is None:
+                    resolve(pending)
+                phrases = pending.results[value] or []
+
+            # Filter Chinese chars only and minimum length
+            return [phrase for phrase in phrases if self.chinese_pattern.match(phrase) and len(phrase) >= min_length]
+
+        def ready() -> bool:
+            pending = slots[0][0]
+            if pending is None or pending.results is not None:
+                return True
+            if pending.future is None:
+                return False
+            # Block on the oldest batch only when the pipeline is full
+            return pending.future.done() or in_flight >= self.max_concurrent_requests * 2
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
+
+            def submit(pending: _PendingBatch) -> None:
+                nonlocal in_flight, request_count
+                request_count += 1
+                in_flight += 1
+                pending.number = request_count
+                logger.info(
+                    f"🌐 Making Azure API call for batch {request_count} "
+                    f"({len(pending.chunks)} documents, {sum(len(chunk) for chunk in pending.chunks)} chars)"
+                )
+                pending.future = executor.submit(self._extract_batch_with_retry, pending.chunks)
+
+            for chunk in chunks:
+                if not chunk.strip():
+                    continue
+
+                key = cache.make_key(chunk, self.LANGUAGE, self.API_VERSION)
+                cached_phrases = cache.get(key)
+                if cached_phrases is not None:
+                    slots.append((None, cached_phrases))
                 else:
-                    current_chunk = sentence
+                    slots.append((batch, len(batch.chunks)))
+                    batch.chunks.append(chunk)
+                    batch.keys.append(key)
+                    if len(batch.chunks) == self.MAX_DOCUMENTS_PER_REQUEST:
+                        submit(batch)
+                        batch = _PendingBatch()
 
-        # Add final chunk
-        if current_chunk:
-            chunks.append(current_chunk)
+                while slots and ready():
+                    yield pop_slot()
 
-        return chunks
+            if batch.chunks:
+                submit(batch)
+            while slots:
+                yield pop_slot()
 
-    def _save_to_cache(self, cache_key: str, key_phrases: List[str]) -> None:
-        """Save key phrases to cache."""
-        cache_file = self.cache_dir / f"{cache_key}.json"
-        try:
-            data = {"key_phrases": key_phrases, "timestamp": time.time()}
-            with open(cache_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-                logger.info(f"💾 Saved key phrases to cache: {cache_file}")
-        except Exception as e:
-            logger.warning(f"Failed to save cache file {cache_file}: {e}")
+        stats = cache.get_stats()
+        logger.info(f"Made {request_count} Azure API calls (cache: {stats.hits} hits, {stats.misses} misses so far)")
+        self.azure_client.log_stats()
 
     def extract_key_phrases_from_text(self, text: str, min_length: int = 1, chunk_size: int = 5000) -> List[str]:
         """
@@ -362,54 +571,150 @@ class ChineseEPUBAnalyzer:
         if not chinese_text:
             return []
 
-        # Check cache first
-        cache_key = self._get_cache_key(chinese_text)
-        cached_phrases = self._load_from_cache(cache_key)
-        if cached_phrases is not None:
-            logger.info("💾 Using cached key phrases (no API call needed)")
-            return [phrase for phrase in cached_phrases if len(phrase) >= min_length]
-
         # Split text into chunks if too large, respecting text boundaries
-        all_key_phrases = []
-        text_chunks = self._smart_chunk_text(chinese_text, chunk_size)
-
+        text_chunks = self._smart_chunk_text(chinese_text, min(chunk_size, self.MAX_DOCUMENT_SIZE))
         logger.info(f"Processing {len(text_chunks)} text chunks for extraction")
 
-        for i, chunk in enumerate(text_chunks):
-            if not chunk.strip():
-                continue
-
-            logger.info(f"🌐 Making Azure API call for chunk {i+1}/{len(text_chunks)} " f"(size: {len(chunk)} chars)")
-            try:
-                documents = [{"id": str(i), "language": "zh-hans", "text": chunk}]
-                response = self.text_analytics_client.extract_key_phrases(documents=documents)
-                logger.info(f"✅ Azure API call completed for chunk {i+1}")
-
-                for doc in response:
-                    if not doc.is_error:
-                        for phrase in doc.key_phrases:
-                            # Filter Chinese chars only and minimum length
-                            if self.chinese_pattern.match(phrase) and len(phrase) >= min_length:
-                                all_key_phrases.append(phrase)
-                    else:
-                        logger.error(f"Error processing text chunk {i}: " f"{doc.error.message}")
-
-            except Exception as e:
-                logger.error(f"❌ Azure API error for chunk {i+1}: {e}")
-                continue
+        all_key_phrases: List[str] = []
+        for chunk_phrases in self.extract_key_phrases_from_chunks(text_chunks, min_length):
+            all_key_phrases.extend(chunk_phrases)
 
         # Remove duplicates while preserving order
         unique_phrases = list(dict.fromkeys(all_key_phrases))
 
-        # Save to cache
-        self._save_to_cache(cache_key, unique_phrases)
-
-        logger.info(
-            f"✨ Extracted {len(unique_phrases)} unique key phrases from text "
-            f"({len(text_chunks)} Azure API calls made)"
-        )
+        logger.info(f"✨ Extracted {len(unique_phrases)} unique key phrases from text")
         return unique_phrases
 
+    def extract_key_phrases_from_chapters(
+        self, chapters: Iterable[Chapter], min_length: int = 1, chunk_size: int = 5000
+    ) -> List[str]:
+        """
+        Extract key phrases chapter by chapter.
+
+        Chunks of all chapters share the same cached, batched request
+        pipeline, so short chapters do not each cost a round-trip. Only the
+        chapters whose chunks are in flight are held in memory.
+
+        Args:
+            chapters: Chapters to extract key phrases from
+            min_length: Minimum phrase length to include
+            chunk_size: Maximum size of text chunks to send to Azure API
+
+        Returns:
+            List of unique key phrases in order of first appearance
+        """
+        chunk_size = min(chunk_size, self.MAX_DOCUMENT_SIZE)
+
+        def iter_chunks() -> Iterator[str]:
+            for chapter in chapters:
+                chinese_text = "".join(self.chinese_pattern.findall(chapter.text))
+                if chinese_text:
+                    yield from iter_text_chunks(chinese_text, chunk_size)
+
+        phrases: Dict[str, None] = {}
+        for chunk_phrases in self.extract_key_phrases_from_chunks(iter_chunks(), min_length):
+            for phrase in chunk_phrases:
+                phrases.setdefault(phrase, None)
+
+        logger.info(f"✨ Extracted {len(phrases)} unique key phrases")
+        return list(phrases)
+
+    def count_token_frequencies_by_chapter(
+        self, chapters: Iterable[Chapter]
+    ) -> Tuple[Dict[str, int], List[ChapterCounts]]:
+        """
+        Segment chapters with the local segmenter and count every word token.
+
+        Unlike key phrase counting, this keeps all tokens (including function
+        words and single characters), so frequencies reflect what a reader
+        actually encounters. With more than one worker, chapters are segmented
+        in a process pool.
+
+        Args:
+            chapters: Chapters to segment
+
+        Returns:
+            Tuple of (book-wide token frequencies, per-chapter counts)
+        """
+        total: Counter = Counter()
+        chapter_counts: List[ChapterCounts] = []
+        pending: deque = deque()
+
+        def chinese_texts() -> Iterator[str]:
+            for chapter in chapters:
+                chinese_text = " ".join(self.chinese_pattern.findall(chapter.text))
+                pending.append((chapter.chapter_id, chapter.title, len(chinese_text) - chinese_text.count(" ")))
+                yield chinese_text
+
+        if self.workers > 1:
+            counters = count_tokens_in_pool(chinese_texts(), self.workers, user_words=self.user_words)
+        else:
+            counters = (self.word_segmenter.count_tokens(text) for text in chinese_texts())
+
+        for counts in counters:
+            chapter_id, title, chinese_characters = pending.popleft()
+            total.update(counts)
+            chapter_counts.append(ChapterCounts(chapter_id, title, chinese_characters, counts))
+            logger.debug(f"Chapter '{title}': {chinese_characters} Chinese characters, {len(counts)} distinct tokens")
+
+        logger.info(f"Segmented {sum(total.values()):,} tokens ({len(total):,} distinct words)")
+        return dict(total), chapter_counts
+
+    def count_ngram_frequencies_by_chapter(
+        self, chapters: Iterable[Chapter]
+    ) -> Tuple[Dict[str, int], List[ChapterCounts]]:
+        """
+        Find word-like 2-4 character n-grams in the book and count them per chapter.
+
+        Every n-gram occurring 3+ times is counted exactly, then kept only if
+        the characters around it vary (branching entropy) and its characters
+        belong together (cohesion), so the vocabulary comes from the book
+        alone, reproducibly and without network calls.
+
+        Args:
+            chapters: Chapters to count n-grams in
+
+        Returns:
+            Tuple of (book-wide word-like n-gram frequencies, per-chapter counts)
+        """
+        counter = NgramCounter(min_length=2, max_length=4)
+        chapter_info: List[Tuple[str, str, int]] = []
+        for chapter in chapters:
+            counter.add_text(chapter.text)
+            chinese_characters = sum(len(run) for run in self.chinese_pattern.findall(chapter.text))
+            chapter_info.append((chapter.chapter_id, chapter.title, chinese_characters))
+
+        word_frequencies = select_words(counter.score(min_frequency=3))
+        chapter_counts = [
+            ChapterCounts(chapter_id, title, chinese_characters, counts)
+            for (chapter_id, title, chinese_characters), counts in zip(
+                chapter_info, counter.count_words_by_text(word_frequencies)
+            )
+        ]
+
+        logger.info(f"Kept {len(word_frequencies):,} word-like n-grams (2-4 chars, 3+ occurrences)")
+        return word_frequencies, chapter_counts
+
+    def count_phrase_occurrences(self, key_phrases: Iterable[str], chinese_text: str) -> Counter:
+        """
+        Count occurrences of 2-4 character key phrases in Chinese-only text.
+
+        Args:
+            key_phrases: Key phrases to count
+            chinese_text: Text containing only Chinese characters
+
+        Returns:
+            Counter of phrases that occur at least once
+        """
+        counts: Counter = Counter()
+        for phrase in key_phrases:
+            if not 2 <= len(phrase) <= 4:
+                continue
+            count = chinese_text.count(phrase)
+            if count:
+                counts[phrase] = count
+        return counts
+
     def count_phrase_frequencies_in_text(self, key_phrases: List[str], full_text: str) -> Dict[str, int]:
         """
         Count how many times each key phrase appears in the full text.
@@ -422,22 +727,39 @@ class ChineseEPUBAnalyzer:
         Returns:
             Dictionary mapping filtered phrases to their frequencies in the text
         """
-        phrase_frequencies = {}
-
         # Extract only Chinese characters from the full text for matching
         chinese_text = "".join(self.chinese_pattern.findall(full_text))
+        counts = self.count_phrase_occurrences(key_phrases, chinese_text)
+        return self._filter_phrase_frequencies(counts)
 
-        for phrase in key_phrases:
-            if not phrase:
-                continue
+    def count_phrase_frequencies_by_chapter(
+        self, key_phrases: List[str], chapters: Iterable[Chapter]
+    ) -> Tuple[Dict[str, int], List[ChapterCounts]]:
+        """
+        Count key phrase frequencies one chapter at a time.
 
-            # Count occurrences of this phrase in the text
-            # Use case-sensitive search since Chinese characters are case-sensitive
-            count = chinese_text.count(phrase)
+        Args:
+            key_phrases: List of key phrases identified by Azure
+            chapters: Chapters to count phrases in
+
+        Returns:
+            Tuple of (filtered book-wide frequencies, per-chapter counts)
+        """
+        total: Counter = Counter()
+        chapter_counts: List[ChapterCounts] = []
+
+        for chapter in chapters:
+            chinese_text = "".join(self.chinese_pattern.findall(chapter.text))
+            counts = self.count_phrase_occurrences(key_phrases, chinese_text)
+            total.update(counts)
+            chapter_counts.append(ChapterCounts(chapter.chapter_id, chapter.title, len(chinese_text), counts))
+            logger.debug(f"Chapter '{chapter.title}': {len(chinese_text)} Chinese characters, {len(counts)} phrases")
+
+        return self._filter_phrase_frequencies(total), chapter_counts
 
-            # Filter: only keep 2-4 character words with frequency >= 3
-            if count >= 3 and 2 <= len(phrase) <= 4:
-                phrase_frequencies[phrase] = count
+    def _filter_phrase_frequencies(self, counts: Counter) -> Dict[str, int]:
+        """Keep only phrases appearing 3+ times and log a sample."""
+        phrase_frequencies = {phrase: count for phrase, count in counts.items() if count >= 3}
 
         logger.info(
             f"Found frequencies for {len(phrase_frequencies)} filtered key phrases (2-4 chars, 3+ occurrences) in text"
@@ -452,6 +774,44 @@ class ChineseEPUBAnalyzer:
 
         return phrase_frequencies
 
+    def calculate_chapter_stats(
+        self,
+        chapter_counts: List[ChapterCounts],
+        word_frequencies: Dict[str, int],
+        anki_words: Set[str],
+    ) -> List[ChapterStats]:
+        """
+        Calculate per-chapter statistics restricted to the book vocabulary.
+
+        Args:
+            chapter_counts: Per-chapter phrase counters
+            word_frequencies: Filtered book-wide word frequencies
+            anki_words: Set of words in Anki collection
+
+        Returns:
+            List of chapter statistics in reading order
+        """
+        chapter_stats = []
+
+        for chapter in chapter_counts:
+            words = {word: freq for word, freq in chapter.counts.items() if word in word_frequencies}
+            total_words = sum(words.values())
+            known_count = sum(freq for word, freq in words.items() if word in anki_words)
+
+            chapter_stats.append(
+                ChapterStats(
+                    chapter_id=chapter.chapter_id,
+                    title=chapter.title,
+                    chinese_characters=chapter.chinese_characters,
+                    total_words=total_words,
+                    unique_words=len(words),
+                    unknown_words=sum(1 for word in words if word not in anki_words),
+                    coverage=(known_count / total_words * 100) if total_words > 0 else 0,
+                )
+            )
+
+        return chapter_stats
+
     def get_word_pinyin(self, word: str) -> str:
         """
         Get pinyin for a Chinese word.
@@ -465,12 +825,18 @@ class ChineseEPUBAnalyzer:
         if not PYPINYIN_AVAILABLE:
             return ""
 
+        if word in self._pinyin_cache:
+            return self._pinyin_cache[word]
+
         try:
             # Use pypinyin to get pinyin with tone marks
             pinyin_list = lazy_pinyin(word, style=Style.TONE)
-            return "".join(pinyin_list)
+            pinyin = "".join(pinyin_list)
         except Exception:
-            return ""
+            pinyin = ""
+
+        self._pinyin_cache[word] = pinyin
+        return pinyin
 
     def get_word_hsk_level(self, word: str) -> Optional[int]:
         """
@@ -482,11 +848,21 @@ class ChineseEPUBAnalyzer:
         Returns:
             HSK level (1-7) if found, None if not in HSK lists
         """
-        for level in self.hsk_word_lists.get_available_levels():
-            hsk_words = self.hsk_word_lists.get_words_for_level(level)
-            if word in hsk_words:
-                return level
-        return None
+        if self._hsk_levels is None:
+            # Map every HSK word to its lowest level once
+            self._hsk_levels = {}
+            for level in reversed(self.hsk_word_lists.get_available_levels()):
+                for hsk_word in self.hsk_word_lists.get_words_for_level(level):
+                    self._hsk_levels[hsk_word] = level
+        return self._hsk_levels.get(word)
+
+    def _word_details(self, word: str, freq: int) -> Tuple[str, int, str, Optional[int]]:
+        """Build a (word, frequency, pinyin, hsk_level) tuple."""
+        return (word, freq, self.get_word_pinyin(word), self.get_word_hsk_level(word))
+
+    def _word_pinyin_details(self, word: str, freq: int) -> Tuple[str, int, str]:
+        """Build a (word, frequency, pinyin) tuple."""
+        return (word, freq, self.get_word_pinyin(word))
 
     def analyze_vocabulary_frequency(self, words: List[str]) -> Dict[str, int]:
         """
@@ -584,42 +960,78 @@ class ChineseEPUBAnalyzer:
         Returns:
             Dictionary mapping target percentages to coverage target results
         """
+        coverage_targets, _ = self.calculate_coverage(word_frequencies, known_words, targets)
+        return coverage_targets
+
+    def calculate_coverage(
+        self,
+        word_frequencies: Dict[str, int],
+        known_words: Set[str],
+        targets: List[int] = [80, 90, 95, 98],
+    ) -> Tuple[Dict[int, CoverageTarget], List[CoveragePoint]]:
+        """
+        Calculate coverage targets and the coverage curve in one pass.
+
+        Unknown words are sorted by frequency once and turned into a cumulative
+        sum, so the number of words needed for any coverage is a binary search.
+        Pinyin and HSK levels of priority words are only looked up when read.
+
+        Args:
+            word_frequencies: Word frequency dictionary
+            known_words: Set of words already known
+            targets: List of target coverage percentages
+
+        Returns:
+            Tuple of (target percentage -> coverage target results, coverage curve
+            with the words needed to pass each whole percentage above the current coverage)
+        """
         # Sort unknown words by frequency (descending)
-        unknown_words = {word: freq for word, freq in word_frequencies.items() if word not in known_words}
-        sorted_unknown = sorted(unknown_words.items(), key=lambda x: x[1], reverse=True)
+        sorted_unknown = sorted(
+            ((word, freq) for word, freq in word_frequencies.items() if word not in known_words),
+            key=lambda x: x[1],
+            reverse=True,
+        )
 
         total_words = sum(word_frequencies.values())
-        known_word_count = sum(freq for word, freq in word_frequencies.items() if word in known_words)
+        known_word_count = total_words - sum(freq for _, freq in sorted_unknown)
         current_coverage = (known_word_count / total_words * 100) if total_words > 0 else 0
 
-        results = {}
-
-        for target in targets:
-            target_word_count = math.ceil(total_words * target / 100)
+        # cumulative[i] = words covered after learning the i + 1 most frequent unknown words
+        cumulative = known_word_count + np.cumsum(
+            np.fromiter((freq for _, freq in sorted_unknown), dtype=np.int64, count=len(sorted_unknown))
+        )
 
-            # Find priority words to reach target
-            priority_words = []
-            cumulative_freq = known_word_count
+        def words_needed(target_word_counts: np.ndarray) -> np.ndarray:
+            needed = np.searchsorted(cumulative, target_word_counts, side="left") + 1
+            needed = np.minimum(needed, len(sorted_unknown))
+            return np.where(target_word_counts <= known_word_count, 0, needed)
 
-            for word, freq in sorted_unknown:
-                if cumulative_freq >= target_word_count:
-                    break
-                pinyin = self.get_word_pinyin(word)
-                hsk_level = self.get_word_hsk_level(word)
-                priority_words.append((word, freq, pinyin, hsk_level))
-                cumulative_freq += freq
+        target_counts = np.array([math.ceil(total_words * target / 100) for target in targets], dtype=np.int64)
+        results = {}
 
+        for target, needed in zip(targets, words_needed(target_counts)):
             # Sort priority words by length first (longest first), then by frequency
-            priority_words.sort(key=lambda x: (-len(x[0]), -x[1]))
+            priority_words = sorted(sorted_unknown[: int(needed)], key=lambda x: (-len(x[0]), -x[1]))
 
             results[target] = CoverageTarget(
                 target_percentage=target,
-                words_needed=len(priority_words),
+                words_needed=int(needed),
                 current_coverage=current_coverage,
-                priority_words=priority_words,
+                priority_words=LazyWordList(priority_words, self._word_details),
             )
 
-        return results
+        coverage_curve: List[CoveragePoint] = []
+        if total_words > 0:
+            percentages = np.arange(math.floor(current_coverage) + 1, 101)
+            curve_counts = np.ceil(total_words * percentages / 100).astype(np.int64)
+            for percentage, needed in zip(percentages, words_needed(curve_counts)):
+                words_learned = int(needed)
+                if coverage_curve and coverage_curve[-1].words_learned == words_learned:
+                    continue  # One word can push coverage past several percentages
+                covered = cumulative[words_learned - 1] if words_learned > 0 else known_word_count
+                coverage_curve.append(CoveragePoint(words_learned, float(covered / total_words * 100)))
+
+        return results, coverage_curve
 
     def get_high_frequency_unknown_words(
         self, unknown_words: Dict[str, int], count: int = 50
@@ -689,13 +1101,12 @@ class ChineseEPUBAnalyzer:
             hsk_words = self.hsk_word_lists.get_words_for_level(level)
 
             # Find unknown words at this HSK level, ordered by frequency
-            unknown_at_level = []
+            unknown_at_level: List[Tuple[str, int]] = []
             total_word_count = 0
 
             for word, freq in word_frequencies.items():
                 if word in hsk_words and word not in known_words:
-                    pinyin = self.get_word_pinyin(word)
-                    unknown_at_level.append((word, freq, pinyin))
+                    unknown_at_level.append((word, freq))
                     total_word_count += freq
 
             # Sort by length first (longest first), then by frequency (descending)
@@ -708,7 +1119,7 @@ class ChineseEPUBAnalyzer:
                 learning_targets.append(
                     HSKLearningTarget(
                         level=level,
-                        unknown_words=unknown_at_level,
+                        unknown_words=LazyWordList(unknown_at_level, self._word_pinyin_details),
                         potential_coverage_gain=potential_coverage_gain,
                         total_word_count=total_word_count,
                     )
@@ -716,6 +1127,42 @@ class ChineseEPUBAnalyzer:
 
         return learning_targets
 
+    def extract_word_frequencies(
+        self, epub_source: Union[Path, "epub.EpubBook"], sentence_index: Optional[SentenceIndex] = None
+    ) -> Tuple[Dict[str, int], List[ChapterCounts]]:
+        """
+        Extract the vocabulary of a book with the configured segmenter.
+
+        Args:
+            epub_source: Path to the EPUB, text or subtitle file, or an already opened book
+            sentence_index: Index to record the book's sentences in while its chapters stream past
+
+        Returns:
+            Tuple of (book-wide word frequencies, per-chapter counts)
+        """
+        book = self._read_epub(epub_source) if isinstance(epub_source, Path) and is_epub(epub_source) else epub_source
+
+        def counted_chapters() -> Iterator[Chapter]:
+            chapters = self.iter_chapters(book)
+            return sentence_index.record_chapters(chapters) if sentence_index else chapters
+
+        if self.segmenter == "local":
+            # Stream the book once, segmenting each chapter into word tokens
+            return self.count_token_frequencies_by_chapter(counted_chapters())
+
+        if self.segmenter == "ngram":
+            # Stream the book once, keeping only the Chinese characters in memory
+            return self.count_ngram_frequencies_by_chapter(counted_chapters())
+
+        # Stream the book twice, one chapter at a time: first to extract key
+        # phrases using Azure, then to count them
+        key_phrases = self.extract_key_phrases_from_chapters(self.iter_chapters(book))
+        logger.info(f"Extracted {len(key_phrases)} key phrases from text")
+
+        # Calculate frequencies of key phrases in the original text
+        # (automatically filters to 2-4 character words with 3+ occurrences)
+        return self.count_phrase_frequencies_by_chapter(key_phrases, counted_chapters())
+
     def analyze_epub(
         self,
         epub_path: Path,
@@ -723,57 +1170,78 @@ class ChineseEPUBAnalyzer:
         min_frequency: int = 1,
         target_coverages: List[int] = [80, 90, 95, 98],
         top_unknown_count: int = 50,
+        example_count: int = 0,
     ) -> BookAnalysis:
         """
-        Perform comprehensive analysis of an EPUB file.
+        Perform comprehensive analysis of an EPUB, plain text or subtitle file.
 
         Args:
-            epub_path: Path to the EPUB file
+            epub_path: Path to the EPUB, text (.txt) or subtitle (.srt, .ass) file
             anki_words: Set of words in user's Anki collection
             min_frequency: Minimum frequency threshold for analysis
             target_coverages: List of target coverage percentages
             top_unknown_count: Number of top unknown words to include
+            example_count: Number of example sentences to find for each top unknown word
 
         Returns:
             Complete book analysis results
         """
         logger.info(f"Starting analysis of EPUB: {epub_path}")
 
-        # Extract text from EPUB
-        title, full_text = self.extract_text_from_epub(epub_path)
+        title, book = self.open_source(epub_path)
+        if self.key_phrase_cache:
+            self.key_phrase_cache.reset_stats()
 
-        # Extract key phrases using Azure
-        key_phrases = self.extract_key_phrases_from_text(full_text)
-        logger.info(f"Extracted {len(key_phrases)} key phrases from text")
+        # Index sentences for examples, unless the index of this book is already complete
+        sentence_index = None
+        index_is_current = False
+        try:
+            if example_count > 0:
+                sentence_index = SentenceIndex(SentenceIndex.path_for(self.cache_dir / "sentence_index", epub_path))
+                index_is_current = sentence_index.is_current(epub_path, self.segmenter)
+                if not index_is_current:
+                    sentence_index.reset()
+
+            word_frequencies, chapter_counts = self.extract_word_frequencies(
+                book, sentence_index if sentence_index and not index_is_current else None
+            )
 
-        # Calculate frequencies of key phrases in the original text
-        # (automatically filters to 2-4 character words with 3+ occurrences)
-        word_frequencies = self.count_phrase_frequencies_in_text(key_phrases, full_text)
+            # Calculate vocabulary statistics
+            total_words = sum(word_frequencies.values())
+            unique_words = len(word_frequencies)
+            chinese_words = total_words  # All phrases and tokens are Chinese
+            unique_chinese_words = unique_words
+
+            stats = VocabularyStats(
+                total_words=total_words,
+                unique_words=unique_words,
+                chinese_words=chinese_words,
+                unique_chinese_words=unique_chinese_words,
+            )
 
-        # Calculate vocabulary statistics
-        total_words = sum(word_frequencies.values())
-        unique_words = len(word_frequencies)
-        chinese_words = total_words  # All phrases are Chinese after key phrase extraction
-        unique_chinese_words = unique_words
-
-        stats = VocabularyStats(
-            total_words=total_words,
-            unique_words=unique_words,
-            chinese_words=chinese_words,
-            unique_chinese_words=unique_chinese_words,
-        )
+            # Calculate HSK distribution
+            hsk_distribution = self.calculate_hsk_distribution(word_frequencies)
 
-        # Calculate HSK distribution
-        hsk_distribution = self.calculate_hsk_distribution(word_frequencies)
+            # Compare with Anki collection
+            known_words, unknown_words = self.compare_with_anki_collection(word_frequencies, anki_words)
 
-        # Compare with Anki collection
-        known_words, unknown_words = self.compare_with_anki_collection(word_frequencies, anki_words)
+            # Get high-frequency unknown words
+            high_frequency_unknown = self.get_high_frequency_unknown_words(unknown_words, top_unknown_count)
 
-        # Get high-frequency unknown words
-        high_frequency_unknown = self.get_high_frequency_unknown_words(unknown_words, top_unknown_count)
+            # Find the shortest example sentences of the top unknown words
+            examples: Dict[str, List[str]] = {}
+            if sentence_index:
+                if not index_is_current:
+                    sentence_index.index_words(word_frequencies, epub_path, self.segmenter)
+                examples = {
+                    word: sentence_index.find_examples(word, example_count) for word, _, _, _ in high_frequency_unknown
+                }
+        finally:
+            if sentence_index:
+                sentence_index.close()
 
         # Calculate coverage targets
-        coverage_targets = self.calculate_coverage_targets(word_frequencies, known_words, target_coverages)
+        coverage_targets, coverage_curve = self.calculate_coverage(word_frequencies, known_words, target_coverages)
 
         # Identify non-HSK words
         non_hsk_words = self.identify_non_hsk_words(word_frequencies)
@@ -781,6 +1249,9 @@ class ChineseEPUBAnalyzer:
         # Calculate HSK learning targets
         hsk_learning_targets = self.calculate_hsk_learning_targets(word_frequencies, known_words)
 
+        # Calculate per-chapter statistics
+        chapter_stats = self.calculate_chapter_stats(chapter_counts, word_frequencies, anki_words)
+
         logger.info(
             f"Analysis complete: {unique_words} unique words, "
             f"{len(known_words)} known, {len(unknown_words)} unknown, "
@@ -796,6 +1267,10 @@ class ChineseEPUBAnalyzer:
             unknown_words=unknown_words,
             high_frequency_unknown=high_frequency_unknown,
             coverage_targets=coverage_targets,
+            coverage_curve=coverage_curve,
             non_hsk_words=non_hsk_words,
             hsk_learning_targets=hsk_learning_targets,
+            chapter_stats=chapter_stats,
+            cache_stats=self.key_phrase_cache.get_stats() if self.key_phrase_cache else CacheStats(0, 0),
+            examples=examples,
         )
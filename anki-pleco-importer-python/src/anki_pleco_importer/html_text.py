@@ -0,0 +1,131 @@
+"""Extract the readable text of (X)HTML documents, such as EPUB chapters."""
+
+import codecs
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Elements whose content is never read: code, styling, metadata, embedded graphics
+# and ruby annotations (pinyin or zhuyin above the characters)
+SKIPPED_ELEMENTS = frozenset({"head", "script", "style", "noscript", "template", "svg", "math", "rt", "rp"})
+
+# Elements that separate their content from the surrounding text
+BLOCK_ELEMENTS = frozenset(
+    "address article aside blockquote body br dd div dl dt figcaption figure footer h1 h2 h3 h4 h5 h6 "
+    "header hr li nav ol p pre section table td th tr ul".split()
+)
+
+# Elements whose text can serve as the document title
+TITLE_ELEMENTS = frozenset({"title", "h1", "h2", "h3"})
+
+# Bytes decoded and fed to the parser at a time
+FEED_SIZE = 64 * 1024
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class HtmlDocument(NamedTuple):
+    """Readable text of a document and its title."""
+
+    text: str
+    title: Optional[str]  # text of the first <title> or <h1>-<h3> element, if any
+
+
+class _TextExtractor(HTMLParser):
+    """Collects text outside skipped elements, and the text of the first title element."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.title: Optional[str] = None
+        self._skip_depth = 0
+        self._title_element: Optional[str] = None
+        self._title_parts: List[str] = []
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag in SKIPPED_ELEMENTS:
+            self._skip_depth += 1
+        if tag in BLOCK_ELEMENTS:
+            self.parts.append(" ")
+        if tag in TITLE_ELEMENTS and self.title is None and self._title_element is None:
+            self._title_element = tag
+            self._title_parts = []
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        # Self-closing elements (<br/>, <script/>) have no content to skip
+        if tag in BLOCK_ELEMENTS:
+            self.parts.append(" ")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in SKIPPED_ELEMENTS and self._skip_depth:
+            self._skip_depth -= 1
+        if tag in BLOCK_ELEMENTS:
+            self.parts.append(" ")
+        if tag == self._title_element:
+            title = _normalize("".join(self._title_parts))
+            self._title_element = None
+            if title:
+                self.title = title
+
+    def handle_data(self, data: str) -> None:
+        if self._title_element is not None:
+            self._title_parts.append(data)
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def _normalize(text: str) -> str:
+    """Collapse whitespace runs to single spaces."""
+    return WHITESPACE_PATTERN.sub(" ", text).strip()
+
+
+def extract_text(content: bytes, encoding: str = "utf-8") -> HtmlDocument:
+    """
+    Extract the readable text of an HTML document.
+
+    The bytes are decoded and parsed incrementally. Text inside <head>,
+    <script>, <style> and similar elements is dropped, block elements
+    become word breaks, and all named and numeric character references
+    are decoded.
+
+    Args:
+        content: Raw document bytes
+        encoding: Document encoding; undecodable bytes are ignored
+
+    Returns:
+        Whitespace-normalized text and title of the document
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="ignore")
+    parser = _TextExtractor()
+    for start in range(0, len(content), FEED_SIZE):
+        parser.feed(decoder.decode(content[start : start + FEED_SIZE]))
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    return HtmlDocument(_normalize("".join(parser.parts)), parser.title)
+
+
+def extract_texts_in_pool(contents: Iterable[bytes], workers: int) -> Iterator[HtmlDocument]:
+    """
+    Extract the text of several documents across a process pool.
+
+    Documents are submitted as they are read and results are yielded in
+    input order, with at most two documents per worker in flight.
+
+    Args:
+        contents: Raw document bytes
+        workers: Number of worker processes
+
+    Yields:
+        Extracted documents, one per input
+    """
+    in_flight: deque = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for content in contents:
+            in_flight.append(executor.submit(extract_text, content))
+            while len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+
+        while in_flight:
+            yield in_flight.popleft().result()
@@ -0,0 +1,358 @@
+"""Rate limiting, adaptive concurrency and retries shared by the clients of external services."""
+
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterator, Mapping, NamedTuple, Optional, Tuple, Type, TypeVar
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_MAX_CONCURRENCY = 8
+RETRY_BASE_DELAY = 0.5  # seconds, doubled on every retry
+MAX_RETRY_DELAY = 60.0
+
+# Throttled requests in flight together all fail; halve the concurrency once for the whole burst
+DECREASE_INTERVAL = 1.0
+
+
+class ProviderStats(NamedTuple):
+    """Request counts of a provider's client, over all hosts."""
+
+    requests: int  # attempts, including retries
+    successes: int
+    failures: int  # requests given up on
+    throttled: int  # 429 responses
+    retries: int
+    total_latency: float  # seconds spent in attempts
+
+    @property
+    def mean_latency(self) -> float:
+        """Mean seconds per attempt."""
+        return self.total_latency / self.requests if self.requests else 0.0
+
+
+class RetryableResponse(Exception):
+    """Raised inside a request for an HTTP response worth retrying (429 or 5xx)."""
+
+    def __init__(self, response: requests.Response):
+        super().__init__(f"HTTP {response.status_code} from {response.url}")
+        self.response = response
+        self.status_code = response.status_code
+
+
+class TokenBucket:
+    """
+    Token bucket allowing bursts of up to capacity calls, refilled at a steady rate.
+
+    A rate of None or below zero means no limit.
+    """
+
+    def __init__(self, rate: Optional[float], capacity: Optional[float] = None):
+        self.rate = rate if rate and rate > 0 else None
+        self.capacity = capacity or max(1.0, self.rate or 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a call is allowed, and take its token."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif self.rate is None:
+                    return
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """Allow no calls for a while, e.g. as long as a server's Retry-After asks."""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = max(now, self._paused_until)
+
+
+class AdaptiveConcurrency:
+    """
+    Limit on requests in flight, adapted with additive increase and multiplicative decrease (AIMD).
+
+    Each success raises the limit by 1/limit, about one per round of requests,
+    up to the maximum. A throttled request halves it, at most once per
+    DECREASE_INTERVAL, so the limit settles at what the server accepts.
+    """
+
+    def __init__(self, maximum: int, initial: Optional[int] = None):
+        self.maximum = max(1, maximum)
+        self.limit = float(min(self.maximum, initial or self.maximum))
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def slot(self) -> Iterator[Dict[str, bool]]:
+        """
+        Hold one of the slots for a request.
+
+        Yields:
+            Outcome to fill in: set "throttled" if the server throttled the request
+        """
+        with self._condition:
+            while self._in_flight >= int(self.limit):
+                self._condition.wait()
+            self._in_flight += 1
+        outcome = {"throttled": False}
+        try:
+            yield outcome
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                now = time.monotonic()
+                if outcome["throttled"]:
+                    if now - self._last_decrease >= DECREASE_INTERVAL:
+                        self.limit = max(1.0, self.limit / 2)
+                        self._last_decrease = now
+                        logger.info(f"🐢 Throttled - allowing {int(self.limit)} requests in flight")
+                else:
+                    self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+                self._condition.notify_all()
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """
+    Read how long a server asks to wait before retrying.
+
+    Args:
+        headers: Response headers (retry-after-ms, or Retry-After in seconds or as an HTTP date)
+
+    Returns:
+        Seconds to wait, or None if the server did not say
+    """
+    if not headers:
+        return None
+    milliseconds = headers.get("retry-after-ms")
+    if milliseconds:
+        try:
+            return max(0.0, float(milliseconds) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base_delay: float = RETRY_BASE_DELAY) -> float:
+    """Exponential backoff with jitter for a retry (attempt counts from 0)."""
+    return min(MAX_RETRY_DELAY, base_delay * 2.0**attempt) + random.uniform(0, base_delay)
+
+
+class _HostLimits:
+    """Token bucket and concurrency limit of one host."""
+
+    def __init__(self, requests_per_second: Optional[float], max_concurrency: int):
+        self.bucket = TokenBucket(requests_per_second)
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+
+
+class RateLimitedClient:
+    """
+    Runs the requests of one provider within per-host rate and concurrency limits, retrying failures.
+
+    Throttling (429) and server errors (5xx) are retried with exponential
+    backoff and jitter, or after the Retry-After the server gives, during
+    which the whole host is paused. Throttling also lowers the host's
+    concurrency, which recovers as requests succeed, so throughput stays near
+    what the provider allows. Requests go through call() with any client
+    library; HttpClient adds a requests session.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        requests_per_second: Optional[float] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = RETRY_BASE_DELAY,
+    ):
+        """
+        Create a client with the same default limits for every host.
+
+        Args:
+            provider: Name of the provider, for logs and metrics
+            requests_per_second: Default rate per host; None for no limit
+            max_concurrency: Default maximum of requests in flight per host
+            max_retries: Retries of a failed request before giving up
+            base_delay: First backoff delay in seconds, doubled on every retry
+        """
+        self.provider = provider
+        self.requests_per_second = requests_per_second
+        self.max_concurrency = max_concurrency
+        self.max_retries = max(0, max_retries)
+        self.base_delay = base_delay
+        self._hosts: Dict[str, _HostLimits] = {}
+        self._lock = threading.Lock()
+        self._stats = ProviderStats(0, 0, 0, 0, 0, 0.0)
+
+    def configure_host(
+        self, host: str, requests_per_second: Optional[float] = None, max_concurrency: Optional[int] = None
+    ) -> None:
+        """Set limits of a host other than the defaults."""
+        limits = _HostLimits(requests_per_second, max_concurrency or self.max_concurrency)
+        with self._lock:
+            self._hosts[host] = limits
+
+    def _limits(self, host: str) -> _HostLimits:
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = _HostLimits(self.requests_per_second, self.max_concurrency)
+            return self._hosts[host]
+
+    def _record(self, **counts: float) -> None:
+        with self._lock:
+            self._stats = self._stats._replace(**{name: getattr(self._stats, name) + n for name, n in counts.items()})
+
+    def stats(self) -> ProviderStats:
+        """Get the request counts so far."""
+        with self._lock:
+            return self._stats
+
+    def call(
+        self,
+        host: str,
+        request: Callable[[], T],
+        retry_on: Tuple[Type[BaseException], ...] = (RetryableResponse,),
+    ) -> T:
+        """
+        Make a request within the limits of a host, retrying it if it fails.
+
+        Exceptions of the retry_on types are retried if they carry no HTTP
+        status (connection errors and timeouts), a 429 or a 5xx status.
+        Other exceptions, and the last failure, are raised.
+
+        Args:
+            host: Host the request goes to
+            request: Function making the request
+            retry_on: Exception types that may be retried
+
+        Returns:
+            What the request returned
+        """
+        limits = self._limits(host)
+        attempt = 0
+        while True:
+            limits.bucket.acquire()
+            with limits.concurrency.slot() as outcome:
+                started = time.monotonic()
+                try:
+                    result = request()
+                except retry_on as e:
+                    status = getattr(e, "status_code", None)
+                    outcome["throttled"] = status == 429
+                    self._record(requests=1, throttled=int(status == 429), total_latency=time.monotonic() - started)
+                    retryable = status is None or status == 429 or status >= 500
+                    if not retryable or attempt == self.max_retries:
+                        self._record(failures=1)
+                        raise
+                    error: BaseException = e
+                else:
+                    self._record(requests=1, successes=1, total_latency=time.monotonic() - started)
+                    return result
+
+            retry_after = retry_after_seconds(getattr(getattr(error, "response", None), "headers", None))
+            if retry_after is not None:
+                delay = min(MAX_RETRY_DELAY, retry_after)
+                limits.bucket.pause(delay)
+            else:
+                delay = backoff_delay(attempt, self.base_delay)
+            self._record(retries=1)
+            logger.warning(f"⏳ {self.provider} request to {host} failed ({error}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    def log_stats(self) -> None:
+        """Log the request counts, if any requests were made."""
+        stats = self.stats()
+        if stats.requests:
+            logger.info(
+                f"📈 {self.provider}: {stats.successes}/{stats.requests} requests succeeded, "
+                f"{stats.throttled} throttled, {stats.retries} retried, {stats.failures} failed, "
+                f"{stats.mean_latency * 1000:.0f} ms on average"
+            )
+
+
+class HttpClient(RateLimitedClient):
+    """RateLimitedClient with a keep-alive requests session, pooled to the concurrency limit."""
+
+    def __init__(
+        self,
+        provider: str,
+        requests_per_second: Optional[float] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_delay: float = RETRY_BASE_DELAY,
+    ):
+        super().__init__(provider, requests_per_second, max_concurrency, max_retries, base_delay)
+        # Each request reuses a pooled connection instead of a new TCP and TLS handshake
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """
+        GET a URL, retrying connection errors, timeouts, 429 and 5xx responses.
+
+        Args:
+            url: URL to get
+            **kwargs: Options of requests.Session.get
+
+        Returns:
+            The response; after the last retry, possibly still a 429 or 5xx one
+        """
+
+        def send() -> requests.Response:
+            response = self.session.get(url, **kwargs)
+            if response.status_code == 429 or response.status_code >= 500:
+                raise RetryableResponse(response)
+            return response
+
+        try:
+            return self.call(
+                urlparse(url).netloc,
+                send,
+                retry_on=(RetryableResponse, requests.exceptions.ConnectionError, requests.exceptions.Timeout),
+            )
+        except RetryableResponse as e:
+            return e.response
+
+    def close(self) -> None:
+        """Close the session and log the request counts."""
+        self.session.close()
+        self.log_stats()
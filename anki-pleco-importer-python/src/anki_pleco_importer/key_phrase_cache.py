@@ -0,0 +1,131 @@
+"""Content-addressed SQLite cache for Azure key phrase results."""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CacheStats(NamedTuple):
+    """Cache hit and miss counts."""
+
+    hits: int
+    misses: int
+
+
+class KeyPhraseCache:
+    """
+    Cache of key phrases per text chunk, stored in a single SQLite database.
+
+    Entries are keyed by the hash of the chunk text, its language and the API
+    version, so re-analyzing an edited book or a sequel only misses on chunks
+    whose text actually changed. The least recently used entries are evicted
+    once the stored data exceeds ``max_size_bytes``.
+    """
+
+    # Check the total size after this many writes rather than after every one
+    EVICTION_CHECK_INTERVAL = 100
+
+    def __init__(self, db_path: Path, max_size_bytes: int = 256 * 1024 * 1024):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            db_path: Path to the SQLite database file
+            max_size_bytes: Size of stored phrase data above which old entries are evicted
+        """
+        self.db_path = db_path
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        self._writes_since_check = 0
+        self._lock = threading.Lock()
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS key_phrases ("
+            "key TEXT PRIMARY KEY, phrases TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS key_phrases_last_used ON key_phrases (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(text: str, language: str, api_version: str) -> str:
+        """Build the cache key for a chunk of text."""
+        return hashlib.sha256(f"{api_version}\0{language}\0{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """Look up the key phrases for a chunk key, counting the hit or miss."""
+        with self._lock:
+            row = self._conn.execute("SELECT phrases FROM key_phrases WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._conn.execute("UPDATE key_phrases SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+
+        phrases = json.loads(row[0])
+        return phrases if isinstance(phrases, list) else []
+
+    def put(self, key: str, phrases: List[str]) -> None:
+        """Store the key phrases for a chunk key."""
+        data = json.dumps(phrases, ensure_ascii=False, separators=(",", ":"))
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO key_phrases (key, phrases, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(key) + len(data.encode("utf-8")), now, now),
+            )
+            self._conn.commit()
+
+            self._writes_since_check += 1
+            if self._writes_since_check >= self.EVICTION_CHECK_INTERVAL:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache fits its size limit."""
+        self._writes_since_check = 0
+        total_size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM key_phrases").fetchone()[0]
+        if total_size <= self.max_size_bytes:
+            return
+
+        excess = total_size - self.max_size_bytes
+        freed = 0
+        stale_keys = []
+        for key, size in self._conn.execute("SELECT key, size FROM key_phrases ORDER BY last_used"):
+            stale_keys.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+
+        self._conn.executemany("DELETE FROM key_phrases WHERE key = ?", stale_keys)
+        self._conn.commit()
+        logger.info(f"🧹 Evicted {len(stale_keys)} key phrase cache entries ({freed:,} bytes)")
+
+    def get_stats(self) -> CacheStats:
+        """Get hit and miss counts since the cache was opened or last reset."""
+        return CacheStats(hits=self.hits, misses=self.misses)
+
+    def reset_stats(self) -> None:
+        """Reset hit and miss counts."""
+        self.hits = 0
+        self.misses = 0
+
+    def close(self) -> None:
+        """Enforce the size limit and close the database."""
+        with self._lock:
+            self._evict()
+            self._conn.close()
@@ -0,0 +1,79 @@
+"""Latency histograms of providers, for deciding how long to wait for them."""
+
+import bisect
+import threading
+from typing import List, NamedTuple
+
+# Bucket upper bounds grow by 25% from 1 ms to over 5 minutes, so quantiles are within 25%
+SMALLEST_BUCKET = 0.001
+BUCKET_GROWTH = 1.25
+BUCKET_COUNT = 58
+
+# Counts are halved once this many samples were recorded, so old latencies fade out
+DECAY_AFTER = 1000
+
+
+class LatencySummary(NamedTuple):
+    """Quantiles of a latency histogram, in seconds."""
+
+    samples: int
+    p50: float
+    p95: float
+
+
+class LatencyHistogram:
+    """
+    Histogram of latencies with logarithmic buckets.
+
+    Recording is constant time and the memory is fixed. Counts decay, so
+    quantiles follow a provider whose latency changes during a run.
+    """
+
+    def __init__(self) -> None:
+        self.bounds: List[float] = [SMALLEST_BUCKET * BUCKET_GROWTH**i for i in range(BUCKET_COUNT)]
+        self._counts = [0.0] * (BUCKET_COUNT + 1)  # the last bucket holds anything slower
+        self._total = 0.0
+        self._recorded = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Add a latency."""
+        bucket = bisect.bisect_left(self.bounds, seconds)
+        with self._lock:
+            self._counts[bucket] += 1
+            self._total += 1
+            self._recorded += 1
+            if self._recorded % DECAY_AFTER == 0:
+                self._counts = [count / 2 for count in self._counts]
+                self._total /= 2
+
+    @property
+    def count(self) -> int:
+        """Number of latencies recorded."""
+        with self._lock:
+            return self._recorded
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a latency quantile.
+
+        Args:
+            q: Quantile between 0 and 1, e.g. 0.95
+
+        Returns:
+            Upper bound of the bucket holding the quantile, in seconds; 0 if nothing was recorded
+        """
+        with self._lock:
+            if not self._total:
+                return 0.0
+            rank = q * self._total
+            cumulative = 0.0
+            for bucket, count in enumerate(self._counts):
+                cumulative += count
+                if count and cumulative >= rank:
+                    return self.bounds[min(bucket, BUCKET_COUNT - 1)]
+            return self.bounds[-1]
+
+    def summary(self) -> LatencySummary:
+        """Get the count, median and 95th percentile."""
+        return LatencySummary(self.count, self.quantile(0.5), self.quantile(0.95))
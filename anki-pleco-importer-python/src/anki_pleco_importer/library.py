@@ -0,0 +1,287 @@
+"""Corpus database of book word frequencies and batch analysis of a library of EPUBs."""
+
+import logging
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from .epub_analyzer import DEFAULT_CACHE_DIR, KEY_PHRASE_CACHE_FILENAME, ChineseEPUBAnalyzer
+from .hsk import HSKWordLists
+from .key_phrase_cache import KeyPhraseCache
+from .sources import SUPPORTED_SUFFIXES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CORPUS_DB = Path.home() / ".anki_pleco_importer" / "corpus.sqlite3"
+
+
+class LibraryBook(NamedTuple):
+    """A book whose word frequencies are stored in the corpus database."""
+
+    book_id: int
+    path: str
+    title: str
+    segmenter: str
+    total_words: int
+    unique_words: int
+
+
+class BookReadability(NamedTuple):
+    """How readable a book is with a given set of known words."""
+
+    book: LibraryBook
+    coverage: float  # percentage of the book's words already known
+    words_needed: Dict[int, int]  # target coverage percentage -> unknown words to learn
+
+
+class BookResult(NamedTuple):
+    """Outcome of analyzing one book in the worker pool."""
+
+    path: Path
+    title: str
+    word_frequencies: Dict[str, int]
+    error: Optional[str]
+
+
+class CorpusDatabase:
+    """
+    SQLite store of the word frequencies of every analyzed book.
+
+    Books are identified by their resolved path and re-analyzed only when the
+    file size, modification time or segmenter changes, so coverage against a
+    grown Anki deck is recomputed from stored frequencies alone.
+    """
+
+    def __init__(self, db_path: Path = DEFAULT_CORPUS_DB):
+        """
+        Open (or create) the corpus database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS books ("
+            "book_id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE, title TEXT NOT NULL, "
+            "segmenter TEXT NOT NULL, file_size INTEGER NOT NULL, file_mtime_ns INTEGER NOT NULL, "
+            "total_words INTEGER NOT NULL, unique_words INTEGER NOT NULL, analyzed REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS word_frequencies ("
+            "book_id INTEGER NOT NULL REFERENCES books (book_id) ON DELETE CASCADE, "
+            "word TEXT NOT NULL, frequency INTEGER NOT NULL, PRIMARY KEY (book_id, word)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _book_key(path: Path) -> str:
+        """Identify a book file independently of the working directory."""
+        return str(path.resolve())
+
+    def get_book(self, path: Path) -> Optional[LibraryBook]:
+        """Look up a stored book by path."""
+        row = self._conn.execute(
+            "SELECT book_id, path, title, segmenter, total_words, unique_words FROM books WHERE path = ?",
+            (self._book_key(path),),
+        ).fetchone()
+        return LibraryBook(*row) if row else None
+
+    def is_current(self, path: Path, segmenter: str) -> bool:
+        """Check whether the stored frequencies of a book match the file and segmenter."""
+        row = self._conn.execute(
+            "SELECT segmenter, file_size, file_mtime_ns FROM books WHERE path = ?", (self._book_key(path),)
+        ).fetchone()
+        if row is None:
+            return False
+        stat = path.stat()
+        return tuple(row) == (segmenter, stat.st_size, stat.st_mtime_ns)
+
+    def store_book(self, path: Path, title: str, segmenter: str, word_frequencies: Dict[str, int]) -> LibraryBook:
+        """
+        Store (or replace) the word frequencies of a book.
+
+        Args:
+            path: Path to the book file
+            title: Book title
+            segmenter: Segmenter the frequencies were extracted with
+            word_frequencies: Word frequency dictionary
+
+        Returns:
+            The stored book
+        """
+        stat = path.stat()
+        with self._conn:
+            self._conn.execute("DELETE FROM books WHERE path = ?", (self._book_key(path),))
+            cursor = self._conn.execute(
+                "INSERT INTO books (path, title, segmenter, file_size, file_mtime_ns, total_words, unique_words, "
+                "analyzed) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self._book_key(path),
+                    title,
+                    segmenter,
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                    sum(word_frequencies.values()),
+                    len(word_frequencies),
+                    time.time(),
+                ),
+            )
+            book_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO word_frequencies (book_id, word, frequency) VALUES (?, ?, ?)",
+                ((book_id, word, frequency) for word, frequency in word_frequencies.items()),
+            )
+
+        book = self.get_book(path)
+        assert book is not None
+        return book
+
+    def get_books(self) -> List[LibraryBook]:
+        """List all stored books."""
+        rows = self._conn.execute(
+            "SELECT book_id, path, title, segmenter, total_words, unique_words FROM books ORDER BY title"
+        )
+        return [LibraryBook(*row) for row in rows]
+
+    def get_word_frequencies(self, book_id: int) -> Dict[str, int]:
+        """Get the stored word frequencies of a book."""
+        rows = self._conn.execute("SELECT word, frequency FROM word_frequencies WHERE book_id = ?", (book_id,))
+        return dict(rows)
+
+    def close(self) -> None:
+        """Close the database."""
+        self._conn.close()
+
+
+def find_books(directory: Path) -> List[Path]:
+    """Find the EPUB, text and subtitle files in a directory and its subdirectories, sorted by path."""
+    return sorted(path for path in directory.rglob("*") if path.suffix.lower() in SUPPORTED_SUFFIXES and path.is_file())
+
+
+# Per-process analyzer used by the process pool workers
+_worker_analyzer: Optional[ChineseEPUBAnalyzer] = None
+
+
+def _init_worker(
+    hsk_word_lists: HSKWordLists, segmenter: str, cache_dir: Optional[Path], user_words: List[str]
+) -> None:
+    """Create the analyzer (and its Azure client or dictionary) once per worker process."""
+    global _worker_analyzer
+    _worker_analyzer = ChineseEPUBAnalyzer(
+        hsk_word_lists, cache_dir=cache_dir, segmenter=segmenter, user_words=set(user_words)
+    )
+
+
+def _analyze_book_in_worker(path: Path) -> BookResult:
+    """Extract the title and word frequencies of one book with the worker's analyzer."""
+    assert _worker_analyzer is not None
+    try:
+        title, book = _worker_analyzer.open_source(path)
+        if title == "Unknown":
+            title = path.stem
+        word_frequencies, _ = _worker_analyzer.extract_word_frequencies(book)
+        return BookResult(path, title, word_frequencies, None)
+    except Exception as e:
+        return BookResult(path, "", {}, str(e))
+
+
+def analyze_books_in_pool(
+    paths: Iterable[Path],
+    hsk_word_lists: HSKWordLists,
+    workers: int,
+    segmenter: str = "azure",
+    cache_dir: Optional[Path] = None,
+    user_words: Optional[Iterable[str]] = None,
+) -> Iterator[BookResult]:
+    """
+    Extract the word frequencies of several books, one book per worker process.
+
+    Args:
+        paths: EPUB, text or subtitle files to analyze
+        hsk_word_lists: HSK word lists, loaded once and shared with the workers
+        workers: Number of worker processes
+        segmenter: Vocabulary extraction backend, "azure", "local" or "ngram"
+        cache_dir: Azure key phrase cache directory, shared by all workers
+        user_words: Extra words (e.g. proper names) for the local segmenter
+
+    Yields:
+        Book results in order of completion
+    """
+    with ProcessPoolExecutor(
+        max_workers=max(1, workers),
+        initializer=_init_worker,
+        initargs=(hsk_word_lists, segmenter, cache_dir, list(user_words or [])),
+    ) as executor:
+        futures = [executor.submit(_analyze_book_in_worker, path) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+    # Worker processes exit without closing their analyzers, so the cache size limit is enforced here
+    if segmenter == "azure":
+        KeyPhraseCache((cache_dir or DEFAULT_CACHE_DIR) / KEY_PHRASE_CACHE_FILENAME).close()
+
+
+def rank_books(
+    corpus: CorpusDatabase,
+    books: Iterable[LibraryBook],
+    known_words: Set[str],
+    analyzer: ChineseEPUBAnalyzer,
+    targets: List[int] = [95, 98],
+    sort_by: str = "coverage",
+) -> List[BookReadability]:
+    """
+    Calculate the readability of stored books, most readable first.
+
+    Args:
+        corpus: Corpus database holding the word frequencies
+        books: Books to rank
+        known_words: Set of words already known
+        analyzer: Analyzer used for the coverage calculation
+        targets: Target coverage percentages to count the words needed for
+        sort_by: "coverage" to rank by current coverage, or one of the targets
+            (e.g. "95") to rank by the fewest words needed to reach it
+
+    Returns:
+        Book readability, most readable first
+    """
+    readability = []
+    for book in books:
+        word_frequencies = corpus.get_word_frequencies(book.book_id)
+        coverage_targets, _ = analyzer.calculate_coverage(word_frequencies, known_words, targets)
+        current_coverage = next(iter(coverage_targets.values())).current_coverage if coverage_targets else 0.0
+        words_needed = {target: result.words_needed for target, result in coverage_targets.items()}
+        readability.append(BookReadability(book, current_coverage, words_needed))
+
+    if sort_by == "coverage":
+        readability.sort(key=lambda r: (-r.coverage, *(r.words_needed[target] for target in targets)))
+    else:
+        readability.sort(key=lambda r: (r.words_needed[int(sort_by)], -r.coverage))
+    return readability
+
+
+def split_current_books(
+    corpus: CorpusDatabase, paths: Iterable[Path], segmenter: str, reanalyze: bool = False
+) -> Tuple[List[Path], List[Path]]:
+    """
+    Split book files into those with up to date stored frequencies and those to analyze.
+
+    Args:
+        corpus: Corpus database
+        paths: Book files
+        segmenter: Segmenter the frequencies should have been extracted with
+        reanalyze: Treat every book as needing analysis
+
+    Returns:
+        Tuple of (current paths, paths to analyze)
+    """
+    current: List[Path] = []
+    stale: List[Path] = []
+    for path in paths:
+        (current if not reanalyze and corpus.is_current(path, segmenter) else stale).append(path)
+    return current, stale
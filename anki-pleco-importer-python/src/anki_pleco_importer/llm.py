@@ -6,6 +6,11 @@ from abc import ABC, abstractmethod
 from typing import Optional, Dict, Any
 from pydantic import BaseModel
 
+from .http_client import DEFAULT_MAX_RETRIES, RateLimitedClient
+
+# Card fields are generated one word at a time, a few in flight at most
+OPENAI_MAX_CONCURRENCY = 4
+
 
 class TokenUsage(BaseModel):
     """Token usage information from an LLM API call."""
@@ -49,10 +54,14 @@ class GptFieldGenerator(FieldGenerator):
         api_key: Optional[str] = None,
         prompt_path: Optional[str] = None,
         thinking: Optional[Dict[str, Any]] = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
     ) -> None:
-        from openai import OpenAI
+        from openai import APIConnectionError, APIStatusError, OpenAI
 
-        self.client = OpenAI(api_key=api_key) if api_key else OpenAI()
+        # Retries are made by http_client, which also adapts to throttling, not by the SDK
+        self.client = OpenAI(api_key=api_key, max_retries=0) if api_key else OpenAI(max_retries=0)
+        self.http = RateLimitedClient("openai", max_concurrency=OPENAI_MAX_CONCURRENCY, max_retries=max_retries)
+        self._retryable_errors = (APIConnectionError, APIStatusError)
         self.model = model
         self.thinking = thinking
         self.prompt = ""
@@ -123,7 +132,11 @@ class GptFieldGenerator(FieldGenerator):
         if self.thinking:
             kwargs["thinking"] = self.thinking
 
-        response = self.client.chat.completions.create(**kwargs)
+        response = self.http.call(
+            self.client.base_url.host,
+            lambda: self.client.chat.completions.create(**kwargs),
+            retry_on=self._retryable_errors,
+        )
         content = response.choices[0].message.content
         data = json.loads(content)
         
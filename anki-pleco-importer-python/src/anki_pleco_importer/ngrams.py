@@ -0,0 +1,275 @@
+"""Count and score Chinese character n-grams of a text without any external service."""
+
+import logging
+import re
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CHINESE_RUN_PATTERN = re.compile(r"[\u4e00-\u9fff]+")
+
+# CJK code points fit in 16 bits, so an n-gram of up to 4 characters packs into one uint64
+BITS_PER_CHARACTER = 16
+MAX_NGRAM_LENGTH = 4
+
+# Code placed between runs of Chinese characters; n-grams never span it
+SEPARATOR = 0
+
+# Defaults for keeping word-like n-grams: both neighbours must vary, and the
+# characters must co-occur more often than chance however the n-gram is split
+DEFAULT_MIN_ENTROPY = 1.5
+DEFAULT_MIN_COHESION = 2.0
+
+
+class NgramScore(NamedTuple):
+    """Frequency and word-likeness scores of an n-gram."""
+
+    ngram: str
+    frequency: int
+    left_entropy: float  # entropy (nats) of the characters preceding the n-gram
+    right_entropy: float  # entropy (nats) of the characters following the n-gram
+    cohesion: float  # minimum pointwise mutual information over the ways to split the n-gram
+
+
+def encode_text(text: str) -> np.ndarray:
+    """Get the code points of the Chinese runs of a text, each run followed by SEPARATOR."""
+    runs = CHINESE_RUN_PATTERN.findall(text)
+    if not runs:
+        return np.zeros(0, dtype=np.uint64)
+    joined = "\0".join(runs) + "\0"
+    return np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+
+
+def ngram_keys(codes: np.ndarray, length: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pack every n-gram of encoded text into an integer key.
+
+    Args:
+        codes: Encoded text from encode_text
+        length: N-gram length, at most MAX_NGRAM_LENGTH
+
+    Returns:
+        Tuple of (start positions, keys) of the n-grams that do not span a separator
+    """
+    count = len(codes) - length + 1
+    if count <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint64)
+
+    keys = np.zeros(count, dtype=np.uint64)
+    valid = np.ones(count, dtype=bool)
+    for offset in range(length):
+        part = codes[offset : offset + count]
+        keys = (keys << np.uint64(BITS_PER_CHARACTER)) | part
+        valid &= part != SEPARATOR
+
+    positions = np.flatnonzero(valid)
+    return positions, keys[positions]
+
+
+def decode_key(key: int, length: int) -> str:
+    """Unpack an n-gram key into its characters."""
+    mask = (1 << BITS_PER_CHARACTER) - 1
+    return "".join(chr((int(key) >> (BITS_PER_CHARACTER * (length - 1 - i))) & mask) for i in range(length))
+
+
+def _branching_entropy(group_ids: np.ndarray, neighbours: np.ndarray, group_count: int) -> np.ndarray:
+    """Entropy of the neighbour distribution of each group, from one (group, neighbour) pair per occurrence."""
+    pairs, pair_counts = np.unique(
+        (group_ids.astype(np.uint64) << np.uint64(BITS_PER_CHARACTER)) | neighbours, return_counts=True
+    )
+    groups = (pairs >> np.uint64(BITS_PER_CHARACTER)).astype(np.int64)
+    totals = np.bincount(groups, weights=pair_counts, minlength=group_count)
+    weighted = np.bincount(groups, weights=pair_counts * np.log(pair_counts), minlength=group_count)
+    safe_totals = np.maximum(totals, 1)
+    return np.log(safe_totals) - weighted / safe_totals
+
+
+class NgramCounter:
+    """
+    Exact n-gram counts over texts added one at a time (e.g. chapters).
+
+    All n-grams of a length are packed into integer keys and counted with
+    one sort, so counting a book is O(n log n) in numpy rather than a
+    Python loop over substrings. Word-likeness is scored with the
+    branching entropy of the neighbouring characters and the cohesion
+    (minimum pointwise mutual information) of the n-gram's parts.
+    """
+
+    def __init__(self, min_length: int = 2, max_length: int = MAX_NGRAM_LENGTH):
+        """
+        Initialize an empty counter.
+
+        Args:
+            min_length: Shortest n-gram to report
+            max_length: Longest n-gram to report, at most MAX_NGRAM_LENGTH
+        """
+        if not 1 <= min_length <= max_length <= MAX_NGRAM_LENGTH:
+            raise ValueError(f"N-gram lengths must satisfy 1 <= min_length <= max_length <= {MAX_NGRAM_LENGTH}")
+        self.min_length = min_length
+        self.max_length = max_length
+        self._texts: List[np.ndarray] = []
+        self._codes: Optional[np.ndarray] = None
+
+    def add_text(self, text: str) -> None:
+        """Add the Chinese characters of a text."""
+        self._texts.append(encode_text(text))
+        self._codes = None
+
+    @property
+    def codes(self) -> np.ndarray:
+        """Encoded characters of all texts added so far."""
+        if self._codes is None:
+            self._codes = np.concatenate(self._texts) if self._texts else np.zeros(0, dtype=np.uint64)
+        return self._codes
+
+    @property
+    def character_count(self) -> int:
+        """Number of Chinese characters added."""
+        return int(np.count_nonzero(self.codes))
+
+    def _count_keys(self, length: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the sorted distinct keys of all n-grams of a length and their counts."""
+        _, keys = ngram_keys(self.codes, length)
+        distinct_keys, counts = np.unique(keys, return_counts=True)
+        return distinct_keys, counts
+
+    def count(self, min_frequency: int = 3) -> Dict[str, int]:
+        """
+        Count every n-gram occurring at least min_frequency times.
+
+        Args:
+            min_frequency: Minimum number of occurrences
+
+        Returns:
+            Dictionary mapping n-grams to their frequencies, ordered by length then key
+        """
+        frequencies: Dict[str, int] = {}
+        for length in range(self.min_length, self.max_length + 1):
+            keys, counts = self._count_keys(length)
+            frequent = counts >= min_frequency
+            for key, count in zip(keys[frequent].tolist(), counts[frequent].tolist()):
+                frequencies[decode_key(key, length)] = count
+        return frequencies
+
+    def score(self, min_frequency: int = 3) -> List[NgramScore]:
+        """
+        Count and score every n-gram occurring at least min_frequency times.
+
+        Args:
+            min_frequency: Minimum number of occurrences
+
+        Returns:
+            N-gram scores ordered by descending frequency
+        """
+        codes = self.codes
+        total = max(self.character_count, 1)
+        sub_counts = {length: self._count_keys(length) for length in range(1, self.max_length)}
+        scores: List[NgramScore] = []
+
+        for length in range(self.min_length, self.max_length + 1):
+            positions, keys = ngram_keys(codes, length)
+            unique_keys, gram_ids, counts = np.unique(keys, return_inverse=True, return_counts=True)
+            frequent = np.flatnonzero(counts >= min_frequency)
+            if not len(frequent):
+                continue
+
+            # Neighbours of each occurrence; separators count as a boundary neighbour
+            right = codes[positions + length]
+            left = np.where(positions > 0, codes[np.maximum(positions - 1, 0)], SEPARATOR).astype(np.uint64)
+            right_entropy = _branching_entropy(gram_ids, right, len(unique_keys))[frequent]
+            left_entropy = _branching_entropy(gram_ids, left, len(unique_keys))[frequent]
+
+            # Cohesion: the weakest split into a prefix and suffix
+            frequent_keys = unique_keys[frequent]
+            frequent_counts = counts[frequent].astype(np.float64)
+            cohesion = np.full(len(frequent), np.inf)
+            for split in range(1, length):
+                suffix_length = length - split
+                prefixes = frequent_keys >> np.uint64(BITS_PER_CHARACTER * suffix_length)
+                suffixes = frequent_keys & np.uint64((1 << (BITS_PER_CHARACTER * suffix_length)) - 1)
+                prefix_counts = self._lookup(sub_counts[split], prefixes)
+                suffix_counts = self._lookup(sub_counts[suffix_length], suffixes)
+                pmi = np.log(frequent_counts * total / (prefix_counts * suffix_counts))
+                cohesion = np.minimum(cohesion, pmi)
+            if length == 1:
+                cohesion = np.zeros(len(frequent))
+
+            for key, count, left_h, right_h, pmi in zip(
+                frequent_keys.tolist(),
+                counts[frequent].tolist(),
+                left_entropy.tolist(),
+                right_entropy.tolist(),
+                cohesion.tolist(),
+            ):
+                scores.append(NgramScore(decode_key(key, length), count, left_h, right_h, pmi))
+
+        scores.sort(key=lambda score: (-score.frequency, score.ngram))
+        logger.info(f"Scored {len(scores):,} n-grams occurring {min_frequency}+ times in {total:,} characters")
+        return scores
+
+    @staticmethod
+    def _lookup(sorted_counts: Tuple[np.ndarray, np.ndarray], keys: np.ndarray) -> np.ndarray:
+        """Look up the counts of keys that are known to occur."""
+        sorted_keys, counts = sorted_counts
+        return counts[np.searchsorted(sorted_keys, keys)].astype(np.float64)
+
+    def count_words_by_text(self, words: Iterable[str]) -> Iterator[Counter]:
+        """
+        Count given n-grams in each added text separately.
+
+        Args:
+            words: N-grams to count, e.g. the words kept by select_words
+
+        Yields:
+            A counter of the words occurring in each text, in the order the texts were added
+        """
+        words = list(words)
+        packed = {length: pack_words(words, length) for length in range(1, MAX_NGRAM_LENGTH + 1)}
+        for codes in self._texts:
+            counts: Counter = Counter()
+            for length, word_keys in packed.items():
+                if not len(word_keys):
+                    continue
+                _, keys = ngram_keys(codes, length)
+                keys, key_counts = np.unique(keys[np.isin(keys, word_keys)], return_counts=True)
+                for key, count in zip(keys.tolist(), key_counts.tolist()):
+                    counts[decode_key(key, length)] = count
+            yield counts
+
+
+def select_words(
+    scores: Iterable[NgramScore],
+    min_entropy: float = DEFAULT_MIN_ENTROPY,
+    min_cohesion: float = DEFAULT_MIN_COHESION,
+) -> Dict[str, int]:
+    """
+    Keep the word-like n-grams.
+
+    Args:
+        scores: Scored n-grams
+        min_entropy: Minimum left and right branching entropy
+        min_cohesion: Minimum cohesion
+
+    Returns:
+        Dictionary mapping the kept n-grams to their frequencies
+    """
+    return {
+        score.ngram: score.frequency
+        for score in scores
+        if min(score.left_entropy, score.right_entropy) >= min_entropy and score.cohesion >= min_cohesion
+    }
+
+
+def pack_words(words: Iterable[str], length: int) -> np.ndarray:
+    """Pack the words of one length into sorted n-gram keys, like ngram_keys packs text."""
+    keys = []
+    for word in words:
+        if len(word) == length:
+            key = 0
+            for character in word:
+                key = (key << BITS_PER_CHARACTER) | ord(character)
+            keys.append(key)
+    return np.unique(np.array(keys, dtype=np.uint64))
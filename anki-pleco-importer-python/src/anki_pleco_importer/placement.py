@@ -0,0 +1,98 @@
+"""Place files from the audio cache elsewhere without copying their content when possible."""
+
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+try:
+    import fcntl
+
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Strategies in order of preference; "copy" always works and is the fallback of the others
+PLACEMENT_STRATEGIES = ("hardlink", "reflink", "symlink", "copy")
+DEFAULT_PLACEMENT = "hardlink"
+
+# Linux ioctl cloning a whole file copy-on-write (btrfs, XFS, bcachefs ...)
+FICLONE = 0x40049409
+
+
+def _reflink(source: Path, destination: Path) -> None:
+    """Clone a file copy-on-write, raising OSError where the filesystem cannot."""
+    if not FCNTL_AVAILABLE:
+        raise OSError("Reflinks need fcntl")
+    with open(source, "rb") as source_file, open(destination, "wb") as destination_file:
+        fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+    shutil.copystat(source, destination)
+
+
+def _create(source: Path, destination: Path, strategy: str) -> None:
+    """Create destination from source with one strategy, without fallback."""
+    if strategy == "hardlink":
+        os.link(source, destination)
+    elif strategy == "reflink":
+        _reflink(source, destination)
+    elif strategy == "symlink":
+        os.symlink(source.resolve(), destination)
+    else:
+        shutil.copy2(source, destination)
+
+
+def is_same_file(source: Path, destination: Path) -> bool:
+    """Check whether two paths already lead to the same file."""
+    try:
+        return os.path.samefile(source, destination)
+    except OSError:
+        return False
+
+
+def place_file(source: Path, destination: Path, strategy: str = DEFAULT_PLACEMENT) -> str:
+    """
+    Make a file available at another path.
+
+    The destination is written under a temporary name and moved into place,
+    so an existing destination is replaced atomically. A strategy the
+    filesystem does not support (hard links across devices, reflinks
+    outside copy-on-write filesystems) falls back to copying.
+
+    Args:
+        source: Existing file
+        destination: Path the file should be available at
+        strategy: One of PLACEMENT_STRATEGIES
+
+    Returns:
+        The strategy actually used, or "existing" if destination already was the same file
+    """
+    if strategy not in PLACEMENT_STRATEGIES:
+        raise ValueError(f"Unknown placement strategy: {strategy} (choose from {', '.join(PLACEMENT_STRATEGIES)})")
+    source, destination = Path(source), Path(destination)
+    if destination.is_symlink():
+        if strategy == "symlink" and destination.resolve() == source.resolve():
+            return "existing"
+    elif is_same_file(source, destination):
+        return "existing"
+
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(prefix=f".{destination.name}.", dir=destination.parent)
+    os.close(fd)
+    temp_path = Path(temp_name)
+    try:
+        for attempt in (strategy, "copy"):
+            temp_path.unlink(missing_ok=True)
+            try:
+                _create(source, temp_path, attempt)
+                break
+            except OSError as e:
+                if attempt == "copy":
+                    raise
+                logger.debug(f"Cannot {attempt} {source} to {destination}, copying instead: {e}")
+        os.replace(temp_path, destination)
+        return attempt
+    finally:
+        temp_path.unlink(missing_ok=True)
@@ -0,0 +1,143 @@
+"""Plan which words to learn next to maximize coverage across several books."""
+
+import heapq
+import logging
+from typing import Dict, List, Mapping, NamedTuple, Set
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Gains below this (as a fraction of a book) are rounding noise from capped books
+MIN_GAIN = 1e-12
+
+
+class PlannedWord(NamedTuple):
+    """A word in the learning plan with the coverage it adds."""
+
+    word: str
+    gain: float  # coverage percentage points gained, summed over books
+    book_gains: Dict[str, float]  # book -> coverage percentage points gained in that book
+
+
+class LearningPlan(NamedTuple):
+    """Ordered words to learn and the resulting per-book coverage."""
+
+    words: List[PlannedWord]
+    initial_coverage: Dict[str, float]  # book -> coverage percentage before learning
+    final_coverage: Dict[str, float]  # book -> coverage percentage after learning every planned word
+
+
+class WordBookMatrix:
+    """
+    Sparse word x book matrix of unknown word frequencies.
+
+    Stored row-wise (CSR): the books and frequencies of word ``i`` are
+    ``book_indices[offsets[i]:offsets[i + 1]]`` and the matching slice of
+    ``fractions``, each as the fraction of that book's words.
+    """
+
+    def __init__(self, book_frequencies: Mapping[str, Mapping[str, int]], known_words: Set[str]):
+        """
+        Build the matrix from per-book word frequencies.
+
+        Args:
+            book_frequencies: Book name -> word frequency dictionary
+            known_words: Words already known, left out of the matrix
+        """
+        self.books = list(book_frequencies)
+        totals = np.array([sum(frequencies.values()) for frequencies in book_frequencies.values()], dtype=np.float64)
+        known_counts = np.array(
+            [
+                sum(freq for word, freq in frequencies.items() if word in known_words)
+                for frequencies in book_frequencies.values()
+            ],
+            dtype=np.float64,
+        )
+        self.initial_coverage = np.divide(known_counts, totals, out=np.zeros_like(totals), where=totals > 0)
+
+        # Group (book, frequency) entries by unknown word
+        entries: Dict[str, List[tuple]] = {}
+        for book_index, frequencies in enumerate(book_frequencies.values()):
+            for word, freq in frequencies.items():
+                if word not in known_words:
+                    entries.setdefault(word, []).append((book_index, freq))
+
+        self.words = list(entries)
+        self.offsets = np.zeros(len(self.words) + 1, dtype=np.int64)
+        self.offsets[1:] = np.cumsum([len(word_entries) for word_entries in entries.values()])
+        pairs = [pair for word_entries in entries.values() for pair in word_entries]
+        self.book_indices = np.array([book_index for book_index, _ in pairs], dtype=np.int64)
+        counts = np.array([freq for _, freq in pairs], dtype=np.float64)
+        self.fractions = counts / totals[self.book_indices] if pairs else counts
+
+        logger.info(f"Built word matrix: {len(self.words):,} unknown words x {len(self.books)} books")
+
+
+def plan_learning(matrix: WordBookMatrix, count: int, target_coverage: float = 98.0) -> LearningPlan:
+    """
+    Choose the words that add the most coverage summed over all books.
+
+    Each book only counts coverage up to the target, so words that matter
+    only to an already readable book lose value as the plan grows. Gains can
+    therefore only shrink, which makes lazy greedy selection exact: a word
+    is popped from a max-heap of stale gains, re-scored, and accepted only if
+    it still beats the next stale gain, so most words are never re-scored.
+
+    Args:
+        matrix: Sparse word x book matrix of unknown words
+        count: Number of words to plan
+        target_coverage: Coverage percentage beyond which a book gains nothing
+
+    Returns:
+        Learning plan with words in the order to learn them
+    """
+    target = target_coverage / 100
+    coverage = matrix.initial_coverage.copy()
+    remaining = np.maximum(target - coverage, 0.0)
+
+    # Initial gains of all words at once: per-book fractions capped by what each book still needs
+    capped = np.minimum(matrix.fractions, remaining[matrix.book_indices])
+    starts = matrix.offsets[:-1]
+    gains = np.add.reduceat(capped, starts) if len(capped) else np.zeros(len(matrix.words))
+
+    heap = [(-gain, index) for index, gain in enumerate(gains.tolist()) if gain > MIN_GAIN]
+    heapq.heapify(heap)
+
+    planned: List[PlannedWord] = []
+    rescored = 0
+    while heap and len(planned) < count:
+        _, index = heapq.heappop(heap)
+        start, end = matrix.offsets[index], matrix.offsets[index + 1]
+        book_indices = matrix.book_indices[start:end]
+        book_gains = np.minimum(matrix.fractions[start:end], remaining[book_indices])
+        gain = float(book_gains.sum())
+        rescored += 1
+
+        if gain <= MIN_GAIN:
+            continue
+        if heap and gain < -heap[0][0]:
+            heapq.heappush(heap, (-gain, index))
+            continue
+
+        remaining[book_indices] = np.maximum(remaining[book_indices] - book_gains, 0.0)
+        coverage[book_indices] += book_gains
+        planned.append(
+            PlannedWord(
+                word=matrix.words[index],
+                gain=gain * 100,
+                book_gains={
+                    matrix.books[book_index]: book_gain * 100
+                    for book_index, book_gain in zip(book_indices.tolist(), book_gains.tolist())
+                    if book_gain > MIN_GAIN
+                },
+            )
+        )
+
+    logger.debug(f"Planned {len(planned)} words, re-scoring {rescored} of {len(matrix.words)} candidates")
+
+    return LearningPlan(
+        words=planned,
+        initial_coverage=dict(zip(matrix.books, (matrix.initial_coverage * 100).tolist())),
+        final_coverage=dict(zip(matrix.books, (coverage * 100).tolist())),
+    )
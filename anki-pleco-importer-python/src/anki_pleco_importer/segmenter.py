@@ -0,0 +1,196 @@
+"""Offline Chinese word segmentation over a bundled frequency dictionary."""
+
+import gzip
+import logging
+import lzma
+import math
+import re
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DICTIONARY = Path(__file__).parent / "data" / "segmenter_dict.txt.xz"
+
+# Frequency given to user words (Anki words, proper names) added without one
+DEFAULT_USER_WORD_FREQUENCY = 100
+
+
+class ChineseSegmenter:
+    """
+    Unigram word segmenter in the style of jieba.
+
+    For every run of Chinese characters a DAG of all dictionary words starting
+    at each position is built, and the segmentation maximizing the product of
+    word probabilities is picked by dynamic programming. Characters that do not
+    start any dictionary word become single-character tokens.
+    """
+
+    def __init__(self, dictionary_path: Optional[Path] = None, user_words: Optional[Iterable[str]] = None):
+        """
+        Load the frequency dictionary.
+
+        Args:
+            dictionary_path: Dictionary of "<word> <frequency>" lines, optionally gzip or xz compressed.
+                Defaults to the dictionary bundled with the package.
+            user_words: Extra words (e.g. proper names) that should be kept as single tokens
+        """
+        self.dictionary_path = dictionary_path or DEFAULT_DICTIONARY
+        self.chinese_pattern = re.compile(r"[\u4e00-\u9fff]+")
+        self.frequencies: Dict[str, int] = {}
+        self.total = 0
+
+        self._load_dictionary(self.dictionary_path)
+        for word in user_words or []:
+            self.add_word(word)
+
+        logger.info(f"Loaded {self.total:,} total frequency from {self.dictionary_path.name}")
+
+    def _load_dictionary(self, path: Path) -> None:
+        """Load word frequencies, registering every word prefix with frequency 0."""
+        opener = {".gz": gzip.open, ".xz": lzma.open}.get(path.suffix, open)
+        with opener(path, "rt", encoding="utf-8") as f:  # type: ignore[operator]
+            for line in f:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                parts = line.split()
+                word = parts[0]
+                frequency = int(parts[1]) if len(parts) > 1 else DEFAULT_USER_WORD_FREQUENCY
+                self._add(word, frequency)
+
+    def _add(self, word: str, frequency: int) -> None:
+        """Add a word and its prefixes to the dictionary."""
+        self.total += frequency - self.frequencies.get(word, 0)
+        self.frequencies[word] = frequency
+        for end in range(1, len(word)):
+            self.frequencies.setdefault(word[:end], 0)
+
+    def add_word(self, word: str, frequency: Optional[int] = None) -> None:
+        """
+        Add a word to the dictionary so that it is kept as a single token.
+
+        Args:
+            word: Word to add
+            frequency: Word frequency, defaults to DEFAULT_USER_WORD_FREQUENCY
+                (or the existing frequency if the word is already known)
+        """
+        if not word:
+            return
+        existing = self.frequencies.get(word, 0)
+        self._add(word, frequency if frequency is not None else max(existing, DEFAULT_USER_WORD_FREQUENCY))
+
+    def _build_dag(self, sentence: str) -> List[List[int]]:
+        """For each position, list the end positions of dictionary words starting there."""
+        frequencies = self.frequencies
+        length = len(sentence)
+        dag = []
+
+        for start in range(length):
+            ends = []
+            end = start
+            fragment = sentence[start]
+            while end < length and fragment in frequencies:
+                if frequencies[fragment]:
+                    ends.append(end)
+                end += 1
+                fragment = sentence[start : end + 1]
+            if not ends:
+                ends.append(start)
+            dag.append(ends)
+
+        return dag
+
+    def _cut_run(self, sentence: str) -> List[str]:
+        """Segment a run of Chinese characters."""
+        frequencies = self.frequencies
+        log_total = math.log(self.total)
+        dag = self._build_dag(sentence)
+        length = len(sentence)
+
+        # route[i] = (best log probability of sentence[i:], end of first word)
+        route: List[Tuple[float, int]] = [(0.0, 0)] * (length + 1)
+        for start in range(length - 1, -1, -1):
+            route[start] = max(
+                (math.log(frequencies.get(sentence[start : end + 1]) or 1) - log_total + route[end + 1][0], end)
+                for end in dag[start]
+            )
+
+        words = []
+        start = 0
+        while start < length:
+            end = route[start][1] + 1
+            words.append(sentence[start:end])
+            start = end
+        return words
+
+    def cut(self, text: str) -> Iterator[str]:
+        """
+        Segment text into Chinese words.
+
+        Non-Chinese characters are treated as separators and not returned.
+
+        Args:
+            text: Text to segment
+
+        Yields:
+            Chinese words in text order
+        """
+        for match in self.chinese_pattern.finditer(text):
+            yield from self._cut_run(match.group())
+
+    def count_tokens(self, text: str) -> Counter:
+        """Count the Chinese word tokens in a text."""
+        return Counter(self.cut(text))
+
+
+# Per-process segmenter used by the process pool workers
+_worker_segmenter: Optional[ChineseSegmenter] = None
+
+
+def _init_worker(dictionary_path: Optional[Path], user_words: List[str]) -> None:
+    """Load the dictionary once per worker process."""
+    global _worker_segmenter
+    _worker_segmenter = ChineseSegmenter(dictionary_path, user_words)
+
+
+def _count_tokens_in_worker(text: str) -> Counter:
+    """Count tokens with the worker's segmenter."""
+    assert _worker_segmenter is not None
+    return _worker_segmenter.count_tokens(text)
+
+
+def count_tokens_in_pool(
+    texts: Iterable[str],
+    workers: int,
+    dictionary_path: Optional[Path] = None,
+    user_words: Optional[Iterable[str]] = None,
+) -> Iterator[Counter]:
+    """
+    Count tokens of several texts (e.g. chapters) across a process pool.
+
+    Texts are submitted as they are read and results are yielded in input
+    order. At most two texts per worker are in flight, so memory stays
+    bounded by the largest texts rather than the whole input.
+
+    Args:
+        texts: Texts to segment
+        workers: Number of worker processes
+        dictionary_path: Dictionary to load in each worker
+        user_words: Extra words to add in each worker
+
+    Yields:
+        Token counters, one per text
+    """
+    in_flight: deque = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(dictionary_path, list(user_words or []))
+    ) as executor:
+        for text in texts:
+            in_flight.append(executor.submit(_count_tokens_in_worker, text))
+            while len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+
+        while in_flight:
+            yield in_flight.popleft().result()
@@ -0,0 +1,191 @@
+"""Find sentences with a given number of unknown words (i+1 sentences) for graded reading."""
+
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from .sentence_index import ChapterT, split_sentences
+
+logger = logging.getLogger(__name__)
+
+
+class SentenceMatch(NamedTuple):
+    """A sentence and the words in it that are not known yet."""
+
+    sentence_id: int
+    text: str
+    unknown_words: List[str]
+
+
+class UnknownWordIndex:
+    """
+    Segmented sentences of one text with the number of unknown words in each.
+
+    Each sentence is segmented once, when the index is built. The count of
+    distinct unknown words per sentence is kept in step with a snapshot of
+    the known words: when the deck changes, only the sentences posted under
+    newly learned (or removed) words are updated, through the inverted index
+    from words to sentences.
+    """
+
+    def __init__(self, db_path: Path):
+        """
+        Open (or create) the index database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS source (file_size INTEGER, file_mtime_ns INTEGER, settings TEXT);"
+            "CREATE TABLE IF NOT EXISTS sentences ("
+            "sentence_id INTEGER PRIMARY KEY, length INTEGER NOT NULL, text TEXT NOT NULL, "
+            "unknown_count INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS sentences_unknown ON sentences (unknown_count, length);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            "word TEXT NOT NULL, sentence_id INTEGER NOT NULL, PRIMARY KEY (word, sentence_id)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS postings_sentence ON postings (sentence_id);"
+            "CREATE TABLE IF NOT EXISTS known_words (word TEXT PRIMARY KEY) WITHOUT ROWID;"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _source_identity(source_path: Path, settings: str) -> Tuple[int, int, str]:
+        """Identify the current version of a source file and the segmentation settings."""
+        stat = source_path.stat()
+        return stat.st_size, stat.st_mtime_ns, settings
+
+    def is_current(self, source_path: Path, settings: str) -> bool:
+        """Check whether the index was built from this file with these segmentation settings."""
+        row = self._conn.execute("SELECT file_size, file_mtime_ns, settings FROM source").fetchone()
+        return row is not None and tuple(row) == self._source_identity(source_path, settings)
+
+    def build(
+        self,
+        chapters: Iterable[ChapterT],
+        tokenize: Callable[[str], Iterable[str]],
+        source_path: Path,
+        settings: str,
+    ) -> int:
+        """
+        Segment every sentence and rebuild the index, with no words known.
+
+        Args:
+            chapters: Chapters of the text
+            tokenize: Function splitting a sentence into the words to count
+            source_path: File the chapters were read from
+            settings: Description of the segmentation settings, stored to detect changes
+
+        Returns:
+            Number of indexed sentences
+        """
+        sentence_count = 0
+        with self._conn:
+            self._conn.execute("DELETE FROM source")
+            self._conn.execute("DELETE FROM postings")
+            self._conn.execute("DELETE FROM sentences")
+            self._conn.execute("DELETE FROM known_words")
+
+            for chapter in chapters:
+                _, _, text = chapter
+                for sentence in split_sentences(text):
+                    words = set(tokenize(sentence))
+                    if not words:
+                        continue
+                    cursor = self._conn.execute(
+                        "INSERT INTO sentences (length, text, unknown_count) VALUES (?, ?, ?)",
+                        (len(sentence), sentence, len(words)),
+                    )
+                    self._conn.executemany(
+                        "INSERT INTO postings (word, sentence_id) VALUES (?, ?)",
+                        ((word, cursor.lastrowid) for word in words),
+                    )
+                    sentence_count += 1
+
+            self._conn.execute(
+                "INSERT INTO source (file_size, file_mtime_ns, settings) VALUES (?, ?, ?)",
+                self._source_identity(source_path, settings),
+            )
+
+        logger.info(f"📝 Segmented and indexed {sentence_count:,} sentences")
+        return sentence_count
+
+    def update_known_words(self, known_words: Set[str]) -> int:
+        """
+        Bring the unknown word counts in line with a new set of known words.
+
+        Only sentences containing words that became known (or unknown again)
+        since the last update are touched.
+
+        Args:
+            known_words: All words known now
+
+        Returns:
+            Number of sentence counts updated
+        """
+        vocabulary = {word for (word,) in self._conn.execute("SELECT DISTINCT word FROM postings")}
+        previous = {word for (word,) in self._conn.execute("SELECT word FROM known_words")}
+        current = known_words & vocabulary
+        learned = current - previous
+        forgotten = previous - current
+
+        touched = 0
+        with self._conn:
+            for words, delta in ((learned, -1), (forgotten, 1)):
+                for word in words:
+                    cursor = self._conn.execute(
+                        "UPDATE sentences SET unknown_count = unknown_count + ? "
+                        "WHERE sentence_id IN (SELECT sentence_id FROM postings WHERE word = ?)",
+                        (delta, word),
+                    )
+                    touched += cursor.rowcount
+            self._conn.executemany("INSERT INTO known_words (word) VALUES (?)", ((word,) for word in learned))
+            self._conn.executemany("DELETE FROM known_words WHERE word = ?", ((word,) for word in forgotten))
+
+        logger.info(
+            f"🔄 {len(learned)} newly known and {len(forgotten)} forgotten words, "
+            f"updated {touched:,} sentence counts"
+        )
+        return touched
+
+    def find_sentences(
+        self, unknown_count: int = 1, min_length: int = 0, max_length: Optional[int] = None
+    ) -> Iterator[SentenceMatch]:
+        """
+        Find sentences with exactly the given number of unknown words, shortest first.
+
+        Args:
+            unknown_count: Number of distinct unknown words in the sentence
+            min_length: Minimum sentence length in characters
+            max_length: Maximum sentence length in characters
+
+        Yields:
+            Matching sentences with their unknown words
+        """
+        rows = self._conn.execute(
+            "SELECT s.sentence_id, s.text, p.word FROM sentences s "
+            "JOIN postings p ON p.sentence_id = s.sentence_id "
+            "LEFT JOIN known_words k ON k.word = p.word "
+            "WHERE s.unknown_count = ? AND s.length >= ? AND s.length <= ? AND k.word IS NULL "
+            "ORDER BY s.length, s.sentence_id, p.word",
+            (unknown_count, min_length, max_length if max_length is not None else 2**31),
+        )
+
+        match: Optional[SentenceMatch] = None
+        for sentence_id, text, word in rows:
+            if match is not None and match.sentence_id != sentence_id:
+                yield match
+                match = None
+            if match is None:
+                match = SentenceMatch(sentence_id, text, [])
+            match.unknown_words.append(word)
+        if match is not None:
+            yield match
+
+    def close(self) -> None:
+        """Close the database."""
+        self._conn.close()
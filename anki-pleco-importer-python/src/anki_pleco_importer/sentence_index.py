@@ -0,0 +1,200 @@
+"""SQLite index of book sentences for finding example sentences by word."""
+
+import hashlib
+import logging
+import re
+import sqlite3
+from pathlib import Path
+from typing import Collection, Iterable, Iterator, List, NamedTuple, Set, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+# A sentence ends at Chinese or Western end punctuation, plus any closing quotes or brackets,
+# or at a line break (subtitles and paragraphs of plain text files)
+SENTENCE_PATTERN = re.compile(r"[^。！？；…!?\n]+(?:[。！？；…!?]+[”’」』）)]*)?")
+
+# Shorter fragments (headings, interjections) make poor example sentences
+MIN_SENTENCE_CHARACTERS = 5
+
+CHINESE_CHARACTER_PATTERN = re.compile(r"[\u4e00-\u9fff]")
+
+# Sentences read at a time while posting words, so the book never has to fit in memory
+INDEX_BATCH_SIZE = 5000
+
+
+# Chapters as (chapter_id, title, text) tuples
+ChapterT = TypeVar("ChapterT", bound=Tuple[str, str, str])
+
+
+class IndexedSource(NamedTuple):
+    """Identity of the file an index was built from."""
+
+    file_size: int
+    file_mtime_ns: int
+    segmenter: str
+
+
+def split_sentences(text: str) -> Iterator[str]:
+    """
+    Split cleaned text into sentences worth using as examples.
+
+    Args:
+        text: Chapter text with markup removed
+
+    Yields:
+        Stripped sentences with at least MIN_SENTENCE_CHARACTERS Chinese characters
+    """
+    for match in SENTENCE_PATTERN.finditer(text):
+        sentence = match.group().strip()
+        if len(CHINESE_CHARACTER_PATTERN.findall(sentence)) >= MIN_SENTENCE_CHARACTERS:
+            yield sentence
+
+
+class SentenceIndex:
+    """
+    Sentences of one book with an inverted index from words to sentences.
+
+    Postings are keyed by (word, sentence length, sentence id), so the K
+    shortest sentences containing a word are the first K rows of an index
+    range scan rather than a sort of every matching sentence.
+    """
+
+    def __init__(self, db_path: Path):
+        """
+        Open (or create) the index database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS source (file_size INTEGER, file_mtime_ns INTEGER, segmenter TEXT);"
+            "CREATE TABLE IF NOT EXISTS sentences ("
+            "sentence_id INTEGER PRIMARY KEY, chapter_id TEXT NOT NULL, length INTEGER NOT NULL, text TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            "word TEXT NOT NULL, length INTEGER NOT NULL, sentence_id INTEGER NOT NULL, "
+            "PRIMARY KEY (word, length, sentence_id)) WITHOUT ROWID;"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def path_for(index_dir: Path, source_path: Path) -> Path:
+        """Get the index database path for a source file."""
+        digest = hashlib.sha256(str(source_path.resolve()).encode("utf-8")).hexdigest()[:16]
+        return index_dir / f"{source_path.stem}-{digest}.sqlite3"
+
+    @staticmethod
+    def _source_identity(source_path: Path, segmenter: str) -> IndexedSource:
+        """Identify the current version of a source file."""
+        stat = source_path.stat()
+        return IndexedSource(stat.st_size, stat.st_mtime_ns, segmenter)
+
+    def is_current(self, source_path: Path, segmenter: str) -> bool:
+        """Check whether the index was completely built from this file and segmenter."""
+        row = self._conn.execute("SELECT file_size, file_mtime_ns, segmenter FROM source").fetchone()
+        return row is not None and IndexedSource(*row) == self._source_identity(source_path, segmenter)
+
+    def reset(self) -> None:
+        """Delete all sentences and postings before rebuilding."""
+        with self._conn:
+            self._conn.execute("DELETE FROM source")
+            self._conn.execute("DELETE FROM postings")
+            self._conn.execute("DELETE FROM sentences")
+
+    def record_chapters(self, chapters: Iterable[ChapterT]) -> Iterator[ChapterT]:
+        """
+        Store the sentences of chapters as they stream past.
+
+        Args:
+            chapters: Chapters being read for analysis
+
+        Yields:
+            The same chapters, unchanged
+        """
+        sentence_count = 0
+        for chapter in chapters:
+            chapter_id, _, text = chapter
+            rows = [(chapter_id, len(sentence), sentence) for sentence in split_sentences(text)]
+            with self._conn:
+                self._conn.executemany("INSERT INTO sentences (chapter_id, length, text) VALUES (?, ?, ?)", rows)
+            sentence_count += len(rows)
+            yield chapter
+
+        logger.info(f"📝 Indexed {sentence_count:,} sentences")
+
+    def index_words(self, vocabulary: Collection[str], source_path: Path, segmenter: str) -> None:
+        """
+        Build the inverted index of the recorded sentences and mark the index current.
+
+        Args:
+            vocabulary: Words of the book; a sentence is posted under every word it contains
+            source_path: File the sentences were read from
+            segmenter: Segmenter that produced the vocabulary
+        """
+        words: Set[str] = set(vocabulary)
+        max_length = max((len(word) for word in words), default=0)
+
+        posting_count = 0
+
+        def sentences() -> Iterator[Tuple[int, int, str]]:
+            last_id = 0
+            while True:
+                batch = self._conn.execute(
+                    "SELECT sentence_id, length, text FROM sentences "
+                    "WHERE sentence_id > ? ORDER BY sentence_id LIMIT ?",
+                    (last_id, INDEX_BATCH_SIZE),
+                ).fetchall()
+                if not batch:
+                    return
+                yield from batch
+                last_id = batch[-1][0]
+
+        def postings() -> Iterator[Tuple[str, int, int]]:
+            nonlocal posting_count
+            for sentence_id, length, text in sentences():
+                found = {
+                    text[start : start + size]
+                    for start in range(len(text))
+                    for size in range(1, max_length + 1)
+                    if text[start : start + size] in words
+                }
+                posting_count += len(found)
+                for word in found:
+                    yield word, length, sentence_id
+
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO postings (word, length, sentence_id) VALUES (?, ?, ?)", postings()
+            )
+            self._conn.execute("DELETE FROM source")
+            self._conn.execute(
+                "INSERT INTO source (file_size, file_mtime_ns, segmenter) VALUES (?, ?, ?)",
+                self._source_identity(source_path, segmenter),
+            )
+
+        logger.info(f"📝 Indexed {posting_count:,} word occurrences in sentences")
+
+    def find_examples(self, word: str, count: int) -> List[str]:
+        """
+        Get the shortest sentences containing a word.
+
+        Args:
+            word: Word to find
+            count: Maximum number of sentences
+
+        Returns:
+            Up to ``count`` sentences, shortest first
+        """
+        rows = self._conn.execute(
+            "SELECT s.text FROM postings p JOIN sentences s ON s.sentence_id = p.sentence_id "
+            "WHERE p.word = ? ORDER BY p.length, p.sentence_id LIMIT ?",
+            (word, count),
+        )
+        return [text for (text,) in rows]
+
+    def close(self) -> None:
+        """Close the database."""
+        self._conn.close()
@@ -0,0 +1,228 @@
+"""Read plain text and subtitle files as a stream of chapters for vocabulary analysis."""
+
+import codecs
+import logging
+import mmap
+import re
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+EPUB_SUFFIXES = (".epub",)
+TEXT_SUFFIXES = (".txt",)
+SUBTITLE_SUFFIXES = (".srt", ".ass", ".ssa")
+SUPPORTED_SUFFIXES = EPUB_SUFFIXES + TEXT_SUFFIXES + SUBTITLE_SUFFIXES
+
+# Bytes of a memory-mapped file decoded at a time
+READ_BLOCK_SIZE = 1024 * 1024
+
+# Text files without chapter headings are cut into sections of about this many characters
+MAX_SECTION_CHARACTERS = 200_000
+
+# Chapter headings of Chinese novels: 第一章, 第12回, 第三卷 ...
+CHAPTER_HEADING_PATTERN = re.compile(
+    r"^\s*第[0-9０-９零〇一二三四五六七八九十百千万两]+[章回节卷集部篇](?:\s.*|[^。！？]{0,30})$"
+)
+
+# Formatting inside subtitle text: HTML-like tags in SRT, override blocks in ASS
+SUBTITLE_MARKUP_PATTERN = re.compile(r"<[^>]+>|\{[^}]*\}")
+ASS_LINE_BREAK_PATTERN = re.compile(r"\\[Nnh]")
+
+
+class Chapter(NamedTuple):
+    """A single document of a book, already stripped of markup."""
+
+    chapter_id: str
+    title: str
+    text: str
+
+
+def is_epub(path: Path) -> bool:
+    """Check whether a file is an EPUB book, by its suffix."""
+    return path.suffix.lower() in EPUB_SUFFIXES
+
+
+def iter_file_lines(path: Path, encoding: str = "utf-8-sig") -> Iterator[str]:
+    """
+    Read the lines of a text file without loading it into one string.
+
+    The file is memory-mapped and decoded incrementally one block at a time,
+    so only the current block and the line being assembled are held as
+    Python strings.
+
+    Args:
+        path: File to read
+        encoding: Text encoding; undecodable bytes are replaced
+
+    Yields:
+        Lines without their line endings
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending = ""
+    with open(path, "rb") as file:
+        if path.stat().st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for start in range(0, len(mapped), READ_BLOCK_SIZE):
+                lines = (pending + decoder.decode(mapped[start : start + READ_BLOCK_SIZE])).split("\n")
+                # The last line may continue in the next block
+                pending = lines.pop()
+                for line in lines:
+                    yield line.rstrip("\r")
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+def iter_text_chapters(path: Path) -> Iterator[Chapter]:
+    """
+    Split a plain text file into chapters at chapter headings.
+
+    Text before the first heading becomes its own chapter, and chapters
+    longer than MAX_SECTION_CHARACTERS are cut at a line break, so memory
+    stays bounded even for files without headings.
+
+    Args:
+        path: UTF-8 text file
+
+    Yields:
+        Chapters with their lines joined by newlines
+    """
+    title = path.stem
+    part = 1
+    lines: List[str] = []
+    size = 0
+    count = 0
+
+    def chapter() -> Chapter:
+        chapter_title = title if part == 1 else f"{title} ({part})"
+        return Chapter(chapter_id=f"section_{count + 1}", title=chapter_title, text="\n".join(lines))
+
+    for line in iter_file_lines(path):
+        line = line.strip()
+        if not line:
+            continue
+
+        heading = CHAPTER_HEADING_PATTERN.match(line)
+        if heading or size >= MAX_SECTION_CHARACTERS:
+            if lines:
+                yield chapter()
+                count += 1
+            lines, size = [], 0
+            if heading:
+                title, part = line, 1
+            else:
+                part += 1
+
+        lines.append(line)
+        size += len(line)
+
+    if lines:
+        yield chapter()
+        count += 1
+
+    logger.info(f"Read {count} chapters from {path.name}")
+
+
+def _clean_subtitle_text(text: str) -> str:
+    """Remove formatting tags and line break codes from a subtitle."""
+    return SUBTITLE_MARKUP_PATTERN.sub("", ASS_LINE_BREAK_PATTERN.sub(" ", text)).strip()
+
+
+def iter_srt_subtitles(path: Path) -> Iterator[str]:
+    """
+    Read the subtitle texts of an SRT file.
+
+    Args:
+        path: SubRip file
+
+    Yields:
+        The text of each subtitle, its lines joined by spaces
+    """
+    cue: List[str] = []
+    expect_index = True
+    for line in iter_file_lines(path):
+        line = line.strip()
+        if not line:
+            if cue:
+                yield " ".join(cue)
+            cue, expect_index = [], True
+        elif expect_index and line.isdigit():
+            expect_index = False
+        elif "-->" in line:
+            expect_index = False
+        else:
+            expect_index = False
+            text = _clean_subtitle_text(line)
+            if text:
+                cue.append(text)
+
+    if cue:
+        yield " ".join(cue)
+
+
+def iter_ass_subtitles(path: Path) -> Iterator[str]:
+    """
+    Read the dialogue texts of an ASS/SSA file.
+
+    Args:
+        path: Advanced SubStation Alpha file
+
+    Yields:
+        The text of each Dialogue event, with override tags removed
+    """
+    fields: Optional[List[str]] = None
+    in_events = False
+    for line in iter_file_lines(path):
+        line = line.strip()
+        if line.startswith("["):
+            in_events = line.lower() == "[events]"
+            continue
+        if not in_events or ":" not in line:
+            continue
+
+        kind, _, value = line.partition(":")
+        if kind == "Format":
+            fields = [field.strip() for field in value.split(",")]
+        elif kind == "Dialogue" and fields and "Text" in fields:
+            values = value.split(",", len(fields) - 1)
+            if len(values) == len(fields):
+                text = _clean_subtitle_text(values[fields.index("Text")])
+                if text:
+                    yield text
+
+
+def iter_subtitle_chapters(path: Path) -> Iterator[Chapter]:
+    """
+    Read a subtitle file as a single chapter with one line per subtitle.
+
+    Args:
+        path: SRT, ASS or SSA file
+
+    Yields:
+        One chapter titled after the file, unless it has no text
+    """
+    subtitles = iter_srt_subtitles(path) if path.suffix.lower() == ".srt" else iter_ass_subtitles(path)
+    text = "\n".join(subtitles)
+    if text:
+        yield Chapter(chapter_id=path.name, title=path.stem, text=text)
+
+
+def iter_file_chapters(path: Path) -> Iterator[Chapter]:
+    """
+    Read a plain text or subtitle file as chapters.
+
+    Args:
+        path: File with one of TEXT_SUFFIXES or SUBTITLE_SUFFIXES
+
+    Returns:
+        Iterator of chapters in reading order
+    """
+    suffix = path.suffix.lower()
+    if suffix in TEXT_SUFFIXES:
+        return iter_text_chapters(path)
+    if suffix in SUBTITLE_SUFFIXES:
+        return iter_subtitle_chapters(path)
+    raise ValueError(f"Unsupported file type: {path.name} (supported: {', '.join(SUPPORTED_SUFFIXES)})")